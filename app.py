@@ -1,24 +1,29 @@
-import pandas as pd
-import json
-from src.utils.ssl_handler import configure_ssl
+import argparse
+
 from src.analyzer.sentiment_analyzer import ProductSentimentAnalyzer
-import streamlit as st
-# Import other necessary modules
-from utils.customization import apply_customizations
+from src.utils.ingestion import iter_reviews
 
-def load_comments(file_path):
-    with open(file_path, 'r') as file:
-        data = json.load(file)
-        return data['comments']
+COMMENTS_FILE = 'data/product_comments.json'
+# New comments listed per category after each incremental run
+MAX_LISTED_COMMENTS = 50
 
-def main():
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Sentiment of the product comments file')
+    parser.add_argument('--incremental', action='store_true',
+                        help='only score comments appended since the last --incremental run')
+    args = parser.parse_args(argv)
     analyzer = ProductSentimentAnalyzer()
-    # Uses analyze_comments() for batch processing
-    # Load product comments from JSON file
-    product_comments = load_comments('data/product_comments.json')
-    
-    # Analyze comments
-    categorized_comments = analyzer.analyze_comments(product_comments)
+    if args.incremental:
+        # Totals come from the saved state, and a changed file or analyzer
+        # triggers a full rescan
+        run = analyzer.analyze_incremental(COMMENTS_FILE, max_examples=MAX_LISTED_COMMENTS)
+        scan = 'full scan: ' + run.reason if run.mode == 'full' else 'incremental'
+        print(f"\nScored {run.stream.count} new comments, {run.summary.count} in total ({scan})")
+        categorized_comments, counts = run.stream.examples, run.summary.counts
+    else:
+        # JSON, JSONL, CSV or TXT, optionally .gz/.zst, parsed incrementally
+        categorized_comments = analyzer.analyze_comments(list(iter_reviews(COMMENTS_FILE)))
+        counts = categorized_comments['counts']
     
     # Print results
     print("\nPositive Comments:")
@@ -33,18 +38,17 @@ def main():
     for comment in categorized_comments['neutral']:
         print(f"- {comment}")
 
-    # Create a DataFrame for better visualization
-    df = pd.DataFrame({
-        'Category': ['Positive', 'Negative', 'Neutral'],
-        'Count': [
-            len(categorized_comments['positive']),
-            len(categorized_comments['negative']),
-            len(categorized_comments['neutral'])
-        ]
-    })
-    
     print("\nSummary:")
-    print(df)
+    for category in ('positive', 'negative', 'neutral'):
+        print(f"{category.capitalize():<10}{counts[category]:>8}")
+
+    render_header()
+
+def render_header():
+    # Streamlit and the admin customizations only load for the UI; headless
+    # batch runs should use `python -m src.cli` instead
+    import streamlit as st
+    from utils.customization import apply_customizations
 
     # Apply customizations first
     custom_settings = apply_customizations()
@@ -1,40 +1,372 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
 import streamlit as st
 import pandas as pd
 import plotly.express as px
+from src.analyzer.aspects import AspectIndex, AspectMatcher, describe_aspects
+from src.analyzer.cache import ScoreCache
+from src.analyzer.columnar import COLUMNAR_FORMATS, read_results, write_results
 from src.analyzer.sentiment_analyzer import ProductSentimentAnalyzer
-import json  # Add this import
+from src.config.settings import RESULTS_DIR
+from src.utils.ingestion import csv_columns, detect_format, iter_reviews
+
+# Number of analyzed files whose results stay in memory
+MAX_CACHED_FILES = 8
+# Reviews per page of the drill-down table; only one page reaches the browser
+PAGE_SIZE = 25
+SORT_OPTIONS = {
+    "Most negative first": ('compound', False),
+    "Most positive first": ('compound', True),
+    "File order": ('row', False),
+}
+
+class ResultStore:
+    """Batch results and aspect indexes of recently analyzed files, keyed by a hash of their content"""
+
+    def __init__(self, max_files=MAX_CACHED_FILES):
+        self.max_files = max_files
+        self._results = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, digest):
+        with self._lock:
+            if digest in self._results:
+                self._results.move_to_end(digest)
+            return self._results.get(digest)
+
+    def put(self, digest, results):
+        with self._lock:
+            self._results[digest] = results
+            self._results.move_to_end(digest)
+            while len(self._results) > self.max_files:
+                self._results.popitem(last=False)
+
+@st.cache_resource
+def get_analyzer():
+    """One analyzer and score cache shared by every session and rerun"""
+    return ProductSentimentAnalyzer(engine='vectorized', cache=ScoreCache())
+
+@st.cache_resource
+def get_aspect_matcher():
+    return AspectMatcher()
+
+@st.cache_resource
+def get_result_store():
+    return ResultStore()
 
-def load_file_content(uploaded_file):
+@st.cache_resource(max_entries=MAX_CACHED_FILES)
+def load_saved_results(path, modified, labels, low, high):
+    """Memory-mapped results file filtered by label and compound range; modified keys reloads"""
+    results, aspects = read_results(path, labels, low, high)
+    if aspects is None:
+        aspects = AspectIndex.from_results(results, get_aspect_matcher())
+    return results, aspects
+
+def list_saved_results():
+    if not os.path.isdir(RESULTS_DIR):
+        return []
+    return sorted(name for name in os.listdir(RESULTS_DIR)
+                  if os.path.splitext(name)[1].lower() in COLUMNAR_FORMATS)
+
+def saved_results_name(name, digest):
+    """File name for saved results: the upload's name plus a short hash of its content and options"""
+    stem = os.path.splitext(os.path.basename(name))[0]
+    return f"{stem}-{hashlib.sha256(digest.encode()).hexdigest()[:12]}.parquet"
+
+def save_results(stored, name, digest):
+    """Button persisting analyzed results under RESULTS_DIR for the Saved Results view"""
+    if not st.button("Save Results"):
+        return
+    results, aspects = stored
+    path = os.path.join(RESULTS_DIR, saved_results_name(name, digest))
+    try:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        write_results(results, path, aspects=aspects, source=name)
+    except (OSError, ImportError) as e:
+        st.error(f"Could not save results: {e}")
+        return
+    st.success(f"Saved {results.total:,} scored reviews to {path}")
+
+def render_saved_results():
+    """Results scored earlier (here or by `python -m src.cli -o RESULTS_DIR/name.parquet`), without re-scoring"""
+    saved = list_saved_results()
+    if not saved:
+        st.info(f"No saved results in {RESULTS_DIR} yet. Analyze a file and save it, or run "
+                f"`python -m src.cli reviews.json -o {RESULTS_DIR}/reviews.parquet`.")
+        return
+    name = st.selectbox("Results file", saved)
+    col_labels, col_range = st.columns(2)
+    with col_labels:
+        labels = st.multiselect("Sentiment", ['positive', 'neutral', 'negative'],
+                                default=['positive', 'neutral', 'negative'])
+    with col_range:
+        low, high = st.slider("Compound score", -1.0, 1.0, (-1.0, 1.0), step=0.05)
+    path = os.path.join(RESULTS_DIR, name)
+    try:
+        results, aspects = load_saved_results(path, os.path.getmtime(path), tuple(labels),
+                                              low if low > -1 else None, high if high < 1 else None)
+    except (OSError, ValueError, LookupError, ImportError) as e:
+        st.error(f"Could not load {name}: {e}")
+        return
+    if not results.total:
+        st.info("No reviews match these filters.")
+        return
+    render_batch_results(results, aspects)
+
+def load_file_content(uploaded_file, review_column=None):
     if uploaded_file is not None:
-        file_extension = uploaded_file.name.split('.')[-1].lower()
-        
-        if file_extension == 'json':
-            data = json.load(uploaded_file)
-            return data.get('comments', [])
-            
-        elif file_extension == 'csv':
-            df = pd.read_csv(uploaded_file)
-            # Assuming the reviews are in a column named 'review' or the first column
-            review_column = df.columns[0]
-            return df[review_column].tolist()
-            
-        elif file_extension == 'txt':
-            content = uploaded_file.read().decode('utf-8')
-            # Split by new lines and remove empty lines
-            return [line.strip() for line in content.split('\n') if line.strip()]
-            
-        else:
-            st.error("Unsupported file format. Please upload JSON, CSV, or TXT file.")
+        uploaded_file.seek(0)
+        try:
+            # Parsed incrementally, so only the review strings are held in memory
+            return list(iter_reviews(uploaded_file, name=uploaded_file.name,
+                                     review_column=review_column))
+        except (ValueError, ImportError, UnicodeDecodeError) as e:
+            st.error(f"Could not read {uploaded_file.name}: {e}")
             return []
     return []
 
+def choose_review_column(uploaded_file):
+    """Let the user pick the review column of an uploaded CSV file"""
+    if detect_format(uploaded_file.name) != 'csv':
+        return None
+    uploaded_file.seek(0)
+    columns = csv_columns(uploaded_file)
+    if not columns:
+        return None
+    default = columns.index('review') if 'review' in columns else 0
+    return st.selectbox("Review column", columns, index=default)
+
+def analyze_with_progress(analyzer, reviews):
+    """Analyze in chunks, updating a progress bar and partial metrics as they finish"""
+    progress_bar = st.progress(0.0, text=f"Analyzing {len(reviews)} reviews...")
+    partial = st.empty()
+    
+    def show_progress(state):
+        done, total = state['done'], state['total']
+        progress_bar.progress(done / total, text=f"Analyzed {done:,} of {total:,} reviews")
+        with partial.container():
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                st.metric("Positive so far", f"{state['counts']['positive']:,}")
+            with col2:
+                st.metric("Neutral so far", f"{state['counts']['neutral']:,}")
+            with col3:
+                st.metric("Negative so far", f"{state['counts']['negative']:,}")
+    
+    results = analyzer.analyze_comments(reviews, progress=show_progress)
+    progress_bar.empty()
+    partial.empty()
+    return results
+
+def render_batch_results(results, aspects):
+    """Summary, breakdown and conclusion for a batch of analyzed reviews"""
+    avg_scores = results['average_scores']
+    
+    st.write(f"Analyzed {results.total} reviews")
+    
+    # Display results similar to single review
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Positive", f"{int(avg_scores['pos']*100)}%")
+    with col2:
+        st.metric("Neutral", f"{int(avg_scores['neu']*100)}%")
+    with col3:
+        st.metric("Negative", f"{int(avg_scores['neg']*100)}%")
+    
+    # Show total
+    total = int(avg_scores['pos']*100) + int(avg_scores['neu']*100) + int(avg_scores['neg']*100)
+    st.write(f"Total: {total}%")
+    
+    # Final conclusion with loading bar
+    st.write("---")
+    st.write("Overall Sentiment Score:")
+    
+    # Create a centered progress bar with labels
+    col1, col2, col3 = st.columns([1,3,1])
+    with col1:
+        st.write("-1")
+    with col2:
+        st.progress((avg_scores['compound'] + 1) / 2)
+    with col3:
+        st.write("+1")
+    
+    # Show final score and conclusion
+    st.write(f"Score: {avg_scores['compound']:.2f}")
+    distribution = results['distribution']
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("10th percentile", f"{distribution['p10']:+.2f}")
+    with col2:
+        st.metric("Median", f"{distribution['p50']:+.2f}")
+    with col3:
+        st.metric("90th percentile", f"{distribution['p90']:+.2f}")
+    with col4:
+        st.metric("Polarization", f"{distribution['polarization']:.0%}",
+                  help="Share of reviews that are strongly positive and strongly negative in equal measure")
+    if avg_scores['compound'] >= 0.05:
+        st.success("Overall: Positive Reviews 😊")
+    elif avg_scores['compound'] <= -0.05:
+        st.error("Overall: Negative Reviews 😔")
+        st.warning("Note: Our team has been notified about the concerns, and we're working on improvements.")
+    else:
+        st.info("Overall: Neutral Reviews 😐")
+    
+    # Create pie chart
+    col_stats, col_chart = st.columns([1, 1])
+    
+    with col_stats:
+        st.subheader("Review Breakdown")
+        st.write(f"✅ Positive Reviews: {results['counts']['positive']}")
+        st.write(f"➖ Neutral Reviews: {results['counts']['neutral']}")
+        st.write(f"❌ Negative Reviews: {results['counts']['negative']}")
+    
+    with col_chart:
+        df = pd.DataFrame({
+            'Sentiment': ['Positive', 'Neutral', 'Negative'],
+            'Score': [avg_scores['pos'], avg_scores['neu'], avg_scores['neg']]
+        })
+        
+        fig = px.pie(df, values='Score', names='Sentiment',
+                    color_discrete_sequence=['#00CC96', '#636EFA', '#EF553B'],
+                    title='Sentiment Distribution')
+        fig.update_layout(margin=dict(t=40, b=40))
+        st.plotly_chart(fig, use_container_width=True)
+    
+    # Add conclusion section
+    st.write("---")
+    st.subheader("🎯 Analysis Summary")
+    
+    # Calculate percentages
+    total_reviews = results.total
+    pos_count = results['counts']['positive']
+    neg_count = results['counts']['negative']
+    neu_count = results['counts']['neutral']
+    strong_points = describe_aspects(aspects.strengths(), 'positive') or "No single aspect stands out"
+    concerns = describe_aspects(aspects.issues(), 'negative') or "No single aspect stands out"
+    
+    # Display conclusion based on overall sentiment
+    if avg_scores['compound'] >= 0.05:
+        st.success(f"""
+        ✨ Product Analysis:
+        • {int((pos_count/total_reviews)*100)}% customers reported positive experiences
+        • Strong points: {strong_points}
+        • Verdict: Recommended product with good customer feedback
+        
+        💡 Key Insights:
+        • Product shows consistent quality and reliability
+        • Good value for money investment
+        • High customer satisfaction rate
+        """)
+    elif avg_scores['compound'] <= -0.05:
+        st.error(f"""
+        ⚠️ Product Analysis:
+        • {int((neg_count/total_reviews)*100)}% customers reported issues
+        • Common concerns: {concerns}
+        • Verdict: Product improvement process initiated
+        
+        💡 Action Taken:
+        • Seller has been notified of customer concerns
+        • Quality improvement process in progress
+        • Enhanced quality control measures being implemented
+        • Customer feedback is being addressed
+        """)
+    else:
+        st.info(f"""
+        📝 Product Analysis:
+        • Mixed feedback from customers
+        • Product meets basic expectations
+        • Verdict: Research specific features you need before purchase
+        
+        💡 Enhancement Suggestions:
+        • Consider adding unique features
+        • Focus on consistency in performance
+        • Improve overall user experience
+        """)
+
+    render_distribution(results)
+    render_aspect_breakdown(results, aspects)
+
+def render_distribution(results):
+    """Compound histogram from the pre-binned counts, and a paginated drill-down into a score range"""
+    st.write("---")
+    st.subheader("📊 Score Distribution")
+    col_bins, col_range = st.columns([1, 3])
+    with col_bins:
+        bins = st.select_slider("Bins", options=[10, 20, 40, 50, 100, 200], value=40, key="histogram_bins")
+    with col_range:
+        low, high = st.slider("Compound range", -1.0, 1.0, (-1.0, 1.0), step=0.01, key="drill_range")
+    # Only bins x labels counts are sent to the browser, however many reviews there are
+    edges, counts = results.histogram(bins, low, high)
+    df = pd.DataFrame({
+        'Compound': [(left + right) / 2 for left, right in zip(edges, edges[1:])],
+        **{label.capitalize(): counts[label] for label in counts},
+    })
+    fig = px.bar(df, x='Compound', y=['Positive', 'Neutral', 'Negative'],
+                 color_discrete_sequence=['#00CC96', '#636EFA', '#EF553B'],
+                 labels={'value': 'Reviews', 'variable': 'Sentiment'},
+                 title='Compound Score Histogram')
+    fig.update_layout(bargap=0, margin=dict(t=40, b=40))
+    st.plotly_chart(fig, use_container_width=True)
+
+    col_labels, col_sort = st.columns(2)
+    with col_labels:
+        labels = st.multiselect("Show", ['positive', 'neutral', 'negative'],
+                                default=['positive', 'neutral', 'negative'], key="drill_labels")
+    with col_sort:
+        sort = st.selectbox("Sort by", list(SORT_OPTIONS), key="drill_sort")
+    # Filtering and sorting run here; the sort order is computed once per results
+    rows = results.select(labels, low, high, *SORT_OPTIONS[sort])
+    pages = max(1, -(-len(rows) // PAGE_SIZE))
+    number = min(st.number_input("Page", min_value=1, value=1, step=1, key="drill_page"), pages)
+    st.caption(f"{len(rows):,} reviews in range · page {number:,} of {pages:,}")
+    st.dataframe(results.page(rows, number - 1, PAGE_SIZE), hide_index=True, use_container_width=True)
+
+def render_aspect_breakdown(results, aspects, max_reviews=20):
+    """Per-aspect sentiment, with a drill-down into the reviews mentioning one aspect"""
+    st.write("---")
+    st.subheader("🔍 Aspect Breakdown")
+    frame = aspects.to_dataframe()
+    if not frame['mentions'].any():
+        st.info("None of the tracked aspects are mentioned in these reviews.")
+        return
+    fig = px.bar(frame, x='aspect', y=['positive', 'neutral', 'negative'],
+                 color_discrete_sequence=['#00CC96', '#636EFA', '#EF553B'],
+                 labels={'value': 'Mentions', 'variable': 'Sentiment'},
+                 title='Sentiment by Aspect')
+    st.plotly_chart(fig, use_container_width=True)
+
+    col_aspect, col_sentiment = st.columns(2)
+    with col_aspect:
+        aspect = st.selectbox("Aspect", aspects.aspects)
+    with col_sentiment:
+        sentiment = st.selectbox("Sentiment", ['negative', 'positive', 'neutral', 'all'])
+    summary = aspects.summaries[aspect]
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Mentions", f"{summary.count:,}")
+    with col2:
+        st.metric("Mean score", f"{summary.average_scores['compound']:+.2f}")
+    with col3:
+        share = summary.counts['negative'] / summary.count if summary.count else 0
+        st.metric("Negative", f"{share:.0%}")
+    # Review ids come straight from the index: no rescan of the reviews
+    rows = aspects.review_ids(aspect, None if sentiment == 'all' else sentiment)
+    for row in rows[:max_reviews].tolist():
+        st.write(f"{results.compound[row]:+.2f} · {results.text(row)}")
+    if len(rows) > max_reviews:
+        st.caption(f"Showing {max_reviews} of {len(rows):,} reviews")
+
+
 def main():
     st.set_page_config(page_title="Product Review Sentiment Analyzer", page_icon="🎯")
     
     st.title("Product Review Sentiment Analyzer 🎯")
     
-    # Initialize ProductSentimentAnalyzer instead of direct VADER
-    analyzer = ProductSentimentAnalyzer()
+    # Shared ProductSentimentAnalyzer, built once per server process
+    analyzer = get_analyzer()
     # Uses both analyze_review() for single reviews
     # and analyze_comments() for file uploads
     
@@ -42,7 +374,7 @@ def main():
     st.write("Choose your input method:")
     input_method = st.radio(
         label="Input Method",
-        options=["Enter Text", "Upload File"],
+        options=["Enter Text", "Upload File", "Saved Results"],
         label_visibility="collapsed"
     )
     
@@ -128,125 +460,42 @@ def main():
                         st.plotly_chart(fig, use_container_width=True)
                     
                     # Continue with existing code for progress bar and conclusions...
-    else:
+    elif input_method == "Upload File":
         # File upload and batch analysis
-        uploaded_file = st.file_uploader("Upload your reviews file", type=['json', 'csv', 'txt'])
+        uploaded_file = st.file_uploader(
+            "Upload your reviews file",
+            type=['json', 'jsonl', 'ndjson', 'csv', 'txt', 'gz', 'zst'],
+            help="JSON, JSONL, CSV or TXT, optionally gzip (.gz) or zstd (.zst) compressed"
+        )
         
-        if uploaded_file and st.button("Analyze File"):
-            reviews = load_file_content(uploaded_file)
+        if uploaded_file:
+            try:
+                review_column = choose_review_column(uploaded_file)
+            except ValueError as e:
+                st.error(str(e))
+                return
+            # Files analyzed before (by any session) render straight from the store
+            digest = hashlib.sha256(uploaded_file.getvalue()).hexdigest()
+            if review_column is not None:
+                digest = f"{digest}:{review_column}"
+            stored = get_result_store().get(digest)
             
-            if reviews:
-                # Use ProductSentimentAnalyzer's batch analysis
-                results = analyzer.analyze_comments(reviews)
-                avg_scores = results['average_scores']
-                
-                st.write(f"Analyzing {len(reviews)} reviews...")
-                
-                # Display results similar to single review
-                col1, col2, col3 = st.columns(3)
-                with col1:
-                    st.metric("Positive", f"{int(avg_scores['pos']*100)}%")
-                with col2:
-                    st.metric("Neutral", f"{int(avg_scores['neu']*100)}%")
-                with col3:
-                    st.metric("Negative", f"{int(avg_scores['neg']*100)}%")
-                
-                # Show total
-                total = int(avg_scores['pos']*100) + int(avg_scores['neu']*100) + int(avg_scores['neg']*100)
-                st.write(f"Total: {total}%")
+            if stored is None and st.button("Analyze File"):
+                reviews = load_file_content(uploaded_file, review_column)
                 
-                # Final conclusion with loading bar
-                st.write("---")
-                st.write("Overall Sentiment Score:")
-                
-                # Create a centered progress bar with labels
-                col1, col2, col3 = st.columns([1,3,1])
-                with col1:
-                    st.write("-1")
-                with col2:
-                    st.progress((avg_scores['compound'] + 1) / 2)
-                with col3:
-                    st.write("+1")
-                
-                # Show final score and conclusion
-                st.write(f"Score: {avg_scores['compound']:.2f}")
-                if avg_scores['compound'] >= 0.05:
-                    st.success("Overall: Positive Reviews 😊")
-                elif avg_scores['compound'] <= -0.05:
-                    st.error("Overall: Negative Reviews 😔")
-                    st.warning("Note: Our team has been notified about the concerns, and we're working on improvements.")
-                else:
-                    st.info("Overall: Neutral Reviews 😐")
-                
-                # Create pie chart
-                col_stats, col_chart = st.columns([1, 1])
-                
-                with col_stats:
-                    st.subheader("Review Breakdown")
-                    st.write(f"✅ Positive Reviews: {len(results['positive'])}")
-                    st.write(f"➖ Neutral Reviews: {len(results['neutral'])}")
-                    st.write(f"❌ Negative Reviews: {len(results['negative'])}")
-                
-                with col_chart:
-                    df = pd.DataFrame({
-                        'Sentiment': ['Positive', 'Neutral', 'Negative'],
-                        'Score': [avg_scores['pos'], avg_scores['neu'], avg_scores['neg']]
-                    })
-                    
-                    fig = px.pie(df, values='Score', names='Sentiment',
-                                color_discrete_sequence=['#00CC96', '#636EFA', '#EF553B'],
-                                title='Sentiment Distribution')
-                    fig.update_layout(margin=dict(t=40, b=40))
-                    st.plotly_chart(fig, use_container_width=True)
-                
-                # Add conclusion section
+                if reviews:
+                    results = analyze_with_progress(analyzer, reviews)
+                    stored = results, AspectIndex.from_results(results, get_aspect_matcher())
+                    get_result_store().put(digest, stored)
+            
+            if stored is not None:
+                render_batch_results(*stored)
                 st.write("---")
-                st.subheader("🎯 Analysis Summary")
-                
-                # Calculate percentages
-                total_reviews = len(reviews)
-                pos_count = len(results['positive'])
-                neg_count = len(results['negative'])
-                neu_count = len(results['neutral'])
-                
-                # Display conclusion based on overall sentiment
-                if avg_scores['compound'] >= 0.05:
-                    st.success(f"""
-                    ✨ Product Analysis:
-                    • {int((pos_count/total_reviews)*100)}% customers reported positive experiences
-                    • Strong points: Product quality and satisfaction
-                    • Verdict: Recommended product with good customer feedback
-                    
-                    💡 Key Insights:
-                    • Product shows consistent quality and reliability
-                    • Good value for money investment
-                    • High customer satisfaction rate
-                    """)
-                elif avg_scores['compound'] <= -0.05:
-                    st.error(f"""
-                    ⚠️ Product Analysis:
-                    • {int((neg_count/total_reviews)*100)}% customers reported issues
-                    • Common concerns: Product reliability and expectations
-                    • Verdict: Product improvement process initiated
-                    
-                    💡 Action Taken:
-                    • Seller has been notified of customer concerns
-                    • Quality improvement process in progress
-                    • Enhanced quality control measures being implemented
-                    • Customer feedback is being addressed
-                    """)
-                else:
-                    st.info(f"""
-                    📝 Product Analysis:
-                    • Mixed feedback from customers
-                    • Product meets basic expectations
-                    • Verdict: Research specific features you need before purchase
-                    
-                    💡 Enhancement Suggestions:
-                    • Consider adding unique features
-                    • Focus on consistency in performance
-                    • Improve overall user experience
-                    """)
+                save_results(stored, uploaded_file.name, digest)
+    else:
+        # Scored results persisted earlier, memory-mapped instead of re-analyzed
+        render_saved_results()
+
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
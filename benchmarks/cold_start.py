@@ -0,0 +1,77 @@
+"""Cold-start benchmark: text lexicon constructor vs compiled, memory-mapped lexicon.
+
+Run from the repository root:
+
+    python -m benchmarks.cold_start [--runs 10]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from src.analyzer.compiled_lexicon import CompiledSentimentAnalyzer, compile_lexicon
+
+# Each snippet runs in a fresh interpreter and prints seconds from first
+# import to the first scored review
+COLD_START = {
+    'text lexicon': (
+        'import time; start = time.perf_counter()\n'
+        'from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer\n'
+        'SentimentIntensityAnalyzer().polarity_scores("Great product!")\n'
+        'print(time.perf_counter() - start)\n'
+    ),
+    'compiled lexicon': (
+        'import time; start = time.perf_counter()\n'
+        'from src.analyzer.compiled_lexicon import CompiledSentimentAnalyzer\n'
+        'CompiledSentimentAnalyzer({path!r}).polarity_scores("Great product!")\n'
+        'print(time.perf_counter() - start)\n'
+    ),
+}
+
+
+def cold_start(snippet, runs):
+    timings = []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, '-c', snippet], check=True,
+                                capture_output=True, text=True).stdout
+        timings.append(float(output))
+    return timings
+
+
+def constructor(factory, runs):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        factory()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def report(name, timings):
+    print(f'{name:<32} median {statistics.median(timings) * 1000:8.2f} ms'
+          f'   min {min(timings) * 1000:8.2f} ms')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=10)
+    args = parser.parse_args()
+
+    from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = compile_lexicon(os.path.join(tmp, 'vader_lexicon.bin'))
+        print('Fresh interpreter, import to first score:')
+        for name, snippet in COLD_START.items():
+            report(name, cold_start(snippet.format(path=path), args.runs))
+        print('Constructor only, warm interpreter:')
+        report('SentimentIntensityAnalyzer()', constructor(SentimentIntensityAnalyzer, args.runs))
+        report('CompiledSentimentAnalyzer()',
+               constructor(lambda: CompiledSentimentAnalyzer(path), args.runs))
+
+
+if __name__ == '__main__':
+    main()
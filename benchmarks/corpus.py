@@ -0,0 +1,113 @@
+"""Seeded synthetic product-review corpus for benchmarks.
+
+Reviews mix sentiment words, boosters, negations, "but" clauses, ALL-CAPS
+emphasis, emoticons, emoji and punctuation at short, medium and long
+lengths. The same (size, seed) always yields the same reviews.
+
+    python -m benchmarks.corpus 1000000 data/bench_1m.jsonl.gz [--seed 0]
+"""
+import argparse
+import csv
+import gzip
+import json
+import random
+
+POSITIVE = ['great', 'good', 'excellent', 'amazing', 'love', 'perfect', 'happy', 'nice',
+            'awesome', 'recommend', 'fantastic', 'comfortable', 'reliable', 'best', 'fun']
+NEGATIVE = ['bad', 'terrible', 'awful', 'broken', 'hate', 'poor', 'worst', 'disappointed',
+            'useless', 'cheap', 'annoying', 'horrible', 'waste', 'angry', 'flimsy']
+NEUTRAL = ['product', 'delivery', 'box', 'battery', 'screen', 'price', 'size', 'color',
+           'it', 'the', 'was', 'is', 'and', 'arrived', 'on', 'time', 'after', 'week',
+           'quality', 'seller', 'packaging', 'charger', 'manual', 'for', 'my', 'kids']
+BOOSTERS = ['very', 'really', 'extremely', 'so', 'kind of', 'slightly', 'incredibly', 'barely']
+NEGATIONS = ['not', "isn't", "doesn't", 'never', "wasn't", 'no', 'without', 'hardly']
+EMOTICONS = [':)', ':(', ':D', ';)', ':/', '<3']
+EMOJI = ['😀', '😍', '👍', '👎', '😡', '😢', '🔥', '💯', '🙄', '✨']
+ENDINGS = ['.', '!', '!!!', '?', '', '...']
+# Words per clause for short, medium and long reviews, and how often each occurs
+LENGTHS = [(2, 6), (6, 20), (20, 60)]
+LENGTH_WEIGHTS = [0.45, 0.4, 0.15]
+
+
+def _clause(rng, words):
+    parts = []
+    for _ in range(words):
+        roll = rng.random()
+        if roll < 0.15:
+            word = rng.choice(POSITIVE)
+        elif roll < 0.27:
+            word = rng.choice(NEGATIVE)
+        elif roll < 0.33:
+            word = rng.choice(BOOSTERS)
+        elif roll < 0.38:
+            word = rng.choice(NEGATIONS)
+        else:
+            word = rng.choice(NEUTRAL)
+        if rng.random() < 0.05:
+            word = word.upper()
+        parts.append(word)
+    return ' '.join(parts)
+
+
+def review(rng):
+    """One synthetic review drawn from rng"""
+    low, high = rng.choices(LENGTHS, LENGTH_WEIGHTS)[0]
+    words = rng.randint(low, high)
+    text = _clause(rng, words)
+    if rng.random() < 0.2:
+        text += ', but ' + _clause(rng, max(2, words // 2))
+    text += rng.choice(ENDINGS)
+    if rng.random() < 0.1:
+        text += ' ' + rng.choice(EMOTICONS)
+    if rng.random() < 0.1:
+        text += ' ' + ''.join(rng.choices(EMOJI, k=rng.randint(1, 3)))
+    if rng.random() < 0.03:
+        text = text.upper()
+    return text
+
+
+def generate_reviews(size, seed=0):
+    """Yield size reviews; memory stays flat for any size"""
+    rng = random.Random(seed)
+    for _ in range(size):
+        yield review(rng)
+
+
+def write_corpus(path, size, seed=0):
+    """Write a corpus as JSON, JSONL, CSV or TXT (by extension, .gz allowed)"""
+    from src.utils.ingestion import detect_format
+
+    fmt = detect_format(path)
+    opener = gzip.open if path.endswith('.gz') else open
+    reviews = generate_reviews(size, seed)
+    with opener(path, 'wt', encoding='utf-8', newline='') as f:
+        if fmt == 'json':
+            f.write('{"comments": [')
+            for i, text in enumerate(reviews):
+                f.write((',\n' if i else '\n') + json.dumps(text))
+            f.write('\n]}\n')
+        elif fmt == 'jsonl':
+            for text in reviews:
+                f.write(json.dumps({'review': text}) + '\n')
+        elif fmt == 'csv':
+            writer = csv.writer(f)
+            writer.writerow(['review', 'rating'])
+            for text in reviews:
+                writer.writerow([text, 0])
+        else:
+            for text in reviews:
+                f.write(text.replace('\n', ' ') + '\n')
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('size', type=int)
+    parser.add_argument('path')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+    print(write_corpus(args.path, args.size, args.seed))
+
+
+if __name__ == '__main__':
+    main()
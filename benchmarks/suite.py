@@ -0,0 +1,300 @@
+"""Benchmark suite for scoring, ingestion and start-up, with regression checks.
+
+Every case runs in a fresh interpreter so start-up and peak RSS are measured
+in isolation. Run from the repository root:
+
+    python -m benchmarks.suite --sizes 1000,100000 --output bench.json
+    python -m benchmarks.suite --compare bench.json      # exit status 1 on regression
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ENGINES = ('vader', 'vectorized')
+INGEST_FORMATS = ('json', 'jsonl', 'csv', 'txt', 'jsonl.gz')
+CASES = ('construct', 'analyze_review', 'analyze_comments', 'ingestion', 'instrumentation')
+# analyze_review latency is sampled on at most this many reviews
+LATENCY_SAMPLE = 100000
+# Budgets checked on every run: (case, metric) -> highest allowed value
+BUDGETS = {('instrumentation', 'disabled_overhead_pct'): 1.0}
+# Short timed sections are repeated for at least this long and the best pass kept
+MIN_TIMED_S = 0.5
+
+
+def _peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1 << 20) if sys.platform == 'darwin' else peak / 1024
+
+
+def _percentile(sorted_values, q):
+    index = min(len(sorted_values) - 1, int(round(q * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def _best_time(function):
+    """Fastest of as many passes of function as fit in MIN_TIMED_S (at least one)"""
+    best, spent = float('inf'), 0.0
+    while spent < MIN_TIMED_S:
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        best = min(best, elapsed)
+        spent += elapsed
+    return best
+
+
+def bench_construct(engine, size, seed):
+    start = time.perf_counter()
+    from src.analyzer.sentiment_analyzer import ProductSentimentAnalyzer
+    from src.utils.lexicon_manager import reset_resolver
+    imported = time.perf_counter()
+    ProductSentimentAnalyzer(engine=engine)
+    constructed = time.perf_counter()
+    # A fresh resolver re-verifies and re-reads the lexicon, as a new process would
+    timings = []
+    for _ in range(20):
+        reset_resolver()
+        begin = time.perf_counter()
+        ProductSentimentAnalyzer(engine=engine)
+        timings.append(time.perf_counter() - begin)
+    # Later analyzers in one process share the resolver's lexicon
+    shared = []
+    for _ in range(20):
+        begin = time.perf_counter()
+        ProductSentimentAnalyzer(engine=engine)
+        shared.append(time.perf_counter() - begin)
+    return {
+        'import_s': imported - start,
+        'first_construct_s': constructed - imported,
+        'construct_s': statistics.median(timings),
+        'shared_construct_s': statistics.median(shared),
+    }
+
+
+def bench_analyze_review(engine, size, seed):
+    from benchmarks.corpus import generate_reviews
+    from src.analyzer.sentiment_analyzer import ProductSentimentAnalyzer
+
+    analyzer = ProductSentimentAnalyzer(engine=engine)
+    reviews = list(generate_reviews(min(size, LATENCY_SAMPLE), seed))
+    latencies = []
+    clock = time.perf_counter
+    for text in reviews:
+        begin = clock()
+        analyzer.analyze_review(text)
+        latencies.append(clock() - begin)
+    latencies.sort()
+    return {
+        'p50_us': _percentile(latencies, 0.50) * 1e6,
+        'p90_us': _percentile(latencies, 0.90) * 1e6,
+        'p99_us': _percentile(latencies, 0.99) * 1e6,
+        'max_us': latencies[-1] * 1e6,
+        'reviews_per_s': len(latencies) / sum(latencies),
+    }
+
+
+def bench_analyze_comments(engine, size, seed):
+    from benchmarks.corpus import generate_reviews
+    from src.analyzer.sentiment_analyzer import ProductSentimentAnalyzer
+
+    analyzer = ProductSentimentAnalyzer(engine=engine)
+    reviews = list(generate_reviews(size, seed))
+    elapsed = _best_time(lambda: analyzer.analyze_comments(reviews))
+    return {'elapsed_s': elapsed, 'reviews_per_s': size / elapsed}
+
+
+def bench_ingestion(fmt, size, seed):
+    from benchmarks.corpus import write_corpus
+    from src.utils.ingestion import iter_reviews
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = write_corpus(os.path.join(tmp, f'reviews.{fmt}'), size, seed)
+        file_bytes = os.path.getsize(path)
+        count = sum(1 for _ in iter_reviews(path))
+        if count != size:
+            raise RuntimeError(f'read {count} of {size} reviews from {fmt}')
+        elapsed = _best_time(lambda: sum(1 for _ in iter_reviews(path)))
+    return {
+        'elapsed_s': elapsed,
+        'reviews_per_s': size / elapsed,
+        'mb_per_s': file_bytes / (1 << 20) / elapsed,
+    }
+
+
+def bench_instrumentation(engine, size, seed):
+    """What metrics cost when enabled, and an upper estimate of their cost when disabled"""
+    from benchmarks.corpus import generate_reviews
+    from src.analyzer.metrics import NULL_METRICS, Metrics
+    from src.analyzer.sentiment_analyzer import ProductSentimentAnalyzer
+
+    reviews = list(generate_reviews(size, seed))
+    disabled = ProductSentimentAnalyzer(engine=engine)
+    metrics = Metrics()
+    enabled = ProductSentimentAnalyzer(engine=engine, metrics=metrics)
+    disabled_s = _best_time(lambda: disabled.analyze_comments(reviews))
+    enabled_s = _best_time(lambda: enabled.analyze_comments(reviews))
+
+    # Disabled metrics still pay for the calls that would record; time those
+    # calls on the null object and scale by how many one pass makes
+    metrics.reset()
+    enabled.analyze_comments(reviews)
+    calls = max(metrics.operations, 1)
+    start = time.perf_counter()
+    for _ in range(calls):
+        with NULL_METRICS.stage('tokenize'):
+            pass
+        if NULL_METRICS.enabled:
+            NULL_METRICS.count('reviews')
+    null_s = time.perf_counter() - start
+    return {
+        'disabled_reviews_per_s': size / disabled_s,
+        'enabled_reviews_per_s': size / enabled_s,
+        'enabled_overhead_pct': (enabled_s / disabled_s - 1) * 100,
+        'disabled_overhead_pct': null_s / disabled_s * 100,
+    }
+
+
+BENCHMARKS = {
+    'construct': (bench_construct, ENGINES),
+    'analyze_review': (bench_analyze_review, ENGINES),
+    'analyze_comments': (bench_analyze_comments, ENGINES),
+    'ingestion': (bench_ingestion, INGEST_FORMATS),
+    'instrumentation': (bench_instrumentation, ('vectorized',)),
+}
+
+
+def run_case(case, variant, size, seed):
+    """Run one case in this process and return its metrics plus peak RSS"""
+    function = BENCHMARKS[case][0]
+    metrics = function(variant, size, seed)
+    metrics['peak_rss_mb'] = _peak_rss_mb()
+    return metrics
+
+
+def run_isolated(case, variant, size, seed):
+    output = subprocess.run(
+        [sys.executable, '-m', 'benchmarks.suite', '--run-case', case, variant, str(size),
+         '--seed', str(seed)],
+        check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def case_id(case, variant, size):
+    return f'{case}[{variant}]@{size}'
+
+
+def run_suite(cases, sizes, seed, repeat):
+    results = {}
+    for case in cases:
+        variants = BENCHMARKS[case][1]
+        # Construction does not depend on corpus size
+        for size in ([sizes[0]] if case == 'construct' else sizes):
+            for variant in variants:
+                runs = [run_isolated(case, variant, size, seed) for _ in range(repeat)]
+                metrics = {name: statistics.median(run[name] for run in runs) for name in runs[0]}
+                results[case_id(case, variant, size)] = metrics
+                print(f'{case_id(case, variant, size):<40} ' +
+                      '  '.join(f'{name}={value:.4g}' for name, value in metrics.items()),
+                      file=sys.stderr)
+    return results
+
+
+def higher_is_better(metric):
+    return metric.endswith('_per_s')
+
+
+def over_budget(results):
+    """(case, metric, value, budget) for every metric above its BUDGETS limit"""
+    failures = []
+    for case, metrics in results.items():
+        for (name, metric), budget in BUDGETS.items():
+            if case.startswith(name + '[') and metrics.get(metric, 0) > budget:
+                failures.append((case, metric, metrics[metric], budget))
+    return failures
+
+
+def compare(results, baseline, tolerance):
+    """(case, metric, baseline, current, change) for every metric worse than tolerance"""
+    regressions = []
+    for case, metrics in results.items():
+        for metric, value in metrics.items():
+            before = baseline.get(case, {}).get(metric)
+            # Percentages near zero are checked against BUDGETS instead
+            if not before or metric.endswith('_pct'):
+                continue
+            change = value / before - 1
+            worse = -change if higher_is_better(metric) else change
+            if worse > tolerance:
+                regressions.append((case, metric, before, value, change))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default='1000,100000',
+                        help='comma-separated corpus sizes, e.g. 1000,1000000,10000000')
+    parser.add_argument('--cases', default=','.join(CASES))
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=3, help='runs per case; the median is kept')
+    parser.add_argument('--output', help='write results as JSON')
+    parser.add_argument('--compare', metavar='BASELINE', help='flag regressions against a results file')
+    parser.add_argument('--tolerance', type=float, default=0.10,
+                        help='allowed relative slowdown before a metric counts as regressed')
+    parser.add_argument('--run-case', nargs=3, metavar=('CASE', 'VARIANT', 'SIZE'),
+                        help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.run_case:
+        case, variant, size = args.run_case
+        print(json.dumps(run_case(case, variant, int(size), args.seed)))
+        return 0
+
+    cases = [case for case in args.cases.split(',') if case]
+    unknown = set(cases) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f'unknown cases {sorted(unknown)}; choose from {CASES}')
+    sizes = [int(size) for size in args.sizes.split(',')]
+    results = run_suite(cases, sizes, args.seed, args.repeat)
+    report = {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'seed': args.seed,
+            'sizes': sizes,
+            'repeat': args.repeat,
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+    failures = over_budget(results)
+    for case, metric, value, budget in failures:
+        print(f'OVER BUDGET {case} {metric}: {value:.4g} > {budget:.4g}')
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['results']
+        regressions = compare(results, baseline, args.tolerance)
+        for case, metric, before, value, change in regressions:
+            print(f'REGRESSION {case} {metric}: {before:.4g} -> {value:.4g} ({change:+.1%})')
+        if regressions:
+            return 1
+        print(f'No regressions beyond {args.tolerance:.0%} against {args.compare}')
+    elif not args.output:
+        print(json.dumps(report, indent=2, sort_keys=True))
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,21 +1,9 @@
-import nltk
-from nltk.sentiment import SentimentIntensityAnalyzer
 import pandas as pd
-import ssl
-
-# SSL Certificate fix
-try:
-    _create_unverified_https_context = ssl._create_unverified_context
-except AttributeError:
-    pass
-else:
-    ssl._create_default_https_context = _create_unverified_https_context
-
-# Download required NLTK data
-nltk.download('vader_lexicon')
+from src.utils.lexicon_manager import get_resolver
 
 def analyze_sentiment(text):
-    sia = SentimentIntensityAnalyzer()
+    # One NLTK analyzer per process, built from the locally verified lexicon
+    sia = get_resolver().nltk_analyzer()
     sentiment_scores = sia.polarity_scores(text)
     
     compound_score = sentiment_scores['compound']
@@ -0,0 +1,252 @@
+import json
+import re
+from array import array
+from collections import deque
+
+import numpy as np
+
+from src.analyzer.summary import NEGATIVE_CEILING, POSITIVE_FLOOR, SentimentSummary, _fixed_point
+from src.analyzer.vectorized import SCORE_KEYS
+
+# Aspect -> terms; multi-word terms match as whole phrases
+DEFAULT_ASPECTS = {
+    'quality': [
+        'quality', 'well made', 'poorly made', 'build', 'material', 'materials', 'cheap',
+        'cheaply', 'flimsy', 'sturdy', 'solid', 'craftsmanship', 'finish', 'defective',
+        'defect', 'faulty',
+    ],
+    'delivery': [
+        'delivery', 'delivered', 'shipping', 'shipped', 'arrived', 'arrival', 'package',
+        'packaging', 'courier', 'late', 'delayed', 'delay', 'on time', 'tracking',
+    ],
+    'durability': [
+        'durable', 'durability', 'lasted', 'lasts', 'last long', 'broke', 'broken', 'break',
+        'breaks', 'stopped working', 'wore out', 'worn', 'fell apart', 'cracked', 'after a week',
+        'after a month', 'reliable', 'reliability',
+    ],
+    'price': [
+        'price', 'priced', 'pricey', 'cost', 'costs', 'expensive', 'overpriced', 'cheap price',
+        'affordable', 'value', 'value for money', 'worth', 'worth it', 'bargain', 'deal', 'refund',
+    ],
+    'service': [
+        'service', 'customer service', 'support', 'seller', 'staff', 'warranty', 'return',
+        'returned', 'replacement', 'response', 'responded', 'helpful', 'rude', 'contacted',
+    ],
+}
+WORD_PATTERN = re.compile(r'\w+')
+
+
+def load_aspects(path):
+    """Aspect dictionary from a JSON file of {"aspect": ["term", ...]}"""
+    with open(path, encoding='utf-8') as f:
+        aspects = json.load(f)
+    if not isinstance(aspects, dict) or not all(
+            isinstance(terms, list) and all(isinstance(term, str) for term in terms)
+            for terms in aspects.values()):
+        raise ValueError(f'{path} must map aspect names to lists of terms')
+    return aspects
+
+
+class AspectMatcher:
+    """Aho-Corasick automaton over words finding every aspect term of a review in one pass
+
+    Terms are matched on whole words, case-insensitively, so 'cost'
+    does not fire inside 'costume' and 'on time' only as a phrase.
+    """
+
+    def __init__(self, aspects=None):
+        aspects = DEFAULT_ASPECTS if aspects is None else aspects
+        self.aspects = tuple(aspects)
+        # Trie nodes: word -> child node, failure link and aspect ids ending here
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [frozenset()]
+        for number, terms in enumerate(aspects.values()):
+            for term in terms:
+                self._add(WORD_PATTERN.findall(term.lower()), number)
+        self._link()
+
+    def _add(self, words, aspect):
+        if not words:
+            return
+        node = 0
+        for word in words:
+            child = self._goto[node].get(word)
+            if child is None:
+                child = self._goto[node][word] = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(frozenset())
+            node = child
+        self._output[node] = self._output[node] | {aspect}
+
+    def _link(self):
+        """Breadth-first failure links; each node also reports its suffixes' aspects"""
+        pending = deque(self._goto[0].values())
+        while pending:
+            node = pending.popleft()
+            for word, child in self._goto[node].items():
+                fallback = self._fail[node]
+                while fallback and word not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(word, 0)
+                self._fail[child] = target if target != child else 0
+                self._output[child] = self._output[child] | self._output[self._fail[child]]
+                pending.append(child)
+
+    def find(self, text):
+        """Set of aspect ids mentioned in one review"""
+        goto, fail, output = self._goto, self._fail, self._output
+        found = set()
+        node = 0
+        for word in WORD_PATTERN.findall(text.lower()):
+            while node and word not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(word, 0)
+            if output[node]:
+                found |= output[node]
+        return found
+
+    def find_many(self, texts):
+        """Aspect ids of every review"""
+        return [self.find(text) for text in texts]
+
+
+class AspectIndex:
+    """Inverted index from aspect to review ids, with per-aspect sentiment
+
+    Every aspect keeps the ids of the reviews mentioning it alongside their
+    compound scores, plus a mergeable SentimentSummary, so one aspect can
+    be drilled into (by sentiment, too) without rescanning the reviews.
+    """
+
+    def __init__(self, aspects):
+        self.aspects = tuple(aspects)
+        self.reviews = 0
+        self._ids = {aspect: array('q') for aspect in self.aspects}
+        # Compound in units of 1e-4, which fits a 16-bit integer
+        self._compound = {aspect: array('h') for aspect in self.aspects}
+        self.summaries = {aspect: SentimentSummary() for aspect in self.aspects}
+
+    @classmethod
+    def from_results(cls, results, matcher=None):
+        """Index of an analyze_comments BatchResults; review ids are its rows"""
+        matcher = matcher or AspectMatcher()
+        index = cls(matcher.aspects)
+        texts = [results.text(row) for row in range(results.total)]
+        scores = {key: getattr(results, key) for key in SCORE_KEYS}
+        return index.update(matcher.find_many(texts), scores)
+
+    @classmethod
+    def from_mask(cls, aspects, mask, scores):
+        """Index rebuilt from to_mask() bits and the score arrays of the same reviews"""
+        index = cls(aspects)
+        mask = np.asarray(mask, dtype=np.uint64)
+        compound = _fixed_point(scores['compound'], 'compound') if len(mask) else None
+        for bit, aspect in enumerate(index.aspects):
+            rows = np.flatnonzero(mask & np.uint64(1 << bit))
+            if not len(rows):
+                continue
+            index._ids[aspect].extend(rows.tolist())
+            index._compound[aspect].extend(compound[rows].tolist())
+            index.summaries[aspect].update({key: np.asarray(scores[key])[rows] for key in SCORE_KEYS})
+        index.reviews = len(mask)
+        return index
+
+    def to_mask(self):
+        """uint64 per review with bit i set when it mentions the i-th aspect"""
+        if len(self.aspects) > 64:
+            raise ValueError('At most 64 aspects fit a review mask')
+        mask = np.zeros(self.reviews, dtype=np.uint64)
+        for bit, aspect in enumerate(self.aspects):
+            mask[np.array(self._ids[aspect], dtype=np.int64)] |= np.uint64(1 << bit)
+        return mask
+
+    def update(self, matches, scores, start=None):
+        """Add scored reviews given their aspect ids; ids continue from the last update by default"""
+        start = self.reviews if start is None else start
+        positions = [[] for _ in self.aspects]
+        for position, found in enumerate(matches):
+            for aspect in found:
+                positions[aspect].append(position)
+        compound = _fixed_point(scores['compound'], 'compound') if len(matches) else None
+        for aspect, rows in zip(self.aspects, positions):
+            if not rows:
+                continue
+            rows = np.array(rows, dtype=np.int64)
+            self._ids[aspect].extend((rows + start).tolist())
+            self._compound[aspect].extend(compound[rows].tolist())
+            self.summaries[aspect].update({key: np.asarray(scores[key])[rows] for key in SCORE_KEYS})
+        self.reviews = max(self.reviews, start + len(matches))
+        return self
+
+    def merge(self, other, offset=None):
+        """Fold in another index whose review ids follow this one's (or start at offset)"""
+        if other.aspects != self.aspects:
+            raise ValueError('Cannot merge indexes over different aspects')
+        offset = self.reviews if offset is None else offset
+        for aspect in self.aspects:
+            ids = np.array(other._ids[aspect], dtype=np.int64) + offset
+            self._ids[aspect].extend(ids.tolist())
+            self._compound[aspect].extend(other._compound[aspect])
+            self.summaries[aspect].merge(other.summaries[aspect])
+        self.reviews = max(self.reviews, offset + other.reviews)
+        return self
+
+    def mentions(self, aspect):
+        return len(self._ids[aspect])
+
+    def review_ids(self, aspect, sentiment=None):
+        """Ids of the reviews mentioning an aspect, optionally only one sentiment label"""
+        ids = np.array(self._ids[aspect], dtype=np.int64)
+        if sentiment is None:
+            return ids
+        compound = np.array(self._compound[aspect], dtype=np.int16)
+        if sentiment == 'positive':
+            keep = compound >= POSITIVE_FLOOR
+        elif sentiment == 'negative':
+            keep = compound <= NEGATIVE_CEILING
+        elif sentiment == 'neutral':
+            keep = (compound > NEGATIVE_CEILING) & (compound < POSITIVE_FLOOR)
+        else:
+            raise ValueError(f'Unknown sentiment {sentiment!r}')
+        return ids[keep]
+
+    def _ranked(self, label, min_mentions, min_share, limit):
+        ranked = []
+        for aspect, summary in self.summaries.items():
+            if summary.count >= min_mentions:
+                share = summary.counts[label] / summary.count
+                if share >= min_share:
+                    ranked.append((aspect, share, summary.count))
+        ranked.sort(key=lambda item: (-item[1], -item[2], item[0]))
+        return ranked[:limit]
+
+    def issues(self, min_mentions=1, min_share=0.25, limit=3):
+        """(aspect, negative share, mentions) of the most criticised aspects, worst first"""
+        return self._ranked('negative', min_mentions, min_share, limit)
+
+    def strengths(self, min_mentions=1, min_share=0.5, limit=3):
+        """(aspect, positive share, mentions) of the most praised aspects, best first"""
+        return self._ranked('positive', min_mentions, min_share, limit)
+
+    def to_dataframe(self):
+        """One row per aspect: mentions, label counts, mean compound and share of reviews"""
+        import pandas as pd
+
+        rows = []
+        for aspect, summary in self.summaries.items():
+            rows.append({
+                'aspect': aspect,
+                'mentions': summary.count,
+                **summary.counts,
+                'mean_compound': summary.average_scores['compound'],
+                'share_of_reviews': summary.count / self.reviews if self.reviews else 0.0,
+            })
+        return pd.DataFrame(rows)
+
+
+def describe_aspects(ranked, label):
+    """'durability (38% negative of 120 mentions), ...' for issues() or strengths() output"""
+    return ', '.join(f'{aspect} ({share:.0%} {label} of {mentions:,} mentions)'
+                     for aspect, share, mentions in ranked)
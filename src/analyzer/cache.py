@@ -0,0 +1,173 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from src.analyzer.vectorized import SCORE_KEYS
+
+# Bump whenever scoring changes in a way the lexicon digest cannot see
+CACHE_VERSION = '1'
+
+
+def normalize_text(text):
+    """Collapse whitespace runs; VADER scores are identical either way"""
+    return ' '.join(text.split())
+
+
+def analyzer_fingerprint(analyzer):
+    """Digest of the analyzer version, lexicon and emoji table"""
+    # Compiled lexicons carry the digest of the tables they were built from
+    if getattr(analyzer, 'fingerprint', None):
+        return analyzer.fingerprint
+    from importlib import metadata
+
+    try:
+        vader_version = metadata.version('vaderSentiment')
+    except metadata.PackageNotFoundError:
+        vader_version = 'unknown'
+    digest = hashlib.sha256(f'{CACHE_VERSION}:{vader_version}\n'.encode())
+    for word, value in sorted(analyzer.lexicon.items()):
+        digest.update(f'{word}\t{value!r}\n'.encode())
+    for emoji, description in sorted(analyzer.emojis.items()):
+        digest.update(f'{emoji}\t{description}\n'.encode())
+    return digest.hexdigest()
+
+
+class ScoreCache:
+    """Content-addressed cache of review scores
+
+    An in-process LRU tier holds up to max_entries scores. When path is
+    given, a SQLite file keeps scores across restarts. Entries from a
+    different analyzer fingerprint are dropped when the cache is bound.
+    """
+
+    def __init__(self, max_entries=100000, path=None):
+        self.max_entries = max_entries
+        self.path = path
+        self.fingerprint = None
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self.evictions = 0
+        self.deduplicated = 0
+        if path is not None:
+            import sqlite3
+
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute('CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT)')
+            self._db.execute('CREATE TABLE IF NOT EXISTS scores (key BLOB PRIMARY KEY, '
+                             'neg REAL, neu REAL, pos REAL, compound REAL)')
+            self._db.commit()
+
+    def bind(self, fingerprint):
+        """Attach to an analyzer fingerprint, invalidating entries from any other"""
+        with self._lock:
+            if fingerprint == self.fingerprint:
+                return
+            self._memory.clear()
+            self.fingerprint = fingerprint
+            if self._db is not None:
+                row = self._db.execute("SELECT value FROM meta WHERE name = 'fingerprint'").fetchone()
+                if row is None or row[0] != fingerprint:
+                    self._db.execute('DELETE FROM scores')
+                    self._db.execute("INSERT OR REPLACE INTO meta VALUES ('fingerprint', ?)",
+                                     (fingerprint,))
+                    self._db.commit()
+
+    @staticmethod
+    def key(text):
+        return hashlib.blake2b(normalize_text(text).encode(), digest_size=16).digest()
+
+    def get_many(self, keys):
+        """Cached score tuples for the given keys; missing keys are left out"""
+        found = {}
+        with self._lock:
+            missing = []
+            for key in keys:
+                values = self._memory.get(key)
+                if values is None:
+                    missing.append(key)
+                else:
+                    self._memory.move_to_end(key)
+                    found[key] = values
+            if self._db is not None and missing:
+                from_disk = {}
+                # Stay under SQLite's bound-parameter limit
+                for start in range(0, len(missing), 500):
+                    part = missing[start:start + 500]
+                    rows = self._db.execute(
+                        'SELECT key, neg, neu, pos, compound FROM scores WHERE key IN '
+                        f"({', '.join('?' * len(part))})", part)
+                    from_disk.update((row[0], row[1:]) for row in rows)
+                self.disk_hits += len(from_disk)
+                for key, values in from_disk.items():
+                    self._remember(key, values)
+                found.update(from_disk)
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, items):
+        """Store (key, score tuple) pairs in both tiers"""
+        items = list(items)
+        with self._lock:
+            for key, values in items:
+                self._remember(key, values)
+            if self._db is not None and items:
+                self._db.executemany('INSERT OR REPLACE INTO scores VALUES (?, ?, ?, ?, ?)',
+                                     [(key, *values) for key, values in items])
+                self._db.commit()
+
+    def _remember(self, key, values):
+        self._memory[key] = values
+        self._memory.move_to_end(key)
+        if len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self):
+        """Hit/miss counters for sizing the cache"""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'disk_hits': self.disk_hits,
+            'deduplicated': self.deduplicated,
+            'evictions': self.evictions,
+            'memory_entries': len(self._memory),
+            'max_entries': self.max_entries,
+        }
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+
+class CachedBatch:
+    """One batch split into cached scores and the unique texts still to score"""
+
+    def __init__(self, cache, texts):
+        self.cache = cache
+        self.keys = [cache.key(text) for text in texts]
+        first_text = {}
+        for key, text in zip(self.keys, texts):
+            first_text.setdefault(key, text)
+        cache.deduplicated += len(self.keys) - len(first_text)
+        self.found = cache.get_many(list(first_text))
+        self.missing_keys = [key for key in first_text if key not in self.found]
+        self.missing = [first_text[key] for key in self.missing_keys]
+
+    def complete(self, scores):
+        """Store fresh scores for the missing texts and return arrays for the whole batch"""
+        fresh = list(zip(self.missing_keys, zip(*(scores[key].tolist() for key in SCORE_KEYS))))
+        self.cache.put_many(fresh)
+        lookup = dict(self.found)
+        lookup.update(fresh)
+        rows = np.array([lookup[key] for key in self.keys], dtype=np.float64).reshape(-1, 4)
+        return {key: rows[:, i].copy() for i, key in enumerate(SCORE_KEYS)}
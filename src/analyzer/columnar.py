@@ -0,0 +1,234 @@
+import json
+import os
+from collections import namedtuple
+from collections.abc import Sequence
+
+import numpy as np
+
+from src.analyzer.results import BatchResults
+from src.analyzer.vectorized import LABELS, SCORE_KEYS
+
+COLUMNAR_VERSION = 1
+# Rows per Parquet row group (and Arrow record batch); each carries min/max
+# statistics, so label and score filters skip groups that cannot match
+ROW_GROUP_SIZE = 65536
+COLUMNAR_FORMATS = {'.parquet': 'parquet', '.arrow': 'arrow', '.feather': 'arrow', '.ipc': 'arrow'}
+METADATA_KEY = b'nlp_product_review'
+
+StoredResults = namedtuple('StoredResults', ['results', 'aspects'])
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+    except ImportError:
+        raise ImportError('Columnar results require the pyarrow package '
+                          '(pip install pyarrow)') from None
+    return pyarrow
+
+
+def columnar_format(path, fmt=None):
+    """'parquet' or 'arrow' from fmt or the path's suffix; None for other files"""
+    if fmt is not None:
+        return fmt
+    return COLUMNAR_FORMATS.get(os.path.splitext(path)[1].lower())
+
+
+def _schema(pa, include_text, aspects, source):
+    fields = [pa.field('row', pa.int64())]
+    if include_text:
+        fields.append(pa.field('text', pa.string()))
+    fields += [pa.field(key, pa.float32()) for key in SCORE_KEYS]
+    fields.append(pa.field('label', pa.int8()))
+    if aspects:
+        fields.append(pa.field('aspects', pa.uint64()))
+    metadata = {'version': COLUMNAR_VERSION, 'labels': list(LABELS),
+                'aspects': list(aspects or ()), 'source': source}
+    return pa.schema(fields, metadata={METADATA_KEY: json.dumps(metadata)})
+
+
+class ColumnarWriter:
+    """Writes scored reviews chunk by chunk to a Parquet or Arrow IPC file
+
+    Columns are the review's row in its source, optionally its text, the
+    float32 neg/neu/pos/compound scores, the int8 label (an index into
+    LABELS) and, when aspect names are given, a uint64 mask of the aspects
+    each review mentions. Chunks are buffered into row groups of
+    row_group_size rows.
+    """
+
+    def __init__(self, path, fmt=None, include_text=True, aspects=None, source=None,
+                 row_group_size=ROW_GROUP_SIZE):
+        self.pa = _pyarrow()
+        self.path = path
+        self.fmt = columnar_format(path, fmt)
+        if self.fmt not in ('parquet', 'arrow'):
+            raise ValueError(f"Cannot tell the columnar format of '{path}'; use .parquet or .arrow")
+        self.include_text = include_text
+        self.aspects = tuple(aspects or ())
+        self.row_group_size = row_group_size
+        self.schema = _schema(self.pa, include_text, self.aspects, source)
+        self.rows = 0
+        self._pending = []
+        self._pending_rows = 0
+        if self.fmt == 'parquet':
+            import pyarrow.parquet as pq
+            self._writer = pq.ParquetWriter(path, self.schema, write_statistics=True)
+        else:
+            self._sink = self.pa.OSFile(path, 'wb')
+            self._writer = self.pa.ipc.new_file(self._sink, self.schema)
+
+    def write(self, texts, scores, labels, rows=None, aspect_mask=None):
+        """Add one chunk; rows default to continuing from the previous chunk"""
+        count = len(labels)
+        if rows is None:
+            rows = np.arange(self.rows, self.rows + count, dtype=np.int64)
+        columns = [np.asarray(rows, dtype=np.int64)]
+        if self.include_text:
+            columns.append(self.pa.array(list(texts), type=self.pa.string()))
+        columns += [np.asarray(scores[key], dtype=np.float32) for key in SCORE_KEYS]
+        columns.append(np.asarray(labels, dtype=np.int8))
+        if self.aspects:
+            columns.append(np.asarray(aspect_mask, dtype=np.uint64))
+        self._pending.append(self.pa.record_batch(columns, schema=self.schema))
+        self._pending_rows += count
+        self.rows += count
+        if self._pending_rows >= self.row_group_size:
+            self._flush()
+
+    def _flush(self):
+        if not self._pending_rows:
+            return
+        table = self.pa.Table.from_batches(self._pending, self.schema).combine_chunks()
+        if self.fmt == 'parquet':
+            self._writer.write_table(table, row_group_size=len(table))
+        else:
+            self._writer.write_table(table)
+        self._pending, self._pending_rows = [], 0
+
+    def close(self):
+        self._flush()
+        self._writer.close()
+        if self.fmt == 'arrow':
+            self._sink.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def write_results(results, path, aspects=None, include_text=True, fmt=None, source=None,
+                  row_group_size=ROW_GROUP_SIZE):
+    """Persist a BatchResults (and its AspectIndex) for read_results()"""
+    names = aspects.aspects if aspects is not None else None
+    mask = aspects.to_mask() if aspects is not None else None
+    with ColumnarWriter(path, fmt, include_text, names, source, row_group_size) as writer:
+        for start in range(0, results.total, row_group_size):
+            stop = min(start + row_group_size, results.total)
+            texts = [results.text(row) for row in range(start, stop)] if include_text else None
+            writer.write(texts, {key: getattr(results, key)[start:stop] for key in SCORE_KEYS},
+                         results.labels[start:stop], results.index[start:stop],
+                         mask[start:stop] if mask is not None else None)
+    return path
+
+
+class StoredTexts(Sequence):
+    """Review text of loaded results, looked up by source row on access"""
+
+    def __init__(self, column, rows):
+        self._column = column
+        self._order = None
+        if len(rows) > 1 and np.any(rows[1:] < rows[:-1]):
+            self._order = np.argsort(rows, kind='stable')
+            rows = rows[self._order]
+        self._rows = rows
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __getitem__(self, row):
+        position = int(np.searchsorted(self._rows, row))
+        if position == len(self._rows) or self._rows[position] != row:
+            raise IndexError(f'Row {row} is not in the loaded results')
+        if self._column is None:
+            raise LookupError('These results were written without review text; '
+                              'pass the source reviews as texts')
+        if self._order is not None:
+            position = int(self._order[position])
+        return self._column[position].as_py()
+
+
+def _read_table(pa, path, fmt, filters):
+    if fmt == 'parquet':
+        import pyarrow.parquet as pq
+        # Row groups whose statistics rule out every filter are never read
+        return pq.read_table(path, memory_map=True, filters=filters or None)
+    # The IPC file is mapped, not read: columns are views of the page cache
+    return pa.ipc.open_file(pa.memory_map(path, 'r')).read_all()
+
+
+def read_results(path, labels=None, min_compound=None, max_compound=None, texts=None, fmt=None):
+    """Load results written by write_results() or ColumnarWriter without re-scoring
+
+    labels keeps only reviews carrying one of those labels; min_compound
+    and max_compound bound the compound score (inclusive). Returns a
+    StoredResults of the BatchResults and, if one was persisted, the
+    AspectIndex of the kept reviews. Files written without text look up
+    reviews in texts, the source sequence, by row.
+    """
+    pa = _pyarrow()
+    fmt = columnar_format(path, fmt)
+    if fmt not in ('parquet', 'arrow'):
+        raise ValueError(f"Cannot tell the columnar format of '{path}'; use .parquet or .arrow")
+    # Bounds compare as the float32 the scores are stored in
+    low = None if min_compound is None else float(np.float32(min_compound))
+    high = None if max_compound is None else float(np.float32(max_compound))
+    codes = None
+    if labels is not None:
+        unknown = set(labels) - set(LABELS)
+        if unknown:
+            raise ValueError(f'Unknown labels {sorted(unknown)}')
+        codes = [LABELS.index(label) for label in labels]
+    filters = []
+    if codes is not None:
+        filters.append(('label', 'in', codes))
+    if low is not None:
+        filters.append(('compound', '>=', low))
+    if high is not None:
+        filters.append(('compound', '<=', high))
+
+    table = _read_table(pa, path, fmt, filters)
+    metadata = json.loads((table.schema.metadata or {}).get(METADATA_KEY, b'{}'))
+    if metadata.get('version') != COLUMNAR_VERSION or tuple(metadata.get('labels', ())) != LABELS:
+        raise ValueError(f"'{path}' does not hold results of this analyzer")
+    scores = {key: table.column(key).to_numpy() for key in SCORE_KEYS}
+    label_codes = table.column('label').to_numpy()
+    rows = table.column('row').to_numpy()
+    keep = np.ones(len(rows), dtype=bool)
+    if codes is not None:
+        keep &= np.isin(label_codes, codes)
+    if low is not None:
+        keep &= scores['compound'] >= low
+    if high is not None:
+        keep &= scores['compound'] <= high
+    mask = table.column('aspects').to_numpy() if metadata['aspects'] else None
+    text_column = table.column('text') if 'text' in table.column_names else None
+    if not keep.all():
+        positions = np.flatnonzero(keep)
+        scores = {key: values[positions] for key, values in scores.items()}
+        label_codes, rows = label_codes[positions], rows[positions]
+        mask = mask[positions] if mask is not None else None
+        text_column = text_column.take(positions) if text_column is not None else None
+
+    from src.analyzer.summary import SentimentSummary
+    average_scores = SentimentSummary.from_scores(scores).average_scores
+    if texts is None or text_column is not None:
+        texts = StoredTexts(text_column, rows)
+    results = BatchResults(texts, scores, label_codes, average_scores, index=rows)
+    aspects = None
+    if mask is not None:
+        from src.analyzer.aspects import AspectIndex
+        aspects = AspectIndex.from_mask(metadata['aspects'], mask, scores)
+    return StoredResults(results, aspects)
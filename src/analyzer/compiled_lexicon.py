@@ -0,0 +1,209 @@
+"""Compiled, memory-mapped VADER tables.
+
+Build with `python -m src.analyzer.compiled_lexicon build [path]`.
+"""
+import mmap
+import os
+import struct
+import sys
+import zlib
+from collections.abc import Mapping
+
+from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+
+MAGIC = b'VADERLX1'
+# Version 2 dropped the booster and negation tables, which scoring never read
+FORMAT_VERSION = 2
+DEFAULT_PATH = 'data/vader_lexicon.bin'
+# Only the large tables are compiled; VADER's rules keep reading its small
+# booster and negation constants
+TABLES = ('lexicon', 'emojis')
+
+# entries, slots, value kind, key blob bytes, value blob bytes
+TABLE_HEADER = struct.Struct('<IIIQQ')
+FLOAT_VALUES, TEXT_VALUES = 0, 1
+_MISSING = object()
+
+
+def _pad(size):
+    return -size % 8
+
+
+def _pack_strings(strings):
+    """uint32 offsets followed by the UTF-8 blob they index"""
+    encoded = [string.encode('utf-8') for string in strings]
+    offsets = [0]
+    for item in encoded:
+        offsets.append(offsets[-1] + len(item))
+    blob = b''.join(encoded)
+    return struct.pack(f'<{len(offsets)}I', *offsets), blob
+
+
+def _pack_table(table, kind):
+    keys = sorted(table)
+    slots = 1
+    while slots < len(keys) * 2:
+        slots *= 2
+    index = [-1] * slots
+    for entry, key in enumerate(keys):
+        slot = zlib.crc32(key.encode('utf-8')) & (slots - 1)
+        while index[slot] != -1:
+            slot = (slot + 1) & (slots - 1)
+        index[slot] = entry
+
+    key_offsets, key_blob = _pack_strings(keys)
+    if kind == FLOAT_VALUES:
+        value_blob = struct.pack(f'<{len(keys)}d', *(float(table[key]) for key in keys))
+    else:
+        value_offsets, text_blob = _pack_strings([table[key] for key in keys])
+        value_blob = value_offsets + text_blob
+
+    parts = [TABLE_HEADER.pack(len(keys), slots, kind, len(key_blob), len(value_blob))]
+    for part in (struct.pack(f'<{slots}i', *index), key_offsets, key_blob, value_blob):
+        parts.append(part + b'\0' * _pad(len(part)))
+    return b''.join(parts)
+
+
+def compile_lexicon(path=DEFAULT_PATH, analyzer=None):
+    """Write the analyzer's tables to a compiled lexicon file"""
+    # Imported here so opening a compiled lexicon never pulls in NumPy
+    from src.analyzer.cache import analyzer_fingerprint
+
+    if analyzer is None:
+        from src.utils.lexicon_manager import get_resolver
+        analyzer = get_resolver().vader_analyzer()
+    fingerprint = analyzer_fingerprint(analyzer).encode()
+    body = [
+        _pack_table(analyzer.lexicon, FLOAT_VALUES),
+        _pack_table(analyzer.emojis, TEXT_VALUES),
+    ]
+    header = MAGIC + struct.pack('<II', FORMAT_VERSION, len(fingerprint)) + fingerprint
+    header += b'\0' * _pad(len(header))
+    # Readers may have the old file mapped: build a new one and swap it in
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(header)
+            for table in body:
+                f.write(table)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return path
+
+
+class MappedTable(Mapping):
+    """Read-only str-keyed mapping answered from an open-addressing hash in the file"""
+
+    def __init__(self, buffer, offset):
+        header = TABLE_HEADER.unpack_from(buffer, offset)
+        self.entries, self.slots, self.kind, key_bytes, value_bytes = header
+        offset += TABLE_HEADER.size
+
+        def take(size, fmt=None):
+            nonlocal offset
+            view = buffer[offset:offset + size]
+            offset += size + _pad(size)
+            return view.cast(fmt) if fmt else view
+
+        self._index = take(self.slots * 4, 'i')
+        self._key_offsets = take((self.entries + 1) * 4, 'I')
+        self._keys = take(key_bytes)
+        if self.kind == FLOAT_VALUES:
+            self._values = take(value_bytes, 'd')
+        else:
+            self._value_offsets = buffer[offset:offset + (self.entries + 1) * 4].cast('I')
+            self._value_text = buffer[offset + (self.entries + 1) * 4:offset + value_bytes]
+            take(value_bytes)
+        self.end = offset
+        # Per-process memo so repeated lookups cost a dict access
+        self._memo = {}
+
+    def _find(self, key):
+        encoded = key.encode('utf-8')
+        mask = self.slots - 1
+        slot = zlib.crc32(encoded) & mask
+        while True:
+            entry = self._index[slot]
+            if entry < 0:
+                return -1
+            if self._keys[self._key_offsets[entry]:self._key_offsets[entry + 1]] == encoded:
+                return entry
+            slot = (slot + 1) & mask
+
+    def _value(self, entry):
+        if self.kind == FLOAT_VALUES:
+            return self._values[entry]
+        start, end = self._value_offsets[entry], self._value_offsets[entry + 1]
+        return str(self._value_text[start:end], 'utf-8')
+
+    def _key(self, entry):
+        return str(self._keys[self._key_offsets[entry]:self._key_offsets[entry + 1]], 'utf-8')
+
+    def _lookup(self, key):
+        value = self._memo.get(key, _MISSING)
+        if value is _MISSING:
+            entry = self._find(key) if isinstance(key, str) else -1
+            value = _MISSING if entry < 0 else self._value(entry)
+            if len(self._memo) < 1000000:
+                self._memo[key] = value
+        return value
+
+    def __getitem__(self, key):
+        value = self._lookup(key)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key):
+        return self._lookup(key) is not _MISSING
+
+    def __iter__(self):
+        return (self._key(entry) for entry in range(self.entries))
+
+    def __len__(self):
+        return self.entries
+
+
+class CompiledLexicon:
+    """Memory-mapped view of a file written by compile_lexicon"""
+
+    def __init__(self, path=DEFAULT_PATH):
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        buffer = memoryview(self._mmap)
+        magic = bytes(buffer[:8])
+        version, fingerprint_size = struct.unpack_from('<II', buffer, 8)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f'{path} is not a compiled lexicon (format {FORMAT_VERSION})')
+        self.fingerprint = str(buffer[16:16 + fingerprint_size], 'utf-8')
+        offset = 16 + fingerprint_size + _pad(16 + fingerprint_size)
+        for name in TABLES:
+            table = MappedTable(buffer, offset)
+            setattr(self, name, table)
+            offset = table.end
+
+
+class CompiledSentimentAnalyzer(SentimentIntensityAnalyzer):
+    """SentimentIntensityAnalyzer reading its tables from a compiled lexicon file"""
+
+    def __init__(self, path=DEFAULT_PATH):
+        # The parent constructor reads and parses the text lexicons; skip it
+        self.compiled = CompiledLexicon(path)
+        self.lexicon = self.compiled.lexicon
+        self.emojis = self.compiled.emojis
+        self.fingerprint = self.compiled.fingerprint
+
+
+def main(argv):
+    if not argv or argv[0] != 'build':
+        print('usage: python -m src.analyzer.compiled_lexicon build [path]')
+        return 2
+    path = compile_lexicon(argv[1] if len(argv) > 1 else DEFAULT_PATH)
+    print(f'Compiled lexicon written to {path}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
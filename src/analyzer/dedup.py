@@ -0,0 +1,220 @@
+import re
+import zlib
+from collections import OrderedDict
+from itertools import islice
+
+import numpy as np
+
+from src.analyzer.summary import SentimentSummary
+from src.analyzer.vectorized import SCORE_KEYS
+
+WORD_PATTERN = re.compile(r'\w+')
+# Reviews whose signatures are computed in one NumPy pass
+SIGNATURE_BATCH = 256
+
+
+class NearDuplicateIndex:
+    """Streaming MinHash/LSH index that clusters near-duplicate reviews
+
+    Each review is reduced to a MinHash signature over word shingles and
+    looked up in `bands` LSH hash tables. A candidate whose signature
+    agrees on at least `threshold` of its positions (an estimate of the
+    Jaccard similarity) makes the review a duplicate of that cluster;
+    otherwise the review founds a new cluster and becomes its
+    representative. At most max_representatives clusters are indexed;
+    the least recently matched are forgotten first, except clusters that a
+    batch still being scored refers to. Results depend only on the input
+    order and seed.
+    """
+
+    def __init__(self, num_perm=64, bands=16, threshold=0.8, shingle_size=3, seed=0,
+                 max_representatives=200000):
+        if num_perm % bands:
+            raise ValueError(f'num_perm ({num_perm}) must be a multiple of bands ({bands})')
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self.shingle_size = shingle_size
+        self.seed = seed
+        self.max_representatives = max_representatives
+        rng = np.random.default_rng(seed)
+        # Multiply-shift hashing: the top 32 bits of a * x + b (mod 2**64), a odd
+        self._a = rng.integers(0, 1 << 63, size=(num_perm, 1), dtype=np.uint64) * 2 + 1
+        self._b = rng.integers(0, 1 << 63, size=(num_perm, 1), dtype=np.uint64)
+        self._shingle_weights = rng.integers(0, 1 << 63, size=shingle_size, dtype=np.uint64) * 2 + 1
+        self._band_weights = rng.integers(1, 1 << 63, size=self.rows, dtype=np.uint64) | np.uint64(1)
+        self._buckets = [{} for _ in range(bands)]
+        # cluster id -> (signature, band keys), least recently matched first
+        self._representatives = OrderedDict()
+        # cluster id -> score tuple of its representative
+        self._scores = {}
+        # cluster id -> number of uncompleted batches referring to it; never evicted
+        self._pins = {}
+        self._next_cluster = 0
+        self.reviews = 0
+        self.duplicates = 0
+        self.evictions = 0
+        self.summary = SentimentSummary()
+
+    def _shingle_hashes(self, texts):
+        """uint64 hashes of every word shingle, and the shingle count of each review
+
+        Words are hashed once; a shingle hash is a seeded weighted sum of
+        its word hashes. Reviews shorter than shingle_size are padded so
+        each has at least one shingle.
+        """
+        size = self.shingle_size
+        words = []
+        counts = np.empty(len(texts), dtype=np.int64)
+        for i, text in enumerate(texts):
+            tokens = WORD_PATTERN.findall(text.lower())
+            if len(tokens) < size:
+                tokens += [''] * (size - len(tokens))
+            words.extend(tokens)
+            counts[i] = len(tokens)
+        hashes = np.fromiter(map(zlib.crc32, map(str.encode, words)), dtype=np.uint64, count=len(words))
+        starts = len(words) - size + 1
+        # uint64 arithmetic wraps, which is all a hash needs
+        combined = hashes[:starts] * self._shingle_weights[0]
+        for offset in range(1, size):
+            combined += hashes[offset:offset + starts] * self._shingle_weights[offset]
+        # Drop shingles that would run past the end of their review
+        valid = np.ones(starts, dtype=bool)
+        ends = np.cumsum(counts)
+        for offset in range(1, size):
+            valid[ends[:-1] - offset] = False
+        return combined[valid], counts - size + 1
+
+    def signatures(self, texts):
+        """(len(texts), num_perm) uint32 MinHash signatures"""
+        result = np.empty((len(texts), self.num_perm), dtype=np.uint32)
+        for start in range(0, len(texts), SIGNATURE_BATCH):
+            part = texts[start:start + SIGNATURE_BATCH]
+            hashes, sizes = self._shingle_hashes(part)
+            permuted = ((self._a * hashes + self._b) >> np.uint64(32)).astype(np.uint32)
+            offsets = np.cumsum(sizes) - sizes
+            result[start:start + len(part)] = np.minimum.reduceat(permuted, offsets, axis=1).T
+        return result
+
+    def _band_keys(self, signatures):
+        """(len, bands) uint64 hash of each band's rows"""
+        banded = signatures.astype(np.uint64).reshape(len(signatures), self.bands, self.rows)
+        # uint64 arithmetic wraps, which is all a hash needs
+        return (banded * self._band_weights).sum(axis=2, dtype=np.uint64)
+
+    def assign(self, texts):
+        """Cluster id of every review, and the positions of reviews that founded a cluster"""
+        signatures = self.signatures(texts)
+        keys = self._band_keys(signatures).tolist()
+        required = int(np.ceil(self.threshold * self.num_perm))
+        representatives = self._representatives
+        clusters = []
+        founders = []
+        for position, (signature, band_keys) in enumerate(zip(signatures, keys)):
+            match = None
+            for bucket, key in zip(self._buckets, band_keys):
+                candidate = bucket.get(key)
+                if candidate is None or candidate == match:
+                    continue
+                if np.count_nonzero(representatives[candidate][0] == signature) >= required:
+                    match = candidate
+                    break
+            if match is None:
+                match = self._next_cluster
+                self._next_cluster += 1
+                representatives[match] = (signature, band_keys)
+                for bucket, key in zip(self._buckets, band_keys):
+                    bucket.setdefault(key, match)
+                founders.append(position)
+            else:
+                representatives.move_to_end(match)
+            clusters.append(match)
+        self.reviews += len(texts)
+        self.duplicates += len(texts) - len(founders)
+        return clusters, founders
+
+    def store(self, clusters, scores):
+        """Record the scores of newly founded clusters"""
+        self.summary.update(scores)
+        rows = zip(*(scores[key].tolist() for key in SCORE_KEYS))
+        for cluster, values in zip(clusters, rows):
+            self._scores[cluster] = values
+
+    def pin(self, clusters):
+        """Keep clusters indexed until unpin(), while their batch waits for scores"""
+        pins = self._pins
+        for cluster in set(clusters):
+            pins[cluster] = pins.get(cluster, 0) + 1
+
+    def unpin(self, clusters):
+        pins = self._pins
+        for cluster in set(clusters):
+            if pins[cluster] == 1:
+                del pins[cluster]
+            else:
+                pins[cluster] -= 1
+
+    def trim(self):
+        """Forget the least recently matched unpinned clusters beyond max_representatives"""
+        excess = len(self._representatives) - self.max_representatives
+        if excess <= 0:
+            return
+        # Pinned clusters were just assigned, so they sit at the recent end
+        evicted = list(islice((cluster for cluster in self._representatives
+                               if cluster not in self._pins), excess))
+        for cluster in evicted:
+            _, band_keys = self._representatives.pop(cluster)
+            for bucket, key in zip(self._buckets, band_keys):
+                if bucket.get(key) == cluster:
+                    del bucket[key]
+            self._scores.pop(cluster, None)
+            self.evictions += 1
+
+    def scores_for(self, clusters):
+        """Score arrays for a list of cluster ids"""
+        rows = np.array([self._scores[cluster] for cluster in clusters],
+                        dtype=np.float64).reshape(-1, len(SCORE_KEYS))
+        return {key: rows[:, i].copy() for i, key in enumerate(SCORE_KEYS)}
+
+    def report(self):
+        """Review counts with and without near-duplicates, over everything indexed so far"""
+        return {
+            'reviews': self.reviews,
+            'unique': self.reviews - self.duplicates,
+            'duplicates': self.duplicates,
+            'duplicate_rate': self.duplicates / self.reviews if self.reviews else 0.0,
+            'unique_counts': dict(self.summary.counts),
+            'unique_average_scores': self.summary.average_scores,
+            'indexed_clusters': len(self._representatives),
+            'evictions': self.evictions,
+        }
+
+
+class DedupBatch:
+    """One batch reduced to the representatives of its new clusters
+
+    Same interface as CachedBatch: score `missing`, then pass the scores
+    to complete() for arrays covering the whole batch. When a cache batch
+    is given, only representatives the cache cannot answer are missing.
+    """
+
+    def __init__(self, index, texts, cached_batch=None):
+        self.index = index
+        self.clusters, founders = index.assign(texts)
+        # Later batches may be assigned before this one completes; none of
+        # them may evict the clusters this batch is waiting to read
+        index.pin(self.clusters)
+        self.founded = [self.clusters[position] for position in founders]
+        founder_texts = [texts[position] for position in founders]
+        self.inner = cached_batch(founder_texts) if cached_batch else None
+        self.missing = self.inner.missing if self.inner is not None else founder_texts
+
+    def complete(self, scores):
+        if self.inner is not None:
+            scores = self.inner.complete(scores)
+        self.index.store(self.founded, scores)
+        scores = self.index.scores_for(self.clusters)
+        self.index.unpin(self.clusters)
+        self.index.trim()
+        return scores
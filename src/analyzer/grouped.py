@@ -0,0 +1,314 @@
+import heapq
+import queue
+import zlib
+from collections import deque
+
+import numpy as np
+
+from src.analyzer.quantiles import CompoundSketch
+from src.analyzer.streaming import iter_chunks
+from src.analyzer.summary import (
+    COMPOUND_SCALE,
+    HISTOGRAM_BINS,
+    NEGATIVE_CEILING,
+    POSITIVE_FLOOR,
+    SUMMARY_VERSION,
+    SentimentSummary,
+    _fixed_point,
+)
+from src.analyzer.vectorized import LABELS, SCORE_KEYS
+
+# Seconds between liveness checks while waiting on a partition worker
+POLL_INTERVAL = 1.0
+
+
+def partition_of(product, partitions):
+    """Partition of a product id; stable across processes and runs, unlike hash()"""
+    return zlib.crc32(str(product).encode('utf-8')) % partitions
+
+
+class GroupedAggregates:
+    """Per-product sentiment aggregates in columnar arrays
+
+    Each product gets one row of label counts, fixed-point score sums,
+    compound squares and histogram bins, plus a compound value -> count
+    sketch: the same quantities as a SentimentSummary. Only the top_k most positive and most negative
+    reviews of each product are kept, in bounded heaps.
+    """
+
+    def __init__(self, top_k=3, bins=HISTOGRAM_BINS):
+        self.top_k = top_k
+        self.bins = bins
+        self.index = {}
+        self.products = []
+        self.label_counts = np.zeros((0, len(LABELS)), dtype=np.int64)
+        self.sums = np.zeros((0, len(SCORE_KEYS)), dtype=np.int64)
+        self.squares = np.zeros(0, dtype=np.int64)
+        self.histogram = np.zeros((0, bins), dtype=np.int64)
+        # Per product row: compound (units of 1e-4) -> count
+        self._sketches = []
+        # Per product row: min-heaps of (compound, text) and (-compound, text)
+        self._positive = {}
+        self._negative = {}
+
+    def __len__(self):
+        return len(self.products)
+
+    def __iter__(self):
+        return iter(self.products)
+
+    def __contains__(self, product):
+        return product in self.index
+
+    def _rows(self, products):
+        """Row of each product, adding (and growing the arrays for) new ones"""
+        index = self.index
+        rows = np.empty(len(products), dtype=np.int64)
+        for i, product in enumerate(products):
+            row = index.get(product)
+            if row is None:
+                row = index[product] = len(self.products)
+                self.products.append(product)
+                self._sketches.append({})
+            rows[i] = row
+        if len(self.products) > len(self.squares):
+            self._grow(len(self.products))
+        return rows
+
+    def _grow(self, needed):
+        capacity = max(needed, 2 * len(self.squares), 1024)
+        for name in ('label_counts', 'sums', 'squares', 'histogram'):
+            old = getattr(self, name)
+            new = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def update(self, products, texts, scores):
+        """Add scored reviews; products, texts and the score arrays line up"""
+        if not len(texts):
+            return self
+        rows = self._rows(products)
+        fixed = {key: _fixed_point(scores[key], key) for key in SCORE_KEYS}
+        compound = fixed['compound']
+        labels = np.where(compound >= POSITIVE_FLOOR, 0, np.where(compound <= NEGATIVE_CEILING, 2, 1))
+        np.add.at(self.label_counts, (rows, labels), 1)
+        for column, key in enumerate(SCORE_KEYS):
+            np.add.at(self.sums, (rows, column), fixed[key])
+        np.add.at(self.squares, rows, compound * compound)
+        bins = np.minimum((compound + COMPOUND_SCALE) * self.bins // (2 * COMPOUND_SCALE),
+                          self.bins - 1)
+        np.add.at(self.histogram, (rows, bins), 1)
+        sketches = self._sketches
+        for row, value in zip(rows.tolist(), compound.tolist()):
+            sketch = sketches[row]
+            sketch[value] = sketch.get(value, 0) + 1
+        if self.top_k:
+            values = np.asarray(scores['compound'], dtype=np.float64)
+            for i in np.flatnonzero(labels == 0).tolist():
+                self._offer(self._positive, int(rows[i]), (float(values[i]), texts[i]))
+            for i in np.flatnonzero(labels == 2).tolist():
+                self._offer(self._negative, int(rows[i]), (-float(values[i]), texts[i]))
+        return self
+
+    def _offer(self, heaps, row, item):
+        heap = heaps.get(row)
+        if heap is None:
+            heaps[row] = [item]
+        elif len(heap) < self.top_k:
+            heapq.heappush(heap, item)
+        elif item > heap[0]:
+            heapq.heapreplace(heap, item)
+
+    def merge(self, other):
+        """Fold another GroupedAggregates into this one and return self"""
+        if (other.bins, other.top_k) != (self.bins, self.top_k):
+            raise ValueError('Cannot merge aggregates with different bins or top_k')
+        count = len(other.products)
+        rows = self._rows(other.products)
+        np.add.at(self.label_counts, rows, other.label_counts[:count])
+        np.add.at(self.sums, rows, other.sums[:count])
+        np.add.at(self.squares, rows, other.squares[:count])
+        np.add.at(self.histogram, rows, other.histogram[:count])
+        for row, counts in zip(rows.tolist(), other._sketches):
+            sketch = self._sketches[row]
+            for value, occurrences in counts.items():
+                sketch[value] = sketch.get(value, 0) + occurrences
+        for mine, theirs in ((self._positive, other._positive), (self._negative, other._negative)):
+            for row, heap in theirs.items():
+                target = int(rows[row])
+                combined = heapq.nlargest(self.top_k, mine.get(target, []) + heap)
+                heapq.heapify(combined)
+                mine[target] = combined
+        return self
+
+    def summary(self, product):
+        """SentimentSummary of one product"""
+        row = self.index[product]
+        return SentimentSummary.from_dict({
+            'version': SUMMARY_VERSION,
+            'bins': self.bins,
+            'count': int(self.label_counts[row].sum()),
+            'counts': dict(zip(LABELS, self.label_counts[row].tolist())),
+            'sums': dict(zip(SCORE_KEYS, self.sums[row].tolist())),
+            'compound_squares': int(self.squares[row]),
+            'histogram': self.histogram[row].tolist(),
+            'sketch': CompoundSketch(self._sketches[row]).to_dict(),
+        })
+
+    def top_positive(self, product):
+        """Up to top_k (compound, review) pairs, most positive first"""
+        return sorted(self._positive.get(self.index[product], []), reverse=True)
+
+    def top_negative(self, product):
+        """Up to top_k (compound, review) pairs, most negative first"""
+        heap = self._negative.get(self.index[product], [])
+        return [(-value, text) for value, text in sorted(heap, reverse=True)]
+
+    def to_dataframe(self):
+        """One row per product: review and label counts and mean compound"""
+        import pandas as pd
+
+        count = len(self.products)
+        totals = self.label_counts[:count].sum(axis=1)
+        frame = pd.DataFrame(self.label_counts[:count], columns=list(LABELS))
+        frame.insert(0, 'product_id', self.products)
+        frame.insert(1, 'reviews', totals)
+        frame['mean_compound'] = self.sums[:count, SCORE_KEYS.index('compound')] / (
+            np.maximum(totals, 1) * COMPOUND_SCALE)
+        return frame
+
+    def __getstate__(self):
+        # Send only the used rows between processes
+        state = dict(self.__dict__)
+        count = len(self.products)
+        for name in ('label_counts', 'sums', 'squares', 'histogram'):
+            state[name] = state[name][:count].copy()
+        return state
+
+
+def _partition_worker(number, options, top_k, inbox, outbox):
+    """Aggregate every chunk of one partition, then send back the result"""
+    try:
+        from src.analyzer.sentiment_analyzer import ProductSentimentAnalyzer
+        analyzer = ProductSentimentAnalyzer(**options)
+        aggregates = GroupedAggregates(top_k)
+        while True:
+            rows = inbox.get()
+            if rows is None:
+                break
+            products, texts = zip(*rows)
+            aggregates.update(products, texts, analyzer.score_batch(list(texts)))
+        outbox.put((number, 'ok', aggregates))
+    except Exception as e:
+        outbox.put((number, 'error', e))
+
+
+def _raise_reported_error(outbox):
+    """Re-raise the exception a partition worker sent before exiting, if any"""
+    while True:
+        try:
+            _, status, part = outbox.get(timeout=POLL_INTERVAL)
+        except queue.Empty:
+            return
+        if status == 'error':
+            raise part
+
+
+def _put(inbox, item, process, outbox):
+    """Blocking put that fails instead of hanging if the worker has died"""
+    while True:
+        try:
+            inbox.put(item, timeout=POLL_INTERVAL)
+            return
+        except queue.Full:
+            if not process.is_alive():
+                _raise_reported_error(outbox)
+                raise RuntimeError(f'Partition worker {process.name} exited unexpectedly')
+
+
+def _get(outbox, processes):
+    while True:
+        try:
+            return outbox.get(timeout=POLL_INTERVAL)
+        except queue.Empty:
+            if not any(process.is_alive() for process in processes):
+                _raise_reported_error(outbox)
+                raise RuntimeError('Partition workers exited without sending results')
+
+
+def _aggregate_scored(analyzer, records, top_k):
+    """Aggregate (product id, review) pairs scored by the analyzer's chunked pipeline"""
+    products = deque()
+
+    def texts():
+        for product, text in records:
+            products.append(product)
+            yield text
+
+    aggregates = GroupedAggregates(top_k)
+    for chunk, scores, _ in analyzer._scored_chunks(texts()):
+        aggregates.update([products.popleft() for _ in chunk], chunk, scores)
+    return aggregates
+
+
+def aggregate_by_product(analyzer, records, top_k=3, partitions=1, chunk_size=2000):
+    """GroupedAggregates over (product id, review) pairs in a single pass
+
+    With partitions > 1 rows are hash-partitioned by product id onto that
+    many worker processes, so every product is aggregated by exactly one
+    worker; the per-partition results are then combined. Workers cannot see
+    the analyzer's cache or dedup index, so with either set the reviews are
+    scored through the analyzer instead (on its own pool for large inputs)
+    and aggregated here.
+    """
+    if partitions > 1 and (analyzer.cache is not None or analyzer.dedup is not None):
+        return _aggregate_scored(analyzer, records, top_k)
+    if partitions <= 1:
+        aggregates = GroupedAggregates(top_k)
+        for chunk in iter_chunks(records, analyzer.batch_size):
+            products, texts = zip(*chunk)
+            texts = list(texts)
+            aggregates.update(products, texts, analyzer.score_batch(texts))
+        return aggregates
+
+    import multiprocessing
+
+    context = multiprocessing.get_context()
+    options = {'engine': analyzer.engine, 'compiled_lexicon': analyzer.compiled_lexicon}
+    # Two queued chunks per worker bound the parent's memory and apply backpressure
+    inboxes = [context.Queue(maxsize=2) for _ in range(partitions)]
+    outbox = context.Queue()
+    processes = [
+        context.Process(target=_partition_worker, args=(number, options, top_k, inbox, outbox),
+                        name=f'partition-{number}', daemon=True)
+        for number, inbox in enumerate(inboxes)
+    ]
+    for process in processes:
+        process.start()
+    try:
+        buffers = [[] for _ in range(partitions)]
+        for product, text in records:
+            number = partition_of(product, partitions)
+            buffer = buffers[number]
+            buffer.append((product, text))
+            if len(buffer) >= chunk_size:
+                _put(inboxes[number], buffer, processes[number], outbox)
+                buffers[number] = []
+        for number, buffer in enumerate(buffers):
+            if buffer:
+                _put(inboxes[number], buffer, processes[number], outbox)
+            _put(inboxes[number], None, processes[number], outbox)
+        parts = [_get(outbox, processes) for _ in processes]
+    finally:
+        for process in processes:
+            process.join(timeout=POLL_INTERVAL)
+            if process.is_alive():
+                process.terminate()
+
+    aggregates = GroupedAggregates(top_k)
+    # Combine in partition order so the product order does not depend on timing
+    for _, status, part in sorted(parts, key=lambda part: part[0]):
+        if status == 'error':
+            raise part
+        aggregates.merge(part)
+    return aggregates
@@ -0,0 +1,148 @@
+import hashlib
+import json
+import os
+from collections import namedtuple
+
+from src.analyzer.cache import analyzer_fingerprint
+from src.analyzer.summary import SentimentSummary
+from src.config.settings import INCREMENTAL_STATE_DIR
+from src.utils.ingestion import (
+    GZIP_MAGIC,
+    ZSTD_MAGIC,
+    detect_format,
+    iter_reviews,
+    iter_reviews_between,
+    record_end,
+)
+
+STATE_VERSION = 1
+# Bytes hashed at the start of the file and just before the watermark
+FINGERPRINT_BYTES = 4096
+
+IncrementalRun = namedtuple('IncrementalRun', ['summary', 'stream', 'mode', 'reason', 'scanned_bytes'])
+IncrementalRun.__doc__ = """Totals after an analyze_incremental run
+
+summary is the SentimentSummary of every record so far; stream the
+ReviewStream of the records scored in this run, with their counts and
+examples. mode is 'incremental' or 'full', and reason says why a full
+rescan was needed.
+"""
+
+
+def state_path_for(path, state_dir=INCREMENTAL_STATE_DIR):
+    """Default state file of a review file, keyed by its absolute path"""
+    digest = hashlib.sha256(os.path.abspath(path).encode('utf-8')).hexdigest()[:24]
+    return os.path.join(state_dir, f'{digest}.json')
+
+
+def _digest(raw, start, end):
+    raw.seek(start)
+    return hashlib.sha256(raw.read(end - start)).hexdigest()
+
+
+def _fingerprint(raw, offset):
+    """Identity of the file and hashes of its first bytes and the bytes before offset"""
+    stat = os.fstat(raw.fileno())
+    return {
+        'device': stat.st_dev,
+        'inode': stat.st_ino,
+        'head': _digest(raw, 0, min(offset, FINGERPRINT_BYTES)),
+        'tail': _digest(raw, max(0, offset - FINGERPRINT_BYTES), offset),
+    }
+
+
+def _load_state(state_path):
+    try:
+        with open(state_path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _save_state(state_path, state):
+    """Write the state atomically, so an interrupted run leaves the previous one intact"""
+    os.makedirs(os.path.dirname(os.path.abspath(state_path)), exist_ok=True)
+    partial = f'{state_path}.tmp'
+    with open(partial, 'w', encoding='utf-8') as f:
+        json.dump(state, f)
+    os.replace(partial, state_path)
+
+
+def _rescan_reason(state, raw, options, fingerprint, size):
+    """Why the saved state cannot be extended, or None when it can"""
+    if state is None:
+        return 'no saved state'
+    if state.get('version') != STATE_VERSION:
+        return 'state format changed'
+    if state['analyzer'] != fingerprint:
+        return 'analyzer changed'
+    if state['options'] != options:
+        return 'read options changed'
+    if size < state['offset']:
+        return 'file truncated'
+    if _fingerprint(raw, state['offset']) != state['fingerprint']:
+        return 'file rewritten'
+    return None
+
+
+def analyze_incremental(analyzer, path, state_path=None, fmt=None, review_column=None,
+                        json_key='comments', encoding='utf-8', max_examples=0):
+    """Bring the totals of an append-only review file up to date, scoring only new records
+
+    A state file keeps a watermark (byte offset of the last complete
+    record plus a fingerprint of the file) and the SentimentSummary up to
+    it. Records past the watermark are scored and merged into the totals.
+    The whole file is rescanned when there is no usable state, when the
+    file was truncated, replaced or changed before the watermark, or when
+    the analyzer (version, lexicon) or read options differ. Compressed
+    files cannot be appended to in place and are always rescanned.
+    """
+    fmt = fmt or detect_format(os.fspath(path))
+    state_path = state_path or state_path_for(path)
+    options = {'format': fmt, 'review_column': review_column, 'json_key': json_key,
+               'encoding': encoding}
+    fingerprint = analyzer_fingerprint(analyzer.analyzer)
+    with open(path, 'rb') as raw:
+        if raw.read(4).startswith((GZIP_MAGIC, ZSTD_MAGIC)):
+            raw.seek(0)
+            stream = analyzer.analyze_stream(
+                iter_reviews(raw, fmt=fmt, review_column=review_column, json_key=json_key,
+                             encoding=encoding, metrics=analyzer.metrics), max_examples)
+            stream.run()
+            return IncrementalRun(stream.sentiment_summary, stream, 'full',
+                                  'compressed file', raw.tell())
+
+        size = os.fstat(raw.fileno()).st_size
+        end = record_end(raw, fmt, size)
+        if end is None:
+            raise ValueError(f'{path}: the review array must be the last value of the JSON document')
+        state = _load_state(state_path)
+        reason = _rescan_reason(state, raw, options, fingerprint, size)
+        if reason is None:
+            try:
+                summary = SentimentSummary.from_dict(state['summary'])
+                start = state['offset']
+            except (KeyError, ValueError):
+                reason = 'state format changed'
+        if reason is None and end < start:
+            reason = 'file rewritten'
+        if reason is not None:
+            summary, start = SentimentSummary(), 0
+
+        reviews = iter_reviews_between(raw, start, end, fmt, review_column, json_key, encoding,
+                                       analyzer.metrics)
+        stream = analyzer.analyze_stream(reviews, max_examples)
+        stream.run()
+        summary.merge(stream.sentiment_summary)
+        state = {
+            'version': STATE_VERSION,
+            'path': os.path.abspath(path),
+            'analyzer': fingerprint,
+            'options': options,
+            'offset': end,
+            'fingerprint': _fingerprint(raw, end),
+            'summary': summary.to_dict(),
+        }
+    _save_state(state_path, state)
+    mode = 'full' if reason is not None else 'incremental'
+    return IncrementalRun(summary, stream, mode, reason, end - start)
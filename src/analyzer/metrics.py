@@ -0,0 +1,212 @@
+import threading
+import time
+from bisect import bisect_left
+
+import numpy as np
+
+# Upper bounds (inclusive, as Prometheus `le`) of the fixed histogram buckets
+LATENCY_BUCKETS = (1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4, 1e-3, 2.5e-3, 1e-2, 1e-1, 1.0)
+LENGTH_BUCKETS = (16, 32, 64, 128, 256, 512, 1024, 2048, 4096, 16384)
+CHUNK_LATENCY_BUCKETS = (1e-3, 5e-3, 1e-2, 5e-2, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# review_latency_seconds times single reviews (analyze_review); batch paths
+# score whole chunks, so they time each chunk instead
+HISTOGRAMS = {
+    'review_latency_seconds': LATENCY_BUCKETS,
+    'chunk_latency_seconds': CHUNK_LATENCY_BUCKETS,
+    'review_length_chars': LENGTH_BUCKETS,
+}
+
+
+class Histogram:
+    """Fixed-bucket histogram with a running sum and count"""
+
+    def __init__(self, bounds):
+        self.bounds = tuple(bounds)
+        self.buckets = [0] * (len(self.bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value, count=1):
+        self.buckets[bisect_left(self.bounds, value)] += count
+        self.sum += value * count
+        self.count += count
+
+    def observe_many(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        indexes = np.searchsorted(self.bounds, values, side='left')
+        for index, count in enumerate(np.bincount(indexes, minlength=len(self.buckets)).tolist()):
+            self.buckets[index] += count
+        self.sum += float(values.sum())
+        self.count += len(values)
+
+    def cumulative(self):
+        """(upper bound, observations at or below it) pairs, ending with +Inf"""
+        total, pairs = 0, []
+        for bound, count in zip(self.bounds + (float('inf'),), self.buckets):
+            total += count
+            pairs.append((bound, total))
+        return pairs
+
+
+class _Stage:
+    """Context manager adding its wall time to one stage"""
+
+    __slots__ = ('metrics', 'name', 'start')
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.metrics.record_stage(self.name, time.perf_counter() - self.start)
+
+
+class Metrics:
+    """Per-stage timers, counters and histograms for one analyzer
+
+    Pass an instance as ProductSentimentAnalyzer(metrics=...). Read it back
+    with snapshot() or to_prometheus(). Updates are thread-safe.
+    """
+
+    enabled = True
+
+    def __init__(self, namespace='nlp'):
+        self.namespace = namespace
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.counters = {}
+            self.stage_seconds = {}
+            self.stage_calls = {}
+            self.histograms = {name: Histogram(bounds) for name, bounds in HISTOGRAMS.items()}
+            # Number of recording calls, for estimating what disabled metrics cost
+            self.operations = 0
+
+    def count(self, name, value=1):
+        with self._lock:
+            self.operations += 1
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def stage(self, name):
+        return _Stage(self, name)
+
+    def record_stage(self, name, seconds):
+        with self._lock:
+            self.operations += 1
+            self.stage_seconds[name] = self.stage_seconds.get(name, 0.0) + seconds
+            self.stage_calls[name] = self.stage_calls.get(name, 0) + 1
+
+    def observe(self, name, value, count=1):
+        with self._lock:
+            self.operations += 1
+            self.histograms[name].observe(value, count)
+
+    def observe_many(self, name, values):
+        with self._lock:
+            self.operations += 1
+            self.histograms[name].observe_many(values)
+
+    def timed(self, iterable, name):
+        """Yield from iterable, charging the time spent producing items to a stage"""
+        iterator = iter(iterable)
+        clock = time.perf_counter
+        spent = 0.0
+        try:
+            while True:
+                start = clock()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+                finally:
+                    spent += clock() - start
+                yield item
+        finally:
+            self.record_stage(name, spent)
+
+    def snapshot(self):
+        """Plain-dict copy of every metric"""
+        with self._lock:
+            return {
+                'counters': dict(self.counters),
+                'stages': {name: {'seconds': seconds, 'calls': self.stage_calls[name]}
+                           for name, seconds in self.stage_seconds.items()},
+                'histograms': {name: {'buckets': histogram.cumulative(), 'sum': histogram.sum,
+                                      'count': histogram.count}
+                               for name, histogram in self.histograms.items()},
+            }
+
+    def to_prometheus(self):
+        """Snapshot in the Prometheus text exposition format"""
+        snapshot = self.snapshot()
+        prefix = self.namespace
+        lines = []
+        for name, value in sorted(snapshot['counters'].items()):
+            lines += [f'# TYPE {prefix}_{name}_total counter', f'{prefix}_{name}_total {value}']
+        if snapshot['stages']:
+            lines.append(f'# TYPE {prefix}_stage_seconds_total counter')
+            for name, stage in sorted(snapshot['stages'].items()):
+                lines.append(f'{prefix}_stage_seconds_total{{stage="{name}"}} {stage["seconds"]!r}')
+            lines.append(f'# TYPE {prefix}_stage_calls_total counter')
+            for name, stage in sorted(snapshot['stages'].items()):
+                lines.append(f'{prefix}_stage_calls_total{{stage="{name}"}} {stage["calls"]}')
+        for name, histogram in sorted(snapshot['histograms'].items()):
+            lines.append(f'# TYPE {prefix}_{name} histogram')
+            for bound, total in histogram['buckets']:
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append(f'{prefix}_{name}_bucket{{le="{le}"}} {total}')
+            lines.append(f'{prefix}_{name}_sum {histogram["sum"]!r}')
+            lines.append(f'{prefix}_{name}_count {histogram["count"]}')
+        return '\n'.join(lines) + '\n'
+
+
+class _NullStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return None
+
+
+_NULL_STAGE = _NullStage()
+
+
+class NullMetrics:
+    """Metrics stand-in that records nothing; the default for every analyzer"""
+
+    enabled = False
+
+    def count(self, name, value=1):
+        pass
+
+    def stage(self, name):
+        return _NULL_STAGE
+
+    def record_stage(self, name, seconds):
+        pass
+
+    def observe(self, name, value, count=1):
+        pass
+
+    def observe_many(self, name, values):
+        pass
+
+    def timed(self, iterable, name):
+        return iterable
+
+    def snapshot(self):
+        return {'counters': {}, 'stages': {}, 'histograms': {}}
+
+    def to_prometheus(self):
+        return ''
+
+
+NULL_METRICS = NullMetrics()
@@ -0,0 +1,52 @@
+from collections import deque
+
+from src.analyzer.vectorized import label_codes
+
+# Analyzer owned by each worker process, built once by _init_worker
+_worker_analyzer = None
+
+
+def _init_worker(options):
+    """Build the worker's analyzer once instead of once per chunk"""
+    global _worker_analyzer
+    from src.analyzer.sentiment_analyzer import ProductSentimentAnalyzer
+    _worker_analyzer = ProductSentimentAnalyzer(**options)
+
+
+def _score_chunk(chunk):
+    """Score one chunk; only score arrays and label codes travel back"""
+    scores = _worker_analyzer.score_batch(chunk)
+    return scores, label_codes(scores['compound'])
+
+
+class ParallelScorer:
+    """Process pool that scores review chunks and yields them back in input order"""
+
+    def __init__(self, options, workers, chunk_size):
+        """options are the ProductSentimentAnalyzer arguments each worker uses"""
+        # Imported here so that in-process use never loads multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+
+        self.chunk_size = chunk_size
+        self.workers = workers
+        self.executor = ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker, initargs=(options,)
+        )
+
+    def score_chunks(self, chunks):
+        """Yield (chunk, scores, labels) for each chunk of an iterable, in order"""
+        # Keep a bounded number of chunks in flight so huge batches are not
+        # all pickled up front
+        pending = deque()
+        max_pending = self.workers * 2
+        for chunk in chunks:
+            pending.append((chunk, self.executor.submit(_score_chunk, chunk)))
+            if len(pending) >= max_pending:
+                chunk, future = pending.popleft()
+                yield (chunk, *future.result())
+        while pending:
+            chunk, future = pending.popleft()
+            yield (chunk, *future.result())
+
+    def close(self):
+        self.executor.shutdown()
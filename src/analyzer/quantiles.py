@@ -0,0 +1,103 @@
+import math
+from itertools import accumulate
+
+import numpy as np
+
+from src.analyzer.results import SCORE_DECIMALS
+
+COMPOUND_SCALE = 10 ** SCORE_DECIMALS['compound']
+# Compound scores at or beyond these count as strong opinions for polarization
+STRONG_OPINION = COMPOUND_SCALE // 2
+DISTRIBUTION_QUANTILES = {'p10': 0.1, 'p50': 0.5, 'p90': 0.9}
+
+
+class CompoundSketch:
+    """Mergeable quantile sketch of compound scores
+
+    VADER rounds compound to four decimals, so there are only 20001
+    possible values. The sketch counts occurrences of each value seen:
+    memory is bounded by that grid whatever the corpus size, quantiles are
+    exact, and merging is exact and order-independent.
+    """
+
+    def __init__(self, counts=None):
+        # compound in units of 1e-4 -> number of reviews
+        self.counts = dict(counts or {})
+        self._cumulative = None
+
+    @property
+    def count(self):
+        return sum(self.counts.values())
+
+    def update(self, compound):
+        """Add compound scores (any array-like of floats)"""
+        fixed = np.rint(np.atleast_1d(np.asarray(compound, dtype=np.float64)) * COMPOUND_SCALE)
+        return self.update_fixed(fixed.astype(np.int64))
+
+    def update_fixed(self, fixed):
+        """Add compound scores already in units of 1e-4"""
+        values, occurrences = np.unique(fixed, return_counts=True)
+        counts = self.counts
+        for value, occurrence in zip(values.tolist(), occurrences.tolist()):
+            counts[value] = counts.get(value, 0) + occurrence
+        self._cumulative = None
+        return self
+
+    def merge(self, other):
+        """Fold another sketch into this one and return self"""
+        counts = self.counts
+        for value, occurrence in other.counts.items():
+            counts[value] = counts.get(value, 0) + occurrence
+        self._cumulative = None
+        return self
+
+    def _sorted(self):
+        if self._cumulative is None:
+            values = sorted(self.counts)
+            self._cumulative = values, list(accumulate(self.counts[value] for value in values))
+        return self._cumulative
+
+    def quantile(self, q):
+        """Smallest seen score with at least a q share of scores at or below it"""
+        values, cumulative = self._sorted()
+        if not values:
+            return 0.0
+        # Rounded first so 0.1 * 30 counts as rank 3, not 3.0000000000000004
+        rank = max(1, math.ceil(round(q * cumulative[-1], 9)))
+        position = int(np.searchsorted(cumulative, rank))
+        return values[min(position, len(values) - 1)] / COMPOUND_SCALE
+
+    def polarization(self):
+        """0 when opinions agree, 1 when half are strongly positive and half strongly negative
+
+        Twice the smaller of the shares of strongly positive (>= 0.5) and
+        strongly negative (<= -0.5) scores.
+        """
+        total = self.count
+        if not total:
+            return 0.0
+        positive = sum(n for value, n in self.counts.items() if value >= STRONG_OPINION)
+        negative = sum(n for value, n in self.counts.items() if value <= -STRONG_OPINION)
+        return 2 * min(positive, negative) / total
+
+    def distribution(self):
+        """p10/p50/p90 of the compound score and its polarization"""
+        result = {name: self.quantile(q) for name, q in DISTRIBUTION_QUANTILES.items()}
+        result['polarization'] = self.polarization()
+        return result
+
+    def to_dict(self):
+        values = sorted(self.counts)
+        return {'values': values, 'counts': [self.counts[value] for value in values]}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(zip(data['values'], data['counts']))
+
+    def __eq__(self, other):
+        if not isinstance(other, CompoundSketch):
+            return NotImplemented
+        return self.counts == other.counts
+
+    def __repr__(self):
+        return f'CompoundSketch({self.count} scores, {len(self.counts)} distinct)'
@@ -0,0 +1,204 @@
+from collections.abc import Mapping, Sequence
+
+import numpy as np
+
+from src.analyzer.vectorized import LABELS, SCORE_KEYS
+
+# Decimal places VADER rounds each score to; float32 storage round-trips them
+SCORE_DECIMALS = {'neg': 3, 'neu': 3, 'pos': 3, 'compound': 4}
+# Compound bins counted per label while results are built; coarser
+# histograms sum adjacent bins, so any bin count dividing this is exact
+HISTOGRAM_RESOLUTION = 200
+SORT_KEYS = ('row', 'compound', 'pos', 'neu', 'neg')
+
+
+class LabelView(Sequence):
+    """Read-only list of the reviews carrying one label, resolved on access"""
+
+    def __init__(self, results, code):
+        self._results = results
+        self._code = code
+        self._rows = None
+
+    @property
+    def rows(self):
+        """Row positions in the batch that carry this label"""
+        if self._rows is None:
+            self._rows = np.flatnonzero(self._results.labels == self._code)
+        return self._rows
+
+    def __len__(self):
+        return self._results.counts[LABELS[self._code]]
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return [self._results.text(row) for row in self.rows[item].tolist()]
+        return self._results.text(int(self.rows[item]))
+
+    def __eq__(self, other):
+        if isinstance(other, Sequence) and not isinstance(other, str):
+            return len(self) == len(other) and list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self):
+        return f'LabelView({LABELS[self._code]!r}, {len(self)} reviews)'
+
+
+class BatchResults(Mapping):
+    """Columnar analyze_comments results
+
+    Scores live in float32 arrays and labels in an int8 array indexing
+    LABELS; review text stays in the caller's sequence and is only looked
+    up on demand. As a mapping it still offers the 'positive', 'neutral',
+    'negative', 'average_scores' and 'counts' keys of the dict results,
+    plus 'distribution' (compound p10/p50/p90 and polarization).
+    """
+
+    def __init__(self, texts, scores, labels, average_scores, index=None):
+        self.texts = texts
+        self.index = np.arange(len(labels)) if index is None else index
+        self.neg = scores['neg'].astype(np.float32, copy=False)
+        self.neu = scores['neu'].astype(np.float32, copy=False)
+        self.pos = scores['pos'].astype(np.float32, copy=False)
+        self.compound = scores['compound'].astype(np.float32, copy=False)
+        self.labels = labels.astype(np.int8, copy=False)
+        self.average_scores = average_scores
+        self.counts = dict(zip(LABELS, np.bincount(self.labels, minlength=len(LABELS)).tolist()))
+        self._views = {label: LabelView(self, code) for code, label in enumerate(LABELS)}
+        self._distribution = None
+        self.compound_bins = self._bin_compound()
+        self._orders = {}
+
+    @property
+    def total(self):
+        """Number of reviews in the batch"""
+        return len(self.labels)
+
+    def __getitem__(self, key):
+        if key in self._views:
+            return self._views[key]
+        if key == 'average_scores':
+            return self.average_scores
+        if key == 'counts':
+            return self.counts
+        if key == 'distribution':
+            return self.distribution
+        raise KeyError(key)
+
+    def __iter__(self):
+        return iter(LABELS + ('average_scores', 'counts', 'distribution'))
+
+    def __len__(self):
+        return len(LABELS) + 3
+
+    @property
+    def distribution(self):
+        """Compound p10/p50/p90 and polarization, computed on first use"""
+        if self._distribution is None:
+            from src.analyzer.quantiles import CompoundSketch
+            self._distribution = CompoundSketch().update(self.compound).distribution()
+        return self._distribution
+
+    def _bin_compound(self):
+        """HISTOGRAM_RESOLUTION compound bins over [-1, 1] per label, as a (labels, bins) array"""
+        scale = 10 ** SCORE_DECIMALS['compound']
+        compound = np.rint(self.compound.astype(np.float64) * scale).astype(np.int64)
+        bins = np.minimum((compound + scale) * HISTOGRAM_RESOLUTION // (2 * scale),
+                          HISTOGRAM_RESOLUTION - 1)
+        counts = np.bincount(self.labels.astype(np.int64) * HISTOGRAM_RESOLUTION + bins,
+                             minlength=len(LABELS) * HISTOGRAM_RESOLUTION)
+        return counts.reshape(len(LABELS), HISTOGRAM_RESOLUTION)
+
+    def histogram(self, bins=20, low=-1.0, high=1.0):
+        """(bin edges, {label: counts}) of the compound score, summed from the pre-binned counts
+
+        low and high narrow the range to a drill-down; both are snapped to
+        the pre-binned grid, whose HISTOGRAM_RESOLUTION bins span [-1, 1].
+        """
+        first = int(np.clip(np.floor((low + 1) / 2 * HISTOGRAM_RESOLUTION + 1e-9), 0,
+                            HISTOGRAM_RESOLUTION - 1))
+        last = int(np.clip(np.ceil((high + 1) / 2 * HISTOGRAM_RESOLUTION - 1e-9), first + 1,
+                           HISTOGRAM_RESOLUTION))
+        span = last - first
+        bins = max(1, min(bins, span))
+        while span % bins:
+            bins -= 1
+        counts = self.compound_bins[:, first:last].reshape(len(LABELS), bins, span // bins).sum(axis=2)
+        edges = [round(-1 + 2 * (first + i * span // bins) / HISTOGRAM_RESOLUTION, 4)
+                 for i in range(bins + 1)]
+        return edges, {label: counts[code].tolist() for code, label in enumerate(LABELS)}
+
+    def order(self, key='row', descending=False):
+        """Row positions sorted by one score (or by row), computed once per key and direction
+
+        Both directions are stable: tied rows keep their batch order.
+        """
+        if key not in SORT_KEYS:
+            raise ValueError(f'Cannot sort by {key!r}')
+        if (key, descending) not in self._orders:
+            values = self.index if key == 'row' else getattr(self, key)
+            self._orders[key, descending] = np.argsort(-values if descending else values,
+                                                       kind='stable')
+        return self._orders[key, descending]
+
+    def select(self, labels=None, low=None, high=None, sort='row', descending=False):
+        """Positions of the rows with one of labels and compound in [low, high], in sort order"""
+        keep = np.ones(self.total, dtype=bool)
+        if labels is not None:
+            keep &= np.isin(self.labels, [LABELS.index(label) for label in labels])
+        if low is not None:
+            keep &= self.compound >= np.float32(low)
+        if high is not None:
+            keep &= self.compound <= np.float32(high)
+        order = self.order(sort, descending)
+        return order[keep[order]]
+
+    def page(self, rows, number=0, size=25):
+        """DataFrame of one page of rows (from select()), with text looked up for that page only"""
+        import pandas as pd
+
+        page = rows[number * size:(number + 1) * size]
+        return pd.DataFrame({
+            'row': self.index[page],
+            'sentiment': [LABELS[code] for code in self.labels[page].tolist()],
+            **{key: np.round(getattr(self, key)[page].astype(np.float64), SCORE_DECIMALS[key])
+               for key in ('compound', 'pos', 'neu', 'neg')},
+            'text': [self.text(row) for row in page.tolist()],
+        })
+
+    def text(self, row):
+        """Review text of one row, looked up in the source sequence"""
+        return self.texts[int(self.index[row])]
+
+    def scores(self, row):
+        """polarity_scores-shaped dict for one row"""
+        return {key: round(float(getattr(self, key)[row]), SCORE_DECIMALS[key]) for key in SCORE_KEYS}
+
+    def review(self, row):
+        """analyze_review-shaped dict for one row"""
+        return {
+            'text': self.text(row),
+            'scores': self.scores(row),
+            'sentiment': LABELS[self.labels[row]],
+        }
+
+    def summary(self):
+        """Mergeable SentimentSummary of the batch"""
+        from src.analyzer.summary import SentimentSummary
+        return SentimentSummary.from_results(self)
+
+    def to_dataframe(self, include_text=False):
+        """DataFrame over the score arrays without copying them"""
+        import pandas as pd
+
+        columns = {
+            'row': self.index,
+            'neg': self.neg,
+            'neu': self.neu,
+            'pos': self.pos,
+            'compound': self.compound,
+            'sentiment': pd.Categorical.from_codes(self.labels, categories=LABELS),
+        }
+        if include_text:
+            columns['text'] = [self.text(row) for row in range(self.total)]
+        return pd.DataFrame(columns, copy=False)
@@ -1,43 +1,339 @@
-from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+import os
+import time
+from collections import deque
+from collections.abc import Sized
+from itertools import chain, islice
+
+import numpy as np
+
+from src.analyzer.aspects import AspectIndex, AspectMatcher, describe_aspects
+from src.analyzer.cache import CachedBatch, analyzer_fingerprint
+from src.analyzer.dedup import DedupBatch
+from src.analyzer.grouped import aggregate_by_product
+from src.analyzer.incremental import analyze_incremental
+from src.analyzer.metrics import NULL_METRICS
+from src.analyzer.parallel import ParallelScorer
+from src.analyzer.results import BatchResults
+from src.analyzer.streaming import ReviewStream, iter_chunks
+from src.analyzer.summary import SentimentSummary
+from src.analyzer.vectorized import LABELS, SCORE_KEYS, VectorizedSentimentEngine, label_codes
+from src.utils.ingestion import iter_reviews
+from src.utils.lexicon_manager import get_resolver
+
+ENGINES = ('vader', 'vectorized')
+# Polarization (see CompoundSketch.polarization) from which a product counts as divisive
+POLARIZED = 0.4
 
 class ProductSentimentAnalyzer:
-    def __init__(self):
-        self.analyzer = SentimentIntensityAnalyzer()
+    # Reviews handed to the vectorized engine per call
+    batch_size = 10000
+
+    def __init__(self, engine='vader', workers=1, chunk_size=2000, parallel_threshold=20000,
+                 cache=None, compiled_lexicon=None, metrics=None, dedup=None):
+        """workers=None uses every core; batches under parallel_threshold stay in-process.
+
+        cache is an optional ScoreCache consulted before any review is scored.
+        compiled_lexicon is the path of a file built by src.analyzer.compiled_lexicon,
+        memory-mapped instead of parsing the text lexicons.
+        metrics is an optional src.analyzer.metrics.Metrics collecting stage
+        timings, counters and histograms; without it nothing is recorded.
+        dedup is an optional src.analyzer.dedup.NearDuplicateIndex: near-duplicate
+        reviews then get the scores of their cluster's representative, which
+        is the only one scored. dedup.report() gives counts without duplicates.
+        """
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown engine '{engine}', expected one of {ENGINES}")
+        self.engine = engine
+        self.compiled_lexicon = compiled_lexicon
+        self.analyzer = get_resolver().vader_analyzer(compiled_lexicon)
+        self.metrics = metrics or NULL_METRICS
+        self.batch_engine = (VectorizedSentimentEngine(self.analyzer, self.metrics)
+                             if engine == 'vectorized' else None)
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.parallel_threshold = parallel_threshold
+        self._pool = None
+        self.cache = cache
+        if cache is not None:
+            cache.bind(analyzer_fingerprint(self.analyzer))
+        self.dedup = dedup
+
+    def close(self):
+        """Shut down the worker pool, if one was started"""
+        if self._pool is not None:
+            self._pool.close()
+            self._pool = None
+
+    def score_batch(self, comments):
+        """Score arrays (neg/neu/pos/compound) for a list of reviews"""
+        if self.cache is None and self.dedup is None:
+            return self._engine_scores(comments)
+        batch = self._pending_batch(comments)
+        scores = self._engine_scores(batch.missing)
+        return self._complete(batch, scores)
+
+    def score_on_pool(self, comments):
+        """score_batch with the engine's share split evenly over the worker pool
+
+        For batches under parallel_threshold that are still worth spreading
+        out, such as the scoring service's micro-batches. Cache and dedup
+        lookups stay in this process, so the scores match score_batch.
+        """
+        batch = None
+        if self.cache is not None or self.dedup is not None:
+            batch = self._pending_batch(comments)
+            comments = batch.missing
+        size = max(1, -(-len(comments) // self.workers))
+        chunks = [comments[start:start + size] for start in range(0, len(comments), size)]
+        parts = [scores for _, scores, _ in self._worker_pool().score_chunks(chunks)]
+        scores = {key: np.concatenate([part[key] for part in parts]) if parts else np.zeros(0)
+                  for key in SCORE_KEYS}
+        return self._complete(batch, scores) if batch is not None else scores
+
+    def _pending_batch(self, comments):
+        """CachedBatch or DedupBatch whose `missing` reviews are all the engine has to score"""
+        if self.dedup is None:
+            return self._cached_batch(comments)
+        with self.metrics.stage('dedup'):
+            batch = DedupBatch(self.dedup, comments,
+                               self._cached_batch if self.cache is not None else None)
+        if self.metrics.enabled:
+            self.metrics.count('duplicates', len(comments) - len(batch.founded))
+        return batch
+
+    def _complete(self, batch, scores):
+        with self.metrics.stage('cache' if self.dedup is None else 'dedup'):
+            return batch.complete(scores)
+
+    def _cached_batch(self, comments):
+        with self.metrics.stage('cache'):
+            batch = CachedBatch(self.cache, comments)
+        self._count_cache(batch)
+        return batch
+
+    def _count_cache(self, batch):
+        if self.metrics.enabled:
+            self.metrics.count('cache_misses', len(batch.missing))
+            self.metrics.count('cache_hits', len(batch.keys) - len(batch.missing))
+
+    def _engine_scores(self, comments):
+        if self.batch_engine is not None:
+            return self.batch_engine.score_batch(comments)
+        with self.metrics.stage('vader'):
+            rows = [self.analyzer.polarity_scores(comment) for comment in comments]
+        return {key: np.array([row[key] for row in rows], dtype=np.float64) for key in SCORE_KEYS}
 
     def analyze_review(self, review):
         """Single review analysis - used by both apps"""
-        scores = self.analyzer.polarity_scores(review)
+        start = time.perf_counter() if self.metrics.enabled else None
+        if self.cache is not None or self.dedup is not None:
+            batch_scores = self.score_batch([review])
+            scores = {key: float(batch_scores[key][0]) for key in SCORE_KEYS}
+        else:
+            # Both engines give identical scores, and for one review the
+            # vectorized engine's array set-up costs more than it saves
+            scores = self.analyzer.polarity_scores(review)
         sentiment = self._get_sentiment_label(scores['compound'])
+        if start is not None:
+            self.metrics.count('reviews')
+            self.metrics.observe('review_length_chars', len(review))
+            self.metrics.observe('review_latency_seconds', time.perf_counter() - start)
         return {
             'text': review,
             'scores': scores,
             'sentiment': sentiment
         }
 
-    def analyze_comments(self, comments):
-        """Batch analysis - used by both apps"""
-        results = {
-            'positive': [],
-            'neutral': [],
-            'negative': [],
-            'average_scores': {'pos': 0, 'neu': 0, 'neg': 0, 'compound': 0}
-        }
-        
-        for comment in comments:
-            analysis = self.analyze_review(comment)
-            results[analysis['sentiment']].append(comment)
-            
-            # Update average scores
-            for key in analysis['scores']:
-                results['average_scores'][key] += analysis['scores'][key]
-        
-        # Calculate final averages
-        num_comments = len(comments)
-        if num_comments > 0:
-            for key in results['average_scores']:
-                results['average_scores'][key] /= num_comments
-        
-        return results
+    def analyze_comments(self, comments, progress=None):
+        """Batch analysis - used by both apps
+
+        Returns a BatchResults, which reads like the old dict of label lists
+        but keeps scores in arrays and the review text in `comments`.
+        progress, if given, is called after every chunk with a dict of
+        'done', 'total', 'counts' and running 'average_scores'.
+        """
+        return self._collect_scored(comments, self._scored_chunks(comments), progress)
+
+    def analyze_stream(self, comments, max_examples=0):
+        """Constant-memory analysis of any iterable of reviews
+
+        Returns a ReviewStream: iterate it for per-review results, then call
+        summary() (or run() to do both) for counts and average scores.
+        """
+        return ReviewStream(self, self.metrics.timed(comments, 'ingest'), max_examples)
+
+    def summarize(self, comments, summary=None):
+        """Fold any iterable of reviews into a SentimentSummary without keeping them
+
+        Pass an existing summary to extend it; summaries of separate shards
+        can be combined later with SentimentSummary.merge.
+        """
+        summary = summary if summary is not None else SentimentSummary()
+        comments = self.metrics.timed(comments, 'ingest')
+        for _, scores, _ in self._scored_chunks(comments):
+            summary.update(scores)
+        return summary
+
+    def analyze_grouped(self, records, top_k=3):
+        """Per-product aggregates of (product id, review) pairs, in one pass
+
+        Returns a GroupedAggregates holding a SentimentSummary and the top_k
+        most positive and negative reviews per product. With workers > 1,
+        from parallel_threshold rows on, rows are hash-partitioned by
+        product across worker processes.
+        """
+        records, parallel = self._parallel_input(self.metrics.timed(records, 'ingest'))
+        partitions = self.workers if parallel else 1
+        return aggregate_by_product(self, records, top_k, partitions, self.chunk_size)
+
+    def analyze_aspects(self, comments, matcher=None):
+        """AspectIndex of any iterable of reviews, scored in chunks without keeping them
+
+        matcher is an AspectMatcher (default aspects if omitted); review ids
+        in the index are positions in comments.
+        """
+        matcher = matcher or AspectMatcher()
+        index = AspectIndex(matcher.aspects)
+        comments = self.metrics.timed(comments, 'ingest')
+        for chunk, scores, _ in self._scored_chunks(comments):
+            with self.metrics.stage('aspects'):
+                index.update(matcher.find_many(chunk), scores)
+        return index
+
+    def generate_product_conclusions(self, grouped):
+        """generate_customer_conclusion for every product of analyze_grouped results"""
+        return {product: self.generate_customer_conclusion(grouped.summary(product))
+                for product in grouped}
+
+    def analyze_file(self, source, max_examples=0, **options):
+        """analyze_stream over a review file read in bounded chunks
+
+        source is a path or binary file object; options go to
+        src.utils.ingestion.iter_reviews (name, fmt, review_column, ...).
+        """
+        options.setdefault('metrics', self.metrics)
+        return self.analyze_stream(iter_reviews(source, **options), max_examples)
+
+    def analyze_incremental(self, path, state_path=None, max_examples=0, **options):
+        """Update the saved totals of an append-only review file with its new records
+
+        Returns an IncrementalRun; see src.analyzer.incremental. options go
+        to the reader (fmt, review_column, json_key, encoding).
+        """
+        return analyze_incremental(self, path, state_path, max_examples=max_examples, **options)
+
+    def _parallel_input(self, comments):
+        """(comments, parallel): the pool is only used from parallel_threshold reviews on
+
+        Iterables without a length are peeked up to the threshold, and the
+        peeked reviews are chained back in front of the rest.
+        """
+        if self.workers <= 1:
+            return comments, False
+        if isinstance(comments, Sized):
+            return comments, len(comments) >= self.parallel_threshold
+        comments = iter(comments)
+        head = list(islice(comments, self.parallel_threshold))
+        return chain(head, comments), len(head) >= self.parallel_threshold
+
+    def _scored_chunks(self, comments):
+        """Yield ordered (chunk, scores, labels) parts, in-process or on the pool"""
+        comments, parallel = self._parallel_input(comments)
+        if parallel:
+            self._worker_pool()
+            chunks = iter_chunks(comments, self.chunk_size)
+            if self.cache is not None or self.dedup is not None:
+                return self._observed(self._pending_pool_chunks(chunks))
+            return self._observed(self._pool.score_chunks(chunks))
+        return (self._score_chunk(chunk) for chunk in iter_chunks(comments, self.batch_size))
+
+    def _worker_pool(self):
+        if self._pool is None:
+            options = {'engine': self.engine, 'compiled_lexicon': self.compiled_lexicon}
+            self._pool = ParallelScorer(options, self.workers, self.chunk_size)
+        return self._pool
+
+    def _pending_pool_chunks(self, chunks):
+        """Send only the cache misses and cluster representatives of each chunk to the pool"""
+        batches = deque()
+
+        def missing():
+            for chunk in chunks:
+                batch = self._pending_batch(chunk)
+                batches.append((chunk, batch))
+                yield batch.missing
+
+        for _, scores, _ in self._pool.score_chunks(missing()):
+            chunk, batch = batches.popleft()
+            scores = self._complete(batch, scores)
+            yield chunk, scores, label_codes(scores['compound'])
+
+    def _score_chunk(self, chunk):
+        if not self.metrics.enabled:
+            scores = self.score_batch(chunk)
+            return chunk, scores, label_codes(scores['compound'])
+        start = time.perf_counter()
+        scores = self.score_batch(chunk)
+        labels = label_codes(scores['compound'])
+        self._observe_chunk(chunk, time.perf_counter() - start)
+        return chunk, scores, labels
+
+    def _observed(self, scored_chunks):
+        """Record review counts and lengths for chunks scored on the pool"""
+        for part in scored_chunks:
+            if self.metrics.enabled:
+                self._observe_chunk(part[0])
+            yield part
+
+    def _observe_chunk(self, chunk, seconds=None):
+        """Count a scored chunk and, when timed in-process, record its latency as one observation"""
+        if not chunk:
+            return
+        self.metrics.count('reviews', len(chunk))
+        self.metrics.observe_many('review_length_chars', [len(text) for text in chunk])
+        if seconds is not None:
+            self.metrics.observe('chunk_latency_seconds', seconds)
+
+    def _collect_scored(self, comments, scored_chunks, progress=None):
+        """Merge ordered (chunk, scores, labels) parts into one BatchResults"""
+        totals = {key: [] for key in SCORE_KEYS}
+        labels = []
+        running = {'done': 0, 'total': len(comments), 'counts': dict.fromkeys(LABELS, 0),
+                   'score_sums': dict.fromkeys(SCORE_KEYS, 0.0)}
+        for _, scores, chunk_labels in scored_chunks:
+            labels.append(chunk_labels)
+            for key in SCORE_KEYS:
+                totals[key].append(scores[key])
+            if progress is not None:
+                self._report_progress(progress, running, scores, chunk_labels)
+        with self.metrics.stage('assemble'):
+            scores = {key: np.concatenate(parts) if parts else np.zeros(0)
+                      for key, parts in totals.items()}
+            labels = np.concatenate(labels) if labels else np.zeros(0, dtype=np.int8)
+
+            # Running sums in review order reproduce the loop's float additions
+            average_scores = {'pos': 0, 'neu': 0, 'neg': 0, 'compound': 0}
+            num_comments = len(comments)
+            if num_comments > 0:
+                for key in average_scores:
+                    average_scores[key] = float(np.cumsum(scores[key])[-1]) / num_comments
+
+            return BatchResults(comments, scores, labels, average_scores)
+
+    @staticmethod
+    def _report_progress(progress, running, scores, labels):
+        running['done'] += len(labels)
+        for code, count in enumerate(np.bincount(labels, minlength=len(LABELS)).tolist()):
+            running['counts'][LABELS[code]] += count
+        for key in SCORE_KEYS:
+            running['score_sums'][key] += float(scores[key].sum())
+        progress({
+            'done': running['done'],
+            'total': running['total'],
+            'counts': dict(running['counts']),
+            'average_scores': {key: total / max(running['done'], 1)
+                               for key, total in running['score_sums'].items()},
+        })
 
     def _get_sentiment_label(self, compound_score):
         """Determine sentiment label based on compound score"""
@@ -47,30 +343,55 @@ class ProductSentimentAnalyzer:
             return 'negative'
         return 'neutral'
 
-    def generate_customer_conclusion(self, results):
-        """Generate detailed conclusion for customers"""
-        avg_scores = results['average_scores']
-        pos_count = len(results['positive'])
-        neg_count = len(results['negative'])
-        total_reviews = len(results['positive']) + len(results['negative']) + len(results['neutral'])
+    def generate_customer_conclusion(self, results, aspects=None):
+        """Generate detailed conclusion for customers
+
+        results may be analyze_comments results, a streamed summary dict or
+        a SentimentSummary. With an AspectIndex of the same reviews, strong
+        points and issues are the measured aspects instead of generic ones.
+        """
+        if isinstance(results, SentimentSummary):
+            avg_scores, counts = results.average_scores, results.counts
+            distribution = results.distribution()
+        else:
+            avg_scores = results['average_scores']
+            # Streamed summaries carry counts; their example lists may be truncated
+            counts = results.get('counts') or {label: len(results[label]) for label in LABELS}
+            distribution = results.get('distribution')
+        pos_count = counts['positive']
+        neg_count = counts['negative']
+        total_reviews = counts['positive'] + counts['negative'] + counts['neutral']
         
         # Calculate percentages
         pos_percentage = (pos_count / total_reviews) * 100
         neg_percentage = (neg_count / total_reviews) * 100
+        strong_points = self._measured_aspects(aspects, 'positive', 'Quality and customer satisfaction')
+        common_issues = self._measured_aspects(aspects, 'negative', 'Product durability and expectations')
         
         # Generate main conclusion
-        if avg_scores['compound'] >= 0.05:
+        if distribution and distribution['polarization'] >= POLARIZED:
+            # Loved and hated in similar measure: the mean alone would read as mixed
+            main_conclusion = (
+                "🔀 Divided Opinions:\n"
+                f"• {int(pos_percentage)}% of customers loved it, {int(neg_percentage)}% reported concerns\n"
+                f"• Scores range from {distribution['p10']:+.2f} to {distribution['p90']:+.2f} "
+                "(10th to 90th percentile)\n"
+                "• Suggestion: Read both the positive and negative reviews before buying"
+            )
+            if aspects is not None:
+                main_conclusion += f"\n• Most criticised: {common_issues}"
+        elif avg_scores['compound'] >= 0.05:
             main_conclusion = (
                 "✨ Product Highlights:\n"
                 f"• {int(pos_percentage)}% of customers had a positive experience\n"
-                "• Strong points: Quality and customer satisfaction\n"
+                f"• Strong points: {strong_points}\n"
                 "• Recommended for: Users looking for reliable products"
             )
         elif avg_scores['compound'] <= -0.05:
             main_conclusion = (
                 "⚠️ Consider Before Buying:\n"
                 f"• {int(neg_percentage)}% of customers reported concerns\n"
-                "• Common issues: Product durability and expectations\n"
+                f"• Common issues: {common_issues}\n"
                 "• Suggestion: Compare with similar products"
             )
         else:
@@ -81,4 +402,14 @@ class ProductSentimentAnalyzer:
                 "• Consider your specific needs before purchase"
             )
         
-        return main_conclusion
\ No newline at end of file
+        return main_conclusion
+
+    @staticmethod
+    def _measured_aspects(aspects, label, default):
+        """Aspects most praised or criticised in an AspectIndex, or default without one"""
+        if aspects is None:
+            return default
+        ranked = aspects.strengths() if label == 'positive' else aspects.issues()
+        if not ranked:
+            return f'no tracked aspect stands out ({", ".join(aspects.aspects)})'
+        return describe_aspects(ranked, label)
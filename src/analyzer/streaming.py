@@ -0,0 +1,86 @@
+from itertools import islice
+
+import numpy as np
+
+from src.analyzer.summary import SentimentSummary
+from src.analyzer.vectorized import LABELS, SCORE_KEYS
+
+
+def iter_chunks(iterable, size):
+    """Consecutive lists of at most size items from any iterable"""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class ReviewStream:
+    """Lazily analyzes an iterable of reviews while keeping running totals
+
+    Iterating yields one analyze_review-style dict per review. Memory stays
+    flat: only one chunk of reviews is held at a time and at most
+    max_examples reviews are kept per label. sentiment_summary holds a
+    mergeable SentimentSummary of everything streamed so far.
+    """
+
+    def __init__(self, analyzer, comments, max_examples=0):
+        self.analyzer = analyzer
+        self.comments = comments
+        self.max_examples = max_examples
+        self.count = 0
+        self.counts = dict.fromkeys(LABELS, 0)
+        self.examples = {label: [] for label in LABELS}
+        self.score_sums = {'pos': 0, 'neu': 0, 'neg': 0, 'compound': 0}
+        self.sentiment_summary = SentimentSummary()
+
+    def chunks(self):
+        """Yield (reviews, score arrays, label codes) per chunk while updating the totals
+
+        The bulk alternative to iterating: no per-review dicts are built.
+        """
+        for chunk, scores, labels in self.analyzer._scored_chunks(self.comments):
+            self.sentiment_summary.update(scores)
+            self.count += len(chunk)
+            for code, count in enumerate(np.bincount(labels, minlength=len(LABELS)).tolist()):
+                self.counts[LABELS[code]] += count
+                room = self.max_examples - len(self.examples[LABELS[code]])
+                if count and room > 0:
+                    rows = np.flatnonzero(labels == code)[:room].tolist()
+                    self.examples[LABELS[code]].extend(chunk[row] for row in rows)
+            for key in self.score_sums:
+                # Running sums in review order, as analyze_comments adds them
+                running = np.cumsum(np.append(self.score_sums[key], scores[key]))
+                self.score_sums[key] = float(running[-1])
+            yield chunk, scores, labels
+
+    def __iter__(self):
+        for chunk, scores, labels in self.chunks():
+            columns = [scores[key].tolist() for key in SCORE_KEYS]
+            for comment, label, *values in zip(chunk, labels.tolist(), *columns):
+                yield {'text': comment, 'scores': dict(zip(SCORE_KEYS, values)),
+                       'sentiment': LABELS[label]}
+
+    def run(self):
+        """Consume the whole stream and return the summary"""
+        for _ in self.chunks():
+            pass
+        return self.summary()
+
+    @property
+    def average_scores(self):
+        """Running averages over the reviews seen so far"""
+        if not self.count:
+            return dict(self.score_sums)
+        return {key: total / self.count for key, total in self.score_sums.items()}
+
+    def summary(self):
+        """analyze_comments-shaped results with bounded example lists and counts"""
+        results = {label: list(self.examples[label]) for label in LABELS}
+        results['average_scores'] = self.average_scores
+        results['counts'] = dict(self.counts)
+        results['distribution'] = self.sentiment_summary.distribution()
+        if self.analyzer.dedup is not None:
+            results['deduplication'] = self.analyzer.dedup.report()
+        return results
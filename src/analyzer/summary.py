@@ -0,0 +1,158 @@
+from fractions import Fraction
+
+import numpy as np
+
+from src.analyzer.quantiles import COMPOUND_SCALE, CompoundSketch
+from src.analyzer.results import SCORE_DECIMALS
+from src.analyzer.vectorized import LABELS, SCORE_KEYS
+
+SUMMARY_VERSION = 2
+HISTOGRAM_BINS = 20
+# Label thresholds on the compound score in units of 1e-4 (-10000 .. 10000)
+POSITIVE_FLOOR = COMPOUND_SCALE // 20
+NEGATIVE_CEILING = -POSITIVE_FLOOR
+
+
+def _fixed_point(values, key):
+    """Scores as int64 multiples of their last decimal place"""
+    values = np.atleast_1d(np.asarray(values, dtype=np.float64))
+    return np.rint(values * 10 ** SCORE_DECIMALS[key]).astype(np.int64)
+
+
+class SentimentSummary:
+    """Mergeable counts, moments, compound histogram and quantile sketch
+
+    VADER rounds every score to a few decimals, so sums are kept as exact
+    integers in those units. merge() and update() therefore give the same
+    totals in any order or grouping: partial summaries from shards, days
+    or workers combine to exactly the numbers of a single pass.
+    """
+
+    def __init__(self, bins=HISTOGRAM_BINS):
+        self.bins = bins
+        self.count = 0
+        self.counts = dict.fromkeys(LABELS, 0)
+        self.sums = dict.fromkeys(SCORE_KEYS, 0)
+        self.compound_squares = 0
+        self.histogram = [0] * bins
+        self.sketch = CompoundSketch()
+
+    @classmethod
+    def from_scores(cls, scores, bins=HISTOGRAM_BINS):
+        return cls(bins).update(scores)
+
+    @classmethod
+    def from_results(cls, results, bins=HISTOGRAM_BINS):
+        """Summary of a BatchResults"""
+        scores = {key: getattr(results, key).astype(np.float64) for key in SCORE_KEYS}
+        return cls(bins).update(scores)
+
+    def update(self, scores):
+        """Add reviews given as score arrays (score_batch) or one polarity_scores dict"""
+        compound = _fixed_point(scores['compound'], 'compound')
+        if not len(compound):
+            return self
+        for key in SCORE_KEYS:
+            values = compound if key == 'compound' else _fixed_point(scores[key], key)
+            self.sums[key] += int(values.sum())
+        self.compound_squares += int(np.dot(compound, compound))
+        self.count += len(compound)
+        self.counts['positive'] += int(np.count_nonzero(compound >= POSITIVE_FLOOR))
+        self.counts['negative'] += int(np.count_nonzero(compound <= NEGATIVE_CEILING))
+        self.counts['neutral'] = self.count - self.counts['positive'] - self.counts['negative']
+        bins = np.minimum((compound + COMPOUND_SCALE) * self.bins // (2 * COMPOUND_SCALE),
+                          self.bins - 1)
+        for index, count in enumerate(np.bincount(bins, minlength=self.bins).tolist()):
+            self.histogram[index] += count
+        self.sketch.update_fixed(compound)
+        return self
+
+    def merge(self, other):
+        """Fold another summary into this one and return self"""
+        if other.bins != self.bins:
+            raise ValueError(f'Cannot merge summaries with {self.bins} and {other.bins} bins')
+        self.count += other.count
+        for label in LABELS:
+            self.counts[label] += other.counts[label]
+        for key in SCORE_KEYS:
+            self.sums[key] += other.sums[key]
+        self.compound_squares += other.compound_squares
+        self.histogram = [a + b for a, b in zip(self.histogram, other.histogram)]
+        self.sketch.merge(other.sketch)
+        return self
+
+    @classmethod
+    def merged(cls, summaries, bins=HISTOGRAM_BINS):
+        """One summary combining any number of partial ones"""
+        total = cls(bins)
+        for summary in summaries:
+            total.merge(summary)
+        return total
+
+    @property
+    def average_scores(self):
+        """Mean of each score, as in analyze_comments results"""
+        if not self.count:
+            return dict.fromkeys(SCORE_KEYS, 0)
+        return {key: float(Fraction(self.sums[key], self.count * 10 ** SCORE_DECIMALS[key]))
+                for key in SCORE_KEYS}
+
+    @property
+    def compound_variance(self):
+        """Population variance of the compound score"""
+        if not self.count:
+            return 0.0
+        # n * sum(x^2) - sum(x)^2 is exact in integers, so no cancellation error
+        spread = self.count * self.compound_squares - self.sums['compound'] ** 2
+        return float(Fraction(spread, (self.count * COMPOUND_SCALE) ** 2))
+
+    @property
+    def compound_std(self):
+        return self.compound_variance ** 0.5
+
+    def distribution(self):
+        """p10/p50/p90 of the compound score and its polarization"""
+        return self.sketch.distribution()
+
+    def bin_edges(self):
+        """bins + 1 compound values bounding the histogram bins"""
+        return [-1 + 2 * i / self.bins for i in range(self.bins + 1)]
+
+    def percentages(self):
+        return {label: (count / self.count * 100 if self.count else 0.0)
+                for label, count in self.counts.items()}
+
+    def to_dict(self):
+        """JSON-safe form; from_dict(to_dict()) restores it exactly"""
+        return {
+            'version': SUMMARY_VERSION,
+            'bins': self.bins,
+            'count': self.count,
+            'counts': dict(self.counts),
+            'sums': dict(self.sums),
+            'compound_squares': self.compound_squares,
+            'histogram': list(self.histogram),
+            'sketch': self.sketch.to_dict(),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        if data.get('version') != SUMMARY_VERSION:
+            raise ValueError(f"Unsupported summary version {data.get('version')!r}")
+        summary = cls(data['bins'])
+        summary.count = data['count']
+        summary.counts = {label: data['counts'][label] for label in LABELS}
+        summary.sums = {key: data['sums'][key] for key in SCORE_KEYS}
+        summary.compound_squares = data['compound_squares']
+        summary.histogram = list(data['histogram'])
+        summary.sketch = CompoundSketch.from_dict(data['sketch'])
+        return summary
+
+    def __eq__(self, other):
+        if not isinstance(other, SentimentSummary):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    def __repr__(self):
+        return (f'SentimentSummary({self.count} reviews, '
+                f"mean compound {self.average_scores['compound']:.4f})")
@@ -0,0 +1,375 @@
+import re
+import string
+
+import numpy as np
+from vaderSentiment.vaderSentiment import (
+    BOOSTER_DICT,
+    C_INCR,
+    N_SCALAR,
+    NEGATE,
+    SPECIAL_CASES,
+)
+
+from src.analyzer.metrics import NULL_METRICS
+
+SCORE_KEYS = ('neg', 'neu', 'pos', 'compound')
+# Label codes index into LABELS, in the order analyze_comments reports them
+LABELS = ('positive', 'neutral', 'negative')
+
+# Words the rule passes compare against, encoded as small integer codes
+RULE_WORDS = ('no', 'kind', 'of', 'least', 'at', 'very', 'never', 'so', 'this',
+              'without', 'doubt', 'but', 'or', 'nor')
+PHRASES = {phrase: value for phrase, value in SPECIAL_CASES.items() if ' ' in phrase}
+BOOSTER_PHRASES = {phrase: value for phrase, value in BOOSTER_DICT.items() if ' ' in phrase}
+
+WORD_CODES = {}
+for _word in RULE_WORDS + tuple(' '.join(list(PHRASES) + list(BOOSTER_PHRASES)).split()):
+    WORD_CODES.setdefault(_word, len(WORD_CODES) + 1)
+NO, KIND, OF, LEAST, AT, VERY, NEVER, SO, THIS, WITHOUT, DOUBT, BUT, OR, NOR = (
+    WORD_CODES[word] for word in RULE_WORDS)
+
+NEGATE_WORDS = frozenset(NEGATE)
+
+
+def _strip_punc_if_word(token):
+    """Same token cleanup as VADER's SentiText"""
+    stripped = token.strip(string.punctuation)
+    if len(stripped) <= 2:
+        return token
+    return stripped
+
+
+def _char_class(chars):
+    """Compact regex character class built from runs of consecutive code points"""
+    points = sorted(ord(char) for char in chars)
+    runs = []
+    for point in points:
+        if runs and point == runs[-1][1] + 1:
+            runs[-1][1] = point
+        else:
+            runs.append([point, point])
+    parts = [re.escape(chr(lo)) if lo == hi else f'{re.escape(chr(lo))}-{re.escape(chr(hi))}'
+             for lo, hi in runs]
+    return '[' + ''.join(parts) + ']'
+
+
+def _round_half(values, ndigits):
+    """Vectorized equivalent of Python's round() for an array of floats"""
+    scale = 10.0 ** ndigits
+    scaled = values * scale
+    rounded = np.rint(scaled) / scale
+    # Values sitting on a .5 boundary are settled by Python's exact rounding
+    ties = np.flatnonzero(np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6)
+    for i in ties:
+        rounded[i] = round(float(values[i]), ndigits)
+    return rounded
+
+
+def label_codes(compound):
+    """Vectorized _get_sentiment_label, returning indexes into LABELS"""
+    return np.where(compound >= 0.05, 0, np.where(compound <= -0.05, 2, 1)).astype(np.int8)
+
+
+def _sequential_but_check(values, bi):
+    """VADER's index()-based 'but' pass, used when sentiment values repeat"""
+    for k in range(len(values)):
+        sentiment = values[k]
+        si = values.index(sentiment)
+        if si < bi:
+            values[si] = sentiment * 0.5
+        elif si > bi:
+            values[si] = sentiment * 1.5
+    return values
+
+
+class VectorizedSentimentEngine:
+    """Scores a whole batch of reviews with NumPy, matching polarity_scores exactly"""
+
+    max_cached_tokens = 500000
+
+    def __init__(self, analyzer=None, metrics=None):
+        if analyzer is None:
+            from src.utils.lexicon_manager import get_resolver
+            analyzer = get_resolver().vader_analyzer()
+        self.analyzer = analyzer
+        self.metrics = metrics or NULL_METRICS
+        self.lexicon = self.analyzer.lexicon
+        # polarity_scores walks the text one character at a time, so only
+        # single-character emoji keys can ever be replaced
+        emojis = {char: desc for char, desc in self.analyzer.emojis.items() if len(char) == 1}
+        self.emojis = emojis
+        self._emoji_chars = frozenset(emojis)
+        self._emoji_pattern = re.compile(_char_class(emojis)) if emojis else None
+        self._token_props = {}
+
+    def polarity_scores(self, text):
+        """Single review scores in the same dict shape as VADER"""
+        scores = self.score_batch([text])
+        return {key: float(scores[key][0]) for key in SCORE_KEYS}
+
+    def _replace_emojis(self, text):
+        """Swap emojis for their descriptions the way polarity_scores does"""
+        if self._emoji_chars.isdisjoint(text):
+            return text.strip()
+
+        def describe(match):
+            start = match.start()
+            prefix = '' if start == 0 or text[start - 1] == ' ' else ' '
+            return prefix + self.emojis[match.group()]
+
+        return self._emoji_pattern.sub(describe, text).strip()
+
+    def _properties(self, token):
+        """Lexicon and rule properties of one raw token"""
+        props = self._token_props.get(token)
+        if props is None:
+            word = _strip_punc_if_word(token)
+            lower = word.lower()
+            props = (
+                self.lexicon.get(lower, 0.0),
+                lower in self.lexicon,
+                BOOSTER_DICT.get(lower, 0.0),
+                lower in BOOSTER_DICT,
+                word.isupper(),
+                lower in NEGATE_WORDS or "n't" in lower,
+                WORD_CODES.get(lower, 0),
+            )
+            if len(self._token_props) >= self.max_cached_tokens:
+                self._token_props.clear()
+            self._token_props[token] = props
+        return props
+
+    def _tokenize(self, texts):
+        """Split the batch into one flat array of vocabulary IDs"""
+        flat = []
+        lengths = np.zeros(len(texts), dtype=np.int64)
+        exclamations = np.zeros(len(texts), dtype=np.int64)
+        questions = np.zeros(len(texts), dtype=np.int64)
+        with self.metrics.stage('tokenize'):
+            for row, text in enumerate(texts):
+                if not isinstance(text, str):
+                    raise TypeError(f'reviews must be str, got {type(text).__name__}')
+                text = self._replace_emojis(text)
+                tokens = text.split()
+                lengths[row] = len(tokens)
+                exclamations[row] = text.count('!')
+                questions[row] = text.count('?')
+                flat.extend(tokens)
+
+        with self.metrics.stage('lexicon'):
+            vocab = {token: i for i, token in enumerate(dict.fromkeys(flat))}
+            props = [self._properties(token) for token in vocab]
+            columns = list(zip(*props)) if props else [()] * 7
+            table = {
+                'valence': np.array(columns[0], dtype=np.float64),
+                'in_lexicon': np.array(columns[1], dtype=bool),
+                'booster': np.array(columns[2], dtype=np.float64),
+                'is_booster': np.array(columns[3], dtype=bool),
+                'upper': np.array(columns[4], dtype=bool),
+                'negation': np.array(columns[5], dtype=bool),
+                'code': np.array(columns[6], dtype=np.int16),
+            }
+            ids = np.fromiter(map(vocab.__getitem__, flat), dtype=np.int64, count=len(flat))
+            tokens = {name: column[ids] for name, column in table.items()}
+        if self.metrics.enabled:
+            self.metrics.count('tokens', len(flat))
+            self.metrics.count('lexicon_hits', int(tokens['in_lexicon'].sum()))
+        return tokens, lengths, exclamations, questions
+
+    def score_batch(self, texts):
+        """Score a list of reviews, returning neg/neu/pos/compound arrays"""
+        texts = list(texts)
+        tokens, lengths, exclamations, questions = self._tokenize(texts)
+        with self.metrics.stage('rules'):
+            sentiments = self._token_sentiments(tokens, lengths)
+        with self.metrics.stage('valence'):
+            return self._score_valence(sentiments, lengths, exclamations, questions)
+
+    def _token_sentiments(self, tokens, lengths):
+        """Apply VADER's per-token rules to every token of the batch at once"""
+        num_tokens = int(lengths.sum())
+        starts = np.cumsum(lengths) - lengths
+        review = np.repeat(np.arange(len(lengths)), lengths)
+        position = np.arange(num_tokens) - starts[review]
+        review_length = lengths[review]
+
+        upper = tokens['upper']
+        code = tokens['code']
+        in_lexicon = tokens['in_lexicon']
+        cap_count = np.bincount(review, weights=upper, minlength=len(lengths))
+        cap_diff = ((cap_count > 0) & (cap_count < lengths))[review]
+
+        def neighbour(values, candidates, offset, fill):
+            target = position[candidates] + offset
+            valid = (target >= 0) & (target < review_length[candidates])
+            return np.where(valid, values[np.where(valid, candidates + offset, candidates)], fill)
+
+        every = np.arange(num_tokens)
+        kind_of = (code == KIND) & (neighbour(code, every, 1, 0) == OF)
+        candidates = np.flatnonzero(in_lexicon & ~tokens['is_booster'] & ~kind_of)
+
+        codes = {offset: neighbour(code, candidates, offset, 0) for offset in range(-3, 3)}
+        lexicon_hit = {offset: neighbour(in_lexicon, candidates, offset, False)
+                       for offset in (-3, -2, -1, 1)}
+        pos = position[candidates]
+        caps = cap_diff[candidates]
+        base = tokens['valence'][candidates]
+        valence = base.copy()
+
+        # "no" as a negation of the next lexicon word rather than its own item
+        valence[(codes[0] == NO) & lexicon_hit[1]] = 0.0
+        negated_by_no = ((codes[-1] == NO) | (codes[-2] == NO) |
+                         ((codes[-3] == NO) & np.isin(codes[-1], (OR, NOR))))
+        valence = np.where(negated_by_no, base * N_SCALAR, valence)
+
+        # ALL CAPS emphasis when only some words are capitalized
+        shouted = upper[candidates] & caps
+        valence = np.where(shouted, np.where(valence > 0, valence + C_INCR, valence - C_INCR), valence)
+
+        for start_i in range(3):
+            offset = -(start_i + 1)
+            active = (pos > start_i) & ~lexicon_hit[offset]
+            booster = neighbour(tokens['booster'], candidates, offset, 0.0)
+            scalar = np.where(valence < 0, booster * -1, booster)
+            loud = (neighbour(tokens['is_booster'], candidates, offset, False) &
+                    neighbour(upper, candidates, offset, False) & caps)
+            scalar = np.where(loud, np.where(valence > 0, scalar + C_INCR, scalar - C_INCR), scalar)
+            if start_i == 1:
+                scalar = np.where(scalar != 0, scalar * 0.95, scalar)
+            elif start_i == 2:
+                scalar = np.where(scalar != 0, scalar * 0.9, scalar)
+            valence = np.where(active, valence + scalar, valence)
+
+            negation = neighbour(tokens['negation'], candidates, offset, False)
+            if start_i == 0:
+                valence = np.where(active & negation, valence * N_SCALAR, valence)
+            elif start_i == 1:
+                emphasis = (codes[-2] == NEVER) & np.isin(codes[-1], (SO, THIS))
+                no_doubt = (codes[-2] == WITHOUT) & (codes[-1] == DOUBT)
+                valence = np.where(active & emphasis, valence * 1.25, valence)
+                valence = np.where(active & ~emphasis & ~no_doubt & negation, valence * N_SCALAR, valence)
+            else:
+                emphasis = (((codes[-3] == NEVER) & np.isin(codes[-2], (SO, THIS))) |
+                            np.isin(codes[-1], (SO, THIS)))
+                no_doubt = (codes[-3] == WITHOUT) & ((codes[-2] == DOUBT) | (codes[-1] == DOUBT))
+                valence = np.where(active & emphasis, valence * 1.25, valence)
+                valence = np.where(active & ~emphasis & ~no_doubt & negation, valence * N_SCALAR, valence)
+                valence = self._special_idioms(valence, codes, active)
+
+        # "least" as a negation, except in "at least" / "very least"
+        least = ~lexicon_hit[-1] & (codes[-1] == LEAST)
+        negated_by_least = least & (pos > 0) & ((pos == 1) | ~np.isin(codes[-2], (AT, VERY)))
+        valence = np.where(negated_by_least, valence * N_SCALAR, valence)
+
+        sentiments = np.zeros(num_tokens, dtype=np.float64)
+        sentiments[candidates] = valence
+        return self._but_check(sentiments, code, review, position, starts, lengths)
+
+    @staticmethod
+    def _phrase_match(codes, offsets, phrase):
+        words = phrase.split()
+        if len(words) != len(offsets):
+            return None
+        match = np.ones(len(codes[0]), dtype=bool)
+        for offset, word in zip(offsets, words):
+            match &= codes[offset] == WORD_CODES[word]
+        return match
+
+    def _special_idioms(self, valence, codes, active):
+        """Idiom and booster phrase overrides around each lexicon word"""
+        special = np.full(len(valence), np.nan)
+        for offsets in ((-1, 0), (-2, -1, 0), (-2, -1), (-3, -2, -1), (-3, -2)):
+            for phrase, value in PHRASES.items():
+                match = self._phrase_match(codes, offsets, phrase)
+                if match is not None:
+                    special[match & np.isnan(special)] = value
+        for offsets in ((0, 1), (0, 1, 2)):
+            for phrase, value in PHRASES.items():
+                match = self._phrase_match(codes, offsets, phrase)
+                if match is not None:
+                    special[match] = value
+        valence = np.where(active & ~np.isnan(special), special, valence)
+        for offsets in ((-3, -2, -1), (-3, -2), (-2, -1)):
+            for phrase, value in BOOSTER_PHRASES.items():
+                match = self._phrase_match(codes, offsets, phrase)
+                if match is not None:
+                    valence = np.where(active & match, valence + value, valence)
+        return valence
+
+    @staticmethod
+    def _but_check(sentiments, code, review, position, starts, lengths):
+        """Dampen sentiment before the first 'but' and boost it after"""
+        but_tokens = np.flatnonzero(code == BUT)
+        if not len(but_tokens):
+            return sentiments
+        but_reviews, first = np.unique(review[but_tokens], return_index=True)
+        but_position = np.full(len(lengths), -1)
+        but_position[but_reviews] = position[but_tokens[first]]
+
+        token_but = but_position[review]
+        before = (token_but >= 0) & (position < token_but)
+        after = (token_but >= 0) & (position > token_but)
+        adjusted = np.where(before, sentiments * 0.5, np.where(after, sentiments * 1.5, sentiments))
+
+        # VADER locates each value with list.index(), so reviews where a value
+        # repeats across positions are replayed with the sequential rule
+        in_scope = np.flatnonzero((token_but >= 0) & (sentiments != 0))
+        values = np.concatenate([sentiments[in_scope], adjusted[in_scope]])
+        owners = np.concatenate([review[in_scope], review[in_scope]])
+        places = np.concatenate([in_scope, in_scope])
+        order = np.lexsort((values, owners))
+        values, owners, places = values[order], owners[order], places[order]
+        clash = (values[1:] == values[:-1]) & (owners[1:] == owners[:-1]) & (places[1:] != places[:-1])
+
+        for row in np.unique(owners[1:][clash]):
+            start, end = starts[row], starts[row] + lengths[row]
+            adjusted[start:end] = _sequential_but_check(sentiments[start:end].tolist(), but_position[row])
+        return adjusted
+
+    @staticmethod
+    def _score_valence(sentiments, lengths, exclamations, questions):
+        """Reduce token sentiments to VADER's neg/neu/pos/compound per review"""
+        count = len(lengths)
+        parts = np.stack([
+            sentiments,
+            np.where(sentiments > 0, sentiments + 1, 0.0),
+            np.where(sentiments < 0, sentiments - 1, 0.0),
+        ], axis=1)
+        # Accumulate column by column in token order so every per-review sum
+        # is added in the same sequence as VADER's Python loop
+        order = np.argsort(-lengths, kind='stable')
+        sorted_lengths = lengths[order]
+        sorted_starts = (np.cumsum(lengths) - lengths)[order]
+        totals = np.zeros((count, 3), dtype=np.float64)
+        max_length = int(sorted_lengths[0]) if count else 0
+        for j in range(max_length):
+            active = int(np.searchsorted(-sorted_lengths, -j, side='left'))
+            totals[:active] += parts[sorted_starts[:active] + j]
+        sums = np.empty_like(totals)
+        sums[order] = totals
+        sum_s, pos_sum, neg_sum = sums[:, 0], sums[:, 1], sums[:, 2]
+        neu_count = np.bincount(np.repeat(np.arange(count), lengths), weights=sentiments == 0,
+                                minlength=count)
+
+        ep_amplifier = np.minimum(exclamations, 4) * 0.292
+        qm_amplifier = np.where(questions > 1, np.where(questions <= 3, questions * 0.18, 0.96), 0.0)
+        amplifier = ep_amplifier + qm_amplifier
+
+        sum_s = np.where(sum_s > 0, sum_s + amplifier, np.where(sum_s < 0, sum_s - amplifier, sum_s))
+        compound = np.clip(sum_s / np.sqrt(sum_s * sum_s + 15), -1.0, 1.0)
+
+        pos_wins = pos_sum > np.fabs(neg_sum)
+        neg_wins = pos_sum < np.fabs(neg_sum)
+        pos_sum = np.where(pos_wins, pos_sum + amplifier, pos_sum)
+        neg_sum = np.where(neg_wins, neg_sum - amplifier, neg_sum)
+        total = pos_sum + np.fabs(neg_sum) + neu_count
+
+        scored = lengths > 0
+        safe_total = np.where(scored, total, 1.0)
+        zero = np.zeros(count)
+        return {
+            'neg': _round_half(np.where(scored, np.fabs(neg_sum / safe_total), zero), 3),
+            'neu': _round_half(np.where(scored, np.fabs(neu_count / safe_total), zero), 3),
+            'pos': _round_half(np.where(scored, np.fabs(pos_sum / safe_total), zero), 3),
+            'compound': _round_half(np.where(scored, compound, zero), 4),
+        }
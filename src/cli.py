@@ -0,0 +1,243 @@
+"""Headless batch sentiment analysis of review files.
+
+Run with `python -m src.cli reviews.jsonl [more files] [--output results.csv]`.
+
+Every input is streamed in chunks; per-review results are written in bulk
+to JSONL, CSV, Parquet or Arrow IPC (`--output -` writes JSONL to stdout)
+and a summary is printed at the end. Parquet and Arrow results files are
+also accepted as inputs: they are memory-mapped and filtered by label or
+compound range without re-scoring. Heavy modules load only once arguments
+are parsed, and nothing here imports streamlit, pandas or plotly.
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+
+INPUT_FORMATS = ('json', 'jsonl', 'ndjson', 'csv', 'txt')
+OUTPUT_FORMATS = ('jsonl', 'csv', 'parquet', 'arrow')
+# Suffixes of scored results files (src.analyzer.columnar.COLUMNAR_FORMATS)
+COLUMNAR_SUFFIXES = {'parquet': 'parquet', 'arrow': 'arrow', 'feather': 'arrow', 'ipc': 'arrow'}
+SENTIMENTS = ('positive', 'neutral', 'negative')
+# Reviews of a results file copied to the output at a time
+WRITE_CHUNK = 10000
+OUTPUT_FIELDS = ('source', 'row', 'sentiment', 'compound', 'pos', 'neu', 'neg', 'text')
+
+
+def output_format(path, fmt=None):
+    """Output format from --output-format or the output path's suffix"""
+    if fmt is not None:
+        return fmt
+    suffix = os.path.splitext(path)[1].lstrip('.').lower()
+    if path == '-' or suffix in ('jsonl', 'ndjson'):
+        return 'jsonl'
+    if suffix == 'csv':
+        return 'csv'
+    if suffix in COLUMNAR_SUFFIXES:
+        return COLUMNAR_SUFFIXES[suffix]
+    raise ValueError(f"Cannot tell the output format of '{path}'; use --output-format")
+
+
+def is_results_file(path):
+    return os.path.splitext(path)[1].lstrip('.').lower() in COLUMNAR_SUFFIXES
+
+
+class ResultWriter:
+    """Writes one chunk of per-review results at a time as JSONL or CSV"""
+
+    def __init__(self, out, fmt):
+        self.out = out
+        self.fmt = fmt
+        self.csv = None
+        if fmt == 'csv':
+            self.csv = csv.writer(out)
+            self.csv.writerow(OUTPUT_FIELDS)
+
+    def write(self, source, rows, chunk, scores, labels):
+        from src.analyzer.vectorized import LABELS
+
+        rows = zip(rows.tolist(), [LABELS[code] for code in labels.tolist()],
+                   *(scores[key].tolist() for key in ('compound', 'pos', 'neu', 'neg')), chunk)
+        if self.csv is not None:
+            self.csv.writerows((source, *row) for row in rows)
+            return
+        dumps = json.dumps
+        self.out.write(''.join(
+            dumps(dict(zip(OUTPUT_FIELDS, (source, *row))), ensure_ascii=False) + '\n'
+            for row in rows))
+
+
+class ColumnarResultWriter:
+    """Writes per-review results to a Parquet or Arrow IPC results file"""
+
+    def __init__(self, path, fmt, source=None):
+        from src.analyzer.columnar import ColumnarWriter
+
+        self.writer = ColumnarWriter(path, fmt, source=source)
+
+    def write(self, source, rows, chunk, scores, labels):
+        self.writer.write(chunk, scores, labels, rows)
+
+    def close(self):
+        self.writer.close()
+
+
+def format_summary(name, summary):
+    """Counts, shares, mean and spread of one SentimentSummary as text lines"""
+    if not summary.count:
+        return [f'{name}: no reviews']
+    shares = summary.percentages()
+    distribution = summary.distribution()
+    counts = ', '.join(f'{label} {summary.counts[label]:,} ({shares[label]:.1f}%)'
+                       for label in summary.counts)
+    return [
+        f'{name}: {summary.count:,} reviews',
+        f'  {counts}',
+        f"  mean compound {summary.average_scores['compound']:+.4f}, "
+        f"p10/p50/p90 {distribution['p10']:+.2f}/{distribution['p50']:+.2f}/"
+        f"{distribution['p90']:+.2f}, polarization {distribution['polarization']:.0%}",
+    ]
+
+
+def summary_dict(summary):
+    return {
+        'reviews': summary.count,
+        'counts': dict(summary.counts),
+        'average_scores': summary.average_scores,
+        'distribution': summary.distribution(),
+    }
+
+
+def load_results(path, args, writer=None):
+    """Summary of a results file, filtered by the arguments, without re-scoring
+
+    The kept reviews are copied to writer, if one is given.
+    """
+    import numpy as np
+    from src.analyzer.columnar import read_results
+    from src.analyzer.results import SCORE_DECIMALS
+
+    results = read_results(path, args.sentiment, args.min_compound, args.max_compound).results
+    if writer is not None and results.total:
+        try:
+            results.text(0)
+        except LookupError:
+            raise ValueError(f"'{path}' was written without review text, "
+                             'so its reviews cannot be copied to --output') from None
+    if writer is not None:
+        for start in range(0, results.total, WRITE_CHUNK):
+            stop = min(start + WRITE_CHUNK, results.total)
+            # Stored float32 scores go out with the decimals VADER gave them
+            scores = {key: np.round(getattr(results, key)[start:stop].astype(np.float64), decimals)
+                      for key, decimals in SCORE_DECIMALS.items()}
+            writer.write(path, results.index[start:stop],
+                         [results.text(row) for row in range(start, stop)],
+                         scores, results.labels[start:stop])
+    return results.summary()
+
+
+def run(args, stdout=None):
+    """Analyze every input of parsed arguments; returns the per-input and total summaries
+
+    `--output -` writes to stdout, sys.stdout unless another stream is given.
+    """
+    import numpy as np
+    from src.analyzer.summary import SentimentSummary
+    from src.utils.ingestion import FORMAT_ALIASES, iter_reviews
+
+    stdout = stdout if stdout is not None else sys.stdout
+    writer = out = analyzer = None
+    if args.output:
+        fmt = output_format(args.output, args.output_format)
+        if fmt in ('parquet', 'arrow'):
+            writer = ColumnarResultWriter(args.output, fmt, args.inputs[0])
+        else:
+            out = stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8', newline='')
+            writer = ResultWriter(out, fmt)
+    fmt = FORMAT_ALIASES.get(args.format, args.format)
+    summaries = {}
+    try:
+        for path in args.inputs:
+            if is_results_file(path):
+                summaries[path] = load_results(path, args, writer)
+                continue
+            if analyzer is None:
+                from src.analyzer.sentiment_analyzer import ProductSentimentAnalyzer
+                analyzer = ProductSentimentAnalyzer(engine=args.engine, workers=args.workers,
+                                                    compiled_lexicon=args.compiled_lexicon)
+            reviews = iter_reviews(path, fmt=fmt, review_column=args.review_column,
+                                   json_key=args.json_key)
+            stream = analyzer.analyze_stream(reviews)
+            for chunk, scores, labels in stream.chunks():
+                if writer is not None:
+                    rows = np.arange(stream.count - len(chunk), stream.count)
+                    writer.write(path, rows, chunk, scores, labels)
+            summaries[path] = stream.sentiment_summary
+    finally:
+        if analyzer is not None:
+            analyzer.close()
+        if isinstance(writer, ColumnarResultWriter):
+            writer.close()
+        if out is not None and out is not stdout:
+            out.close()
+    return summaries, SentimentSummary.merged(summaries.values())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('inputs', nargs='+', metavar='PATH',
+                        help='review files: JSON, JSONL, CSV or TXT, optionally .gz/.zst; '
+                             'or .parquet/.arrow results files, loaded without re-scoring')
+    parser.add_argument('--format', choices=INPUT_FORMATS,
+                        help='input format (default: from each file name)')
+    parser.add_argument('--review-column', help='CSV column or JSON field holding the review')
+    parser.add_argument('--json-key', default='comments', help='key of the review array in JSON files')
+    parser.add_argument('--output', '-o', help="per-review results file, or '-' for stdout")
+    parser.add_argument('--output-format', choices=OUTPUT_FORMATS,
+                        help='default: from the --output suffix')
+    parser.add_argument('--engine', choices=('vader', 'vectorized'), default='vectorized')
+    parser.add_argument('--compiled-lexicon')
+    parser.add_argument('--workers', type=int, default=1, help='scoring processes')
+    parser.add_argument('--summary-json', action='store_true',
+                        help='print the summary as JSON instead of text')
+    filters = parser.add_argument_group('results file filters')
+    filters.add_argument('--sentiment', action='append', choices=SENTIMENTS,
+                         help='keep reviews with this label (repeatable)')
+    filters.add_argument('--min-compound', type=float, help='keep reviews scoring at least this')
+    filters.add_argument('--max-compound', type=float, help='keep reviews scoring at most this')
+    args = parser.parse_args(argv)
+    if args.output:
+        try:
+            fmt = output_format(args.output, args.output_format)
+        except ValueError as e:
+            parser.error(str(e))
+        if fmt in ('parquet', 'arrow') and len(args.inputs) > 1:
+            parser.error('Parquet and Arrow output takes a single input')
+    filtered = args.sentiment or args.min_compound is not None or args.max_compound is not None
+    if filtered and not all(is_results_file(path) for path in args.inputs):
+        parser.error('--sentiment, --min-compound and --max-compound filter .parquet/.arrow results files')
+
+    # With results on stdout, the summary goes to stderr
+    report = sys.stderr if args.output == '-' else sys.stdout
+    try:
+        summaries, total = run(args)
+    except (OSError, ValueError, LookupError, ImportError) as e:
+        print(f'error: {e}', file=sys.stderr)
+        return 1
+    if args.summary_json:
+        payload = {'inputs': {path: summary_dict(summary) for path, summary in summaries.items()},
+                   'total': summary_dict(total)}
+        print(json.dumps(payload, indent=2), file=report)
+        return 0
+    lines = []
+    for path, summary in summaries.items():
+        lines += format_summary(path, summary)
+    if len(summaries) > 1:
+        lines += format_summary('total', total)
+    print('\n'.join(lines), file=report)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,32 @@
+import os
+
+# Local directory for verified lexicon files and derived artifacts
+LEXICON_DIR = os.environ.get(
+    'NLP_LEXICON_DIR',
+    os.path.join(os.path.expanduser('~'), '.cache', 'nlp-product-review', 'lexicons'),
+)
+
+# Watermarks and aggregate state of incrementally analyzed review files
+INCREMENTAL_STATE_DIR = os.environ.get(
+    'NLP_INCREMENTAL_STATE_DIR',
+    os.path.join(os.path.expanduser('~'), '.cache', 'nlp-product-review', 'incremental'),
+)
+
+# Scored results saved by the dashboard and listed in its Saved Results view
+RESULTS_DIR = os.environ.get(
+    'NLP_RESULTS_DIR',
+    os.path.join(os.path.expanduser('~'), '.cache', 'nlp-product-review', 'results'),
+)
+
+# Last good admin UI customizations, served on cold starts before the API answers
+CUSTOMIZATION_CACHE_PATH = os.environ.get(
+    'NLP_CUSTOMIZATION_CACHE',
+    os.path.join(os.path.expanduser('~'), '.cache', 'nlp-product-review', 'customizations.json'),
+)
+
+# Network downloads of lexicon data only happen when explicitly enabled
+ALLOW_LEXICON_DOWNLOAD = os.environ.get('NLP_LEXICON_ALLOW_DOWNLOAD') == '1'
+
+# Bind address of the HTTP scoring service (python -m src.service.server)
+SERVICE_HOST = os.environ.get('NLP_SERVICE_HOST', '127.0.0.1')
+SERVICE_PORT = int(os.environ.get('NLP_SERVICE_PORT', '8080'))
@@ -0,0 +1,167 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from src.analyzer.vectorized import LABELS, SCORE_KEYS, label_codes
+
+
+class ServiceOverloaded(RuntimeError):
+    """The scoring queue is full; the caller should retry later"""
+
+
+class _Job:
+    """Reviews from one request and the future their results go to"""
+
+    __slots__ = ('texts', 'future')
+
+    def __init__(self, texts, future):
+        self.texts = texts
+        self.future = future
+
+
+class MicroBatcher:
+    """Groups concurrent scoring requests into batches for a worker pool
+
+    A batch is flushed when it holds max_batch_size reviews or its first
+    job has waited max_wait seconds. At most max_queue jobs wait for a
+    batch and one batch is scored at a time; beyond that submit raises
+    ServiceOverloaded instead of queueing without bound. Batches always go
+    through the analyzer, so its cache, dedup and metrics apply.
+    """
+
+    def __init__(self, analyzer, workers=1, max_batch_size=256, max_wait=0.005, max_queue=1024):
+        """workers > 1 splits every batch over the analyzer's process pool (see its workers)"""
+        self.analyzer = analyzer
+        self.workers = workers
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.max_queue = max_queue
+        self.batches = 0
+        self.scored = 0
+        self.rejected = 0
+        self._queue = None
+        self._slots = None
+        self._collector = None
+        self._executor = None
+        self._score = None
+        self._running = set()
+        # Jobs taken off the queue that no batch has been started for yet
+        self._held = []
+
+    async def start(self):
+        if self._collector is not None:
+            return
+        # One thread owns the analyzer: its cache and dedup index are not thread-safe
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='scoring')
+        self._score = self.analyzer.score_on_pool if self.workers > 1 else self.analyzer.score_batch
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._slots = asyncio.Semaphore(1)
+        self._collector = asyncio.create_task(self._collect())
+
+    async def close(self):
+        if self._collector is None:
+            return
+        self._collector.cancel()
+        try:
+            await self._collector
+        except asyncio.CancelledError:
+            pass
+        # Let the batch being scored finish, then fail every job still waiting
+        await self._slots.acquire()
+        self._executor.shutdown()
+        if self.workers > 1:
+            self.analyzer.close()
+        self._collector = None
+        pending = self._held
+        self._held = []
+        while not self._queue.empty():
+            pending.append(self._queue.get_nowait())
+        for job in pending:
+            if not job.future.done():
+                job.future.set_exception(ServiceOverloaded('The scoring service is shutting down'))
+
+    def stats(self):
+        return {
+            'queued': self._queue.qsize() if self._queue is not None else 0,
+            'max_queue': self.max_queue,
+            'batches': self.batches,
+            'scored': self.scored,
+            'rejected': self.rejected,
+            'mean_batch_size': self.scored / self.batches if self.batches else 0.0,
+        }
+
+    async def submit(self, texts):
+        """analyze_review-shaped results for a list of reviews"""
+        if self._collector is None:
+            await self.start()
+        if not texts:
+            return []
+        job = _Job(texts, asyncio.get_running_loop().create_future())
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            self.rejected += 1
+            raise ServiceOverloaded(f'{self.max_queue} requests already waiting') from None
+        return await job.future
+
+    async def _collect(self):
+        loop = asyncio.get_running_loop()
+        carried = None
+        while True:
+            job = carried or await self._queue.get()
+            carried = None
+            jobs, size = [job], len(job.texts)
+            self._held = [job]
+            deadline = loop.time() + self.max_wait
+            while size < self.max_batch_size:
+                timeout = deadline - loop.time()
+                try:
+                    if timeout > 0:
+                        job = await asyncio.wait_for(self._queue.get(), timeout)
+                    else:
+                        job = self._queue.get_nowait()
+                except (asyncio.TimeoutError, asyncio.QueueEmpty):
+                    break
+                self._held.append(job)
+                if size + len(job.texts) > self.max_batch_size:
+                    # Keep batches bounded; the job opens the next batch
+                    carried = job
+                    break
+                jobs.append(job)
+                size += len(job.texts)
+            # Hold a worker slot before taking more from the queue, so a busy
+            # pool pushes back on the queue instead of piling up batches
+            await self._slots.acquire()
+            self._held = [carried] if carried is not None else []
+            task = asyncio.create_task(self._run(jobs))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _run(self, jobs):
+        texts = [text for job in jobs for text in job.texts]
+        try:
+            scores = await asyncio.get_running_loop().run_in_executor(
+                self._executor, self._score, texts
+            )
+        except Exception as e:
+            for job in jobs:
+                if not job.future.done():
+                    job.future.set_exception(e)
+            return
+        finally:
+            self._slots.release()
+        self.batches += 1
+        self.scored += len(texts)
+        columns = [scores[key].tolist() for key in SCORE_KEYS]
+        labels = label_codes(scores['compound']).tolist()
+        row = 0
+        for job in jobs:
+            results = []
+            for text in job.texts:
+                results.append({
+                    'text': text,
+                    'scores': {key: column[row] for key, column in zip(SCORE_KEYS, columns)},
+                    'sentiment': LABELS[labels[row]],
+                })
+                row += 1
+            if not job.future.done():
+                job.future.set_result(results)
@@ -0,0 +1,220 @@
+"""Asyncio HTTP scoring service around ProductSentimentAnalyzer.
+
+Run with `python -m src.service.server [--port 8080] [--workers 4]`.
+
+    GET  /health                 queue and batching counters
+    GET  /metrics                analyzer metrics in Prometheus text format
+    POST /v1/analyze             {"text": "..."} -> analyze_review result
+    POST /v1/analyze/batch       {"reviews": [...]} -> {"results": [...], "counts": {...}}
+"""
+import argparse
+import asyncio
+import json
+from collections import namedtuple
+from http import HTTPStatus
+
+from src.analyzer.metrics import Metrics
+from src.analyzer.sentiment_analyzer import ENGINES, ProductSentimentAnalyzer
+from src.analyzer.vectorized import LABELS
+from src.config.settings import SERVICE_HOST, SERVICE_PORT
+from src.service.batching import MicroBatcher, ServiceOverloaded
+
+Response = namedtuple('Response', ['status', 'json'])
+
+
+class RequestError(Exception):
+    """Client error answered with the given HTTP status"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class ScoringService:
+    """Routes requests to a MicroBatcher; transport-independent so it can be called in-process"""
+
+    def __init__(self, analyzer=None, workers=1, max_batch_size=256, max_wait=0.005,
+                 max_queue=1024, max_request_reviews=10000, max_body_bytes=8 << 20):
+        self.analyzer = analyzer or ProductSentimentAnalyzer(engine='vectorized', workers=workers)
+        self.batcher = MicroBatcher(self.analyzer, workers, max_batch_size, max_wait, max_queue)
+        self.max_request_reviews = max_request_reviews
+        self.max_body_bytes = max_body_bytes
+        self.routes = {
+            ('GET', '/health'): self._health,
+            ('GET', '/metrics'): self._metrics,
+            ('POST', '/v1/analyze'): self._analyze,
+            ('POST', '/v1/analyze/batch'): self._analyze_batch,
+        }
+
+    async def start(self):
+        await self.batcher.start()
+
+    async def close(self):
+        await self.batcher.close()
+
+    async def handle(self, method, path, body=b''):
+        """(status, payload) for one request; str payloads are sent as plain text"""
+        path = path.split('?', 1)[0]
+        route = self.routes.get((method, path))
+        try:
+            if route is None:
+                if any(known == path for _, known in self.routes):
+                    raise RequestError(HTTPStatus.METHOD_NOT_ALLOWED, f'{method} not allowed')
+                raise RequestError(HTTPStatus.NOT_FOUND, f'No route for {path}')
+            if len(body) > self.max_body_bytes:
+                raise RequestError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, 'Request body too large')
+            return HTTPStatus.OK, await route(body)
+        except RequestError as e:
+            return e.status, {'error': str(e)}
+        except ServiceOverloaded as e:
+            return HTTPStatus.SERVICE_UNAVAILABLE, {'error': f'Service overloaded: {e}'}
+
+    @staticmethod
+    def _json(body):
+        try:
+            return json.loads(body or b'null')
+        except ValueError:
+            raise RequestError(HTTPStatus.BAD_REQUEST, 'Body is not valid JSON') from None
+
+    async def _health(self, body):
+        return {'status': 'ok', 'engine': self.analyzer.engine, **self.batcher.stats()}
+
+    async def _metrics(self, body):
+        return self.analyzer.metrics.to_prometheus()
+
+    async def _analyze(self, body):
+        payload = self._json(body)
+        if not isinstance(payload, dict) or not isinstance(payload.get('text'), str):
+            raise RequestError(HTTPStatus.BAD_REQUEST, 'Expected {"text": "<review>"}')
+        return (await self.batcher.submit([payload['text']]))[0]
+
+    async def _analyze_batch(self, body):
+        payload = self._json(body)
+        reviews = payload.get('reviews') if isinstance(payload, dict) else None
+        if not isinstance(reviews, list) or not all(isinstance(r, str) for r in reviews):
+            raise RequestError(HTTPStatus.BAD_REQUEST, 'Expected {"reviews": ["<review>", ...]}')
+        if len(reviews) > self.max_request_reviews:
+            raise RequestError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                               f'At most {self.max_request_reviews} reviews per request')
+        results = await self.batcher.submit(reviews)
+        counts = dict.fromkeys(LABELS, 0)
+        for result in results:
+            counts[result['sentiment']] += 1
+        return {'results': results, 'counts': counts}
+
+    async def _connection(self, reader, writer):
+        """Serve HTTP/1.1 requests on one connection, with keep-alive"""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                try:
+                    method, target, version = request_line.decode('latin-1').split()
+                except ValueError:
+                    await self._respond(writer, HTTPStatus.BAD_REQUEST, {'error': 'Bad request'}, False)
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                keep_alive = (version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close')
+                if 'chunked' in headers.get('transfer-encoding', ''):
+                    await self._respond(writer, HTTPStatus.LENGTH_REQUIRED,
+                                        {'error': 'Send a Content-Length'}, False)
+                    break
+                length = int(headers.get('content-length') or 0)
+                if length > self.max_body_bytes:
+                    await self._respond(writer, HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                                        {'error': 'Request body too large'}, False)
+                    break
+                body = await reader.readexactly(length) if length else b''
+                status, payload = await self.handle(method, target, body)
+                await self._respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _respond(writer, status, payload, keep_alive):
+        if isinstance(payload, str):
+            body, content_type = payload.encode(), 'text/plain; version=0.0.4'
+        else:
+            body, content_type = json.dumps(payload).encode(), 'application/json'
+        head = [f'HTTP/1.1 {status.value} {status.phrase}',
+                f'Content-Type: {content_type}',
+                f'Content-Length: {len(body)}',
+                f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+        if status == HTTPStatus.SERVICE_UNAVAILABLE:
+            head.append('Retry-After: 1')
+        writer.write(('\r\n'.join(head) + '\r\n\r\n').encode('latin-1') + body)
+        await writer.drain()
+
+    async def serve(self, host=SERVICE_HOST, port=SERVICE_PORT):
+        """asyncio.Server accepting HTTP connections; the batcher is started first"""
+        await self.start()
+        return await asyncio.start_server(self._connection, host, port)
+
+
+class InProcessClient:
+    """Calls a ScoringService directly, with the same JSON encoding as over HTTP"""
+
+    def __init__(self, service):
+        self.service = service
+
+    async def request(self, method, path, payload=None):
+        body = json.dumps(payload).encode() if payload is not None else b''
+        status, result = await self.service.handle(method, path, body)
+        if not isinstance(result, str):
+            result = json.loads(json.dumps(result))
+        return Response(int(status), result)
+
+    async def get(self, path):
+        return await self.request('GET', path)
+
+    async def post(self, path, payload):
+        return await self.request('POST', path, payload)
+
+
+async def _serve_forever(service, host, port):
+    server = await service.serve(host, port)
+    print(f'Scoring service listening on http://{host}:{port}')
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default=SERVICE_HOST)
+    parser.add_argument('--port', type=int, default=SERVICE_PORT)
+    parser.add_argument('--engine', choices=ENGINES, default='vectorized')
+    parser.add_argument('--compiled-lexicon')
+    parser.add_argument('--workers', type=int, default=1, help='scoring processes (1 = a thread)')
+    parser.add_argument('--max-batch-size', type=int, default=256)
+    parser.add_argument('--max-wait-ms', type=float, default=5.0)
+    parser.add_argument('--max-queue', type=int, default=1024)
+    parser.add_argument('--metrics', action='store_true',
+                        help='record stage timings and histograms for GET /metrics')
+    args = parser.parse_args(argv)
+    analyzer = ProductSentimentAnalyzer(engine=args.engine, workers=args.workers,
+                                        compiled_lexicon=args.compiled_lexicon,
+                                        metrics=Metrics() if args.metrics else None)
+    service = ScoringService(analyzer, args.workers, args.max_batch_size,
+                             args.max_wait_ms / 1000, args.max_queue)
+    try:
+        asyncio.run(_serve_forever(service, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
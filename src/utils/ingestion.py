@@ -0,0 +1,422 @@
+import csv
+import io
+import json
+import os
+from functools import partial
+from itertools import chain
+
+from src.analyzer.streaming import iter_chunks
+
+FORMATS = ('json', 'jsonl', 'csv', 'txt')
+FORMAT_ALIASES = {'ndjson': 'jsonl'}
+COMPRESSED_SUFFIXES = {'.gz': 'gzip', '.gzip': 'gzip', '.zst': 'zstd', '.zstd': 'zstd'}
+GZIP_MAGIC = b'\x1f\x8b'
+ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+# Object fields tried, in order, when JSON/JSONL records are objects
+REVIEW_FIELDS = ('review', 'text', 'comment', 'body')
+READ_SIZE = 1 << 16
+
+
+def detect_format(name):
+    """Review format from a file name, ignoring any compression suffix"""
+    base, suffix = os.path.splitext(name.lower())
+    if suffix in COMPRESSED_SUFFIXES:
+        base, suffix = os.path.splitext(base)
+    fmt = FORMAT_ALIASES.get(suffix.lstrip('.'), suffix.lstrip('.'))
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported file format '{suffix}'. Use JSON, JSONL, CSV or TXT, "
+                         'optionally gzip or zstd compressed.')
+    return fmt
+
+
+def _peek(stream, size):
+    if hasattr(stream, 'peek'):
+        return stream.peek(size)[:size]
+    head = stream.read(size)
+    stream.seek(-len(head), io.SEEK_CUR)
+    return head
+
+
+def open_binary(stream):
+    """Binary file object transparently decompressed when gzip or zstd"""
+    if not hasattr(stream, 'peek') and not stream.seekable():
+        stream = io.BufferedReader(stream)
+    head = _peek(stream, 4)
+    if head.startswith(GZIP_MAGIC):
+        import gzip
+        return gzip.GzipFile(fileobj=stream)
+    if head.startswith(ZSTD_MAGIC):
+        try:
+            import zstandard
+        except ImportError:
+            raise ImportError('Reading .zst files requires the zstandard package '
+                              '(pip install zstandard)') from None
+        return zstandard.ZstdDecompressor().stream_reader(stream)
+    return stream
+
+
+def _review_from_record(record, review_column):
+    if isinstance(record, str):
+        return record
+    if isinstance(record, dict):
+        fields = (review_column,) if review_column else REVIEW_FIELDS
+        for field in fields:
+            if isinstance(record.get(field), str):
+                return record[field]
+    return None
+
+
+def _iter_txt(text):
+    for line in text:
+        line = line.strip()
+        if line:
+            yield line
+
+
+def _iter_jsonl(text, review_column):
+    for line in text:
+        if line.strip():
+            review = _review_from_record(json.loads(line), review_column)
+            if review is not None:
+                yield review
+
+
+def _iter_csv(text, review_column):
+    reader = csv.reader(text)
+    header = next(reader, None)
+    if header is None:
+        return
+    if review_column is None:
+        index = 0
+    elif review_column in header:
+        index = header.index(review_column)
+    else:
+        raise ValueError(f"Column '{review_column}' not found; columns are {header}")
+    for row in reader:
+        if index < len(row) and row[index].strip():
+            yield row[index]
+
+
+class _JsonArrayReader:
+    """Incremental parser yielding the elements of one JSON array
+
+    The array is either the whole document or the value of a top-level
+    key. Only one element (or one skipped sibling value) is held at a time.
+    """
+
+    def __init__(self, text, key):
+        self.text = text
+        self.key = key
+        self.decoder = json.JSONDecoder()
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self):
+        if self.pos > READ_SIZE:
+            self.buffer = self.buffer[self.pos:]
+            self.pos = 0
+        block = self.text.read(READ_SIZE)
+        if not block:
+            self.eof = True
+        self.buffer += block
+        return bool(block)
+
+    def _next_char(self):
+        """Skip whitespace and return the next character without consuming it"""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos].isspace():
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                return ''
+
+    def _expect(self, chars):
+        char = self._next_char()
+        if char not in chars:
+            raise ValueError(f'Malformed JSON: expected one of {chars!r}, got {char!r}')
+        self.pos += 1
+        return char
+
+    def _value(self):
+        """Decode the next complete JSON value, reading more input as needed"""
+        self._next_char()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            # A number cut at the buffer end can decode early; make sure it ended
+            if end == len(self.buffer) and not self.eof and self._fill():
+                continue
+            self.pos = end
+            return value
+
+    def _elements(self):
+        if self._next_char() == ']':
+            self.pos += 1
+            return
+        while True:
+            yield self._value()
+            if self._expect(',]') == ']':
+                return
+
+    def resume(self):
+        """Elements appended after the end of an array's last element (or its opening bracket)"""
+        char = self._next_char()
+        if char == ']':
+            return
+        if char == ',':
+            self.pos += 1
+        while True:
+            yield self._value()
+            if self._expect(',]') == ']':
+                return
+
+    def __iter__(self):
+        first = self._expect('[{')
+        if first == '[':
+            yield from self._elements()
+            return
+        if self._next_char() != '}':
+            while True:
+                name = self._value()
+                self._expect(':')
+                if name == self.key:
+                    self._expect('[')
+                    yield from self._elements()
+                    return
+                self._value()
+                if self._expect(',}') == '}':
+                    break
+        raise ValueError(f"JSON object has no '{self.key}' key holding the reviews")
+
+
+def _iter_json(text, key, review_column):
+    for record in _JsonArrayReader(text, key):
+        review = _review_from_record(record, review_column)
+        if review is not None:
+            yield review
+
+
+def _iter_csv_appended(text, header, review_column):
+    return _iter_csv(chain([header], text), review_column)
+
+
+def _iter_json_appended(text, review_column):
+    for record in _JsonArrayReader(text, None).resume():
+        review = _review_from_record(record, review_column)
+        if review is not None:
+            yield review
+
+
+def _is_path(source):
+    return isinstance(source, (str, os.PathLike))
+
+
+def _read_text(source, fmt, encoding, parse, metrics=None):
+    """Run parse over a text stream of source, leaving caller-owned files open"""
+    raw = open(source, 'rb') if _is_path(source) else source
+    first_byte = raw.tell() if metrics is not None and metrics.enabled else None
+    text = io.TextIOWrapper(open_binary(raw), encoding=encoding,
+                            newline='' if fmt == 'csv' else None)
+    try:
+        yield from parse(text)
+    finally:
+        if first_byte is not None:
+            # Position of the underlying file: compressed bytes for .gz/.zst
+            metrics.count('bytes_read', raw.tell() - first_byte)
+        # Detach so closing the wrapper never closes the caller's file object
+        text.detach()
+        if raw is not source:
+            raw.close()
+
+
+def iter_reviews(source, name=None, fmt=None, review_column=None, json_key='comments',
+                 encoding='utf-8', metrics=None):
+    """Yield reviews one at a time from a path or binary file object
+
+    fmt defaults to the format implied by name (or the path). CSV files
+    use review_column, or the first column when it is None; JSON and JSONL
+    records may be strings or objects holding the review in review_column.
+    A JSON document is either the array of records or an object holding it
+    under json_key; ValueError is raised when that key is missing. An
+    enabled metrics object is charged the bytes read.
+    """
+    if fmt is None:
+        fmt = detect_format(name or os.fspath(source))
+    if fmt == 'txt':
+        parse = _iter_txt
+    elif fmt == 'jsonl':
+        parse = partial(_iter_jsonl, review_column=review_column)
+    elif fmt == 'csv':
+        parse = partial(_iter_csv, review_column=review_column)
+    else:
+        parse = partial(_iter_json, key=json_key, review_column=review_column)
+    return _read_text(source, fmt, encoding, parse, metrics)
+
+
+def _product_row(record, product_column, review_column):
+    """(product id, review) from a JSON object or [product, review] pair, else None"""
+    if isinstance(record, dict):
+        product, review = record.get(product_column), record.get(review_column)
+    elif isinstance(record, list) and len(record) == 2:
+        product, review = record
+    else:
+        return None
+    if product is None or not isinstance(review, str):
+        return None
+    return str(product), review
+
+
+def _iter_product_txt(text):
+    for line in text:
+        product, _, review = line.rstrip('\r\n').partition('\t')
+        if product and review.strip():
+            yield product, review.strip()
+
+
+def _iter_product_jsonl(text, product_column, review_column):
+    for line in text:
+        if line.strip():
+            row = _product_row(json.loads(line), product_column, review_column)
+            if row is not None:
+                yield row
+
+
+def _iter_product_json(text, key, product_column, review_column):
+    for record in _JsonArrayReader(text, key):
+        row = _product_row(record, product_column, review_column)
+        if row is not None:
+            yield row
+
+
+def _iter_product_csv(text, product_column, review_column):
+    reader = csv.reader(text)
+    header = next(reader, None)
+    if header is None:
+        return
+    for column in (product_column, review_column):
+        if column not in header:
+            raise ValueError(f"Column '{column}' not found; columns are {header}")
+    product_index, review_index = header.index(product_column), header.index(review_column)
+    width = max(product_index, review_index)
+    for row in reader:
+        if width < len(row) and row[product_index] and row[review_index].strip():
+            yield row[product_index], row[review_index]
+
+
+def iter_product_reviews(source, name=None, fmt=None, product_column='product_id',
+                         review_column='review', json_key='comments', encoding='utf-8',
+                         metrics=None):
+    """Yield (product id, review) pairs from a path or binary file object
+
+    CSV, JSON and JSONL records name both columns; JSON records may also be
+    [product, review] pairs. TXT lines are `product<TAB>review`. Product
+    ids are returned as strings.
+    """
+    if fmt is None:
+        fmt = detect_format(name or os.fspath(source))
+    if fmt == 'txt':
+        parse = _iter_product_txt
+    elif fmt == 'jsonl':
+        parse = partial(_iter_product_jsonl, product_column=product_column,
+                        review_column=review_column)
+    elif fmt == 'csv':
+        parse = partial(_iter_product_csv, product_column=product_column,
+                        review_column=review_column)
+    else:
+        parse = partial(_iter_product_json, key=json_key, product_column=product_column,
+                        review_column=review_column)
+    return _read_text(source, fmt, encoding, parse, metrics)
+
+
+def iter_review_chunks(source, chunk_size=10000, **options):
+    """Lists of at most chunk_size reviews; see iter_reviews for options"""
+    return iter_chunks(iter_reviews(source, **options), chunk_size)
+
+
+class _Window(io.RawIOBase):
+    """Read-only view of the bytes [start, end) of a seekable binary file"""
+
+    def __init__(self, raw, start, end):
+        self.raw = raw
+        self.position = start
+        self.end = end
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        # Seek every time: the caller may use the file between reads
+        self.raw.seek(self.position)
+        data = self.raw.read(min(len(buffer), self.end - self.position))
+        buffer[:len(data)] = data
+        self.position += len(data)
+        return len(data)
+
+
+def record_end(raw, fmt, size):
+    """Byte offset up to which an uncompressed file holds complete records, or None
+
+    Lines count once they are newline-terminated. For JSON it is the end of
+    the last element of the review array, which must be the last value of
+    the document so that appended elements land between the two.
+    """
+    if fmt == 'json':
+        start = max(0, size - READ_SIZE)
+        raw.seek(start)
+        tail = raw.read(size - start).rstrip()
+        if tail.endswith(b'}'):
+            tail = tail[:-1].rstrip()
+        if not tail.endswith(b']'):
+            return None
+        return start + len(tail[:-1].rstrip())
+    end = size
+    while end > 0:
+        start = max(0, end - READ_SIZE)
+        raw.seek(start)
+        newline = raw.read(end - start).rfind(b'\n')
+        if newline >= 0:
+            return start + newline + 1
+        end = start
+    return 0
+
+
+def iter_reviews_between(raw, start, end, fmt, review_column=None, json_key='comments',
+                         encoding='utf-8', metrics=None):
+    """Reviews of the records in bytes [start, end) of a seekable, uncompressed binary file
+
+    start and end are record_end() offsets. Records after a CSV header keep
+    using it. JSON is read on to the bracket closing the review array.
+    """
+    if fmt == 'json':
+        end = raw.seek(0, io.SEEK_END)
+    if start == 0:
+        window = io.BufferedReader(_Window(raw, 0, end))
+        return iter_reviews(window, fmt=fmt, review_column=review_column, json_key=json_key,
+                            encoding=encoding, metrics=metrics)
+    if fmt == 'txt':
+        parse = _iter_txt
+    elif fmt == 'jsonl':
+        parse = partial(_iter_jsonl, review_column=review_column)
+    elif fmt == 'csv':
+        raw.seek(0)
+        parse = partial(_iter_csv_appended, header=raw.readline().decode(encoding),
+                        review_column=review_column)
+    else:
+        parse = partial(_iter_json_appended, review_column=review_column)
+    window = io.BufferedReader(_Window(raw, start, end))
+    return _read_text(window, fmt, encoding, parse, metrics)
+
+
+def csv_columns(source, encoding='utf-8'):
+    """Header row of a (possibly compressed) CSV file"""
+    header = _read_text(source, 'csv', encoding, csv.reader)
+    try:
+        return next(header, [])
+    finally:
+        header.close()
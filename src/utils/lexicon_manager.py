@@ -0,0 +1,231 @@
+import hashlib
+import json
+import os
+import shutil
+import sys
+import threading
+
+from src.config.settings import ALLOW_LEXICON_DOWNLOAD, LEXICON_DIR
+
+VADER_FILES = ('vader_lexicon.txt', 'emoji_utf8_lexicon.txt')
+MANIFEST = 'manifest.json'
+COMPILED_FILE = 'vader_lexicon.bin'
+
+
+class LexiconUnavailableError(RuntimeError):
+    """No verified lexicon on disk and downloads are disabled"""
+
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class LexiconResolver:
+    """Finds VADER lexicon files locally and hands out shared analyzers
+
+    Lexicons are copied into cache_dir and checked against the SHA-256
+    sums in its manifest. Sources are tried offline first (the cache, the
+    vaderSentiment package, NLTK data already on disk); the network is only
+    used when allow_download is set.
+    """
+
+    def __init__(self, cache_dir=LEXICON_DIR, allow_download=ALLOW_LEXICON_DOWNLOAD):
+        self.cache_dir = cache_dir
+        self.allow_download = allow_download
+        self._lock = threading.RLock()
+        self._analyzers = {}
+
+    def _manifest_path(self):
+        return os.path.join(self.cache_dir, MANIFEST)
+
+    def _read_manifest(self):
+        try:
+            with open(self._manifest_path()) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_manifest(self, manifest):
+        tmp_path = self._manifest_path() + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self._manifest_path())
+
+    def verify(self):
+        """True when every lexicon file in the cache matches its recorded checksum"""
+        checksums = self._read_manifest().get('checksums', {})
+        for name in VADER_FILES:
+            path = os.path.join(self.cache_dir, name)
+            if not os.path.exists(path) or _sha256(path) != checksums.get(name):
+                return False
+        return True
+
+    def _sources(self):
+        """Candidate directories holding the lexicon files, offline ones first"""
+        try:
+            import vaderSentiment
+            yield 'vaderSentiment', os.path.dirname(vaderSentiment.__file__)
+        except ImportError:
+            pass
+        nltk_dir = self._nltk_lexicon_dir(download=False)
+        if nltk_dir:
+            yield 'nltk_data', nltk_dir
+        if self.allow_download:
+            yield 'download', self._nltk_lexicon_dir(download=True)
+
+    def _nltk_lexicon_dir(self, download):
+        """Directory of NLTK's unpacked vader_lexicon, fetching it only when asked"""
+        try:
+            import nltk
+        except ImportError:
+            return None
+        download_dir = os.path.join(self.cache_dir, 'nltk_data')
+        if download:
+            from src.utils.ssl_handler import configure_ssl
+            configure_ssl()
+            nltk.download('vader_lexicon', download_dir=download_dir, quiet=True)
+        try:
+            found = nltk.data.find('sentiment/vader_lexicon.zip',
+                                   paths=[download_dir] + nltk.data.path)
+        except LookupError:
+            return None
+        extract_dir = os.path.join(self.cache_dir, 'nltk_vader')
+        if not os.path.exists(os.path.join(extract_dir, 'vader_lexicon.txt')):
+            import zipfile
+            with zipfile.ZipFile(str(found)) as archive:
+                os.makedirs(extract_dir, exist_ok=True)
+                with open(os.path.join(extract_dir, 'vader_lexicon.txt'), 'wb') as f:
+                    f.write(archive.read('vader_lexicon/vader_lexicon.txt'))
+        return extract_dir
+
+    def resolve(self):
+        """Directory with verified vader_lexicon.txt and emoji_utf8_lexicon.txt"""
+        with self._lock:
+            if self.verify():
+                return self.cache_dir
+            os.makedirs(self.cache_dir, exist_ok=True)
+            for source, directory in self._sources():
+                if directory is None:
+                    continue
+                paths = [os.path.join(directory, name) for name in VADER_FILES]
+                if not os.path.exists(paths[0]):
+                    continue
+                checksums = {}
+                for name, path in zip(VADER_FILES, paths):
+                    target = os.path.join(self.cache_dir, name)
+                    tmp_path = target + '.tmp'
+                    if os.path.exists(path):
+                        shutil.copyfile(path, tmp_path)
+                    else:
+                        # NLTK ships no emoji table; an empty one disables emoji handling
+                        open(tmp_path, 'w').close()
+                    os.replace(tmp_path, target)
+                    checksums[name] = _sha256(target)
+                self._write_manifest({'source': source, 'checksums': checksums})
+                return self.cache_dir
+            raise LexiconUnavailableError(
+                f'No VADER lexicon found offline in {self.cache_dir}; install vaderSentiment '
+                'or run `python -m src.utils.lexicon_manager fetch` to download it.'
+            )
+
+    def lexicon_path(self, name='vader_lexicon.txt'):
+        return os.path.join(self.resolve(), name)
+
+    def compiled_path(self):
+        """Compiled lexicon built from the verified files, rebuilt when they change"""
+        from src.analyzer.compiled_lexicon import FORMAT_VERSION, compile_lexicon
+
+        with self._lock:
+            directory = self.resolve()
+            manifest = self._read_manifest()
+            path = os.path.join(directory, COMPILED_FILE)
+            stale = (manifest.get('compiled_from') != manifest['checksums'] or
+                     manifest.get('compiled_format') != FORMAT_VERSION)
+            if stale or not os.path.exists(path):
+                compile_lexicon(path, self._build_vader())
+                manifest['compiled_from'] = manifest['checksums']
+                manifest['compiled_format'] = FORMAT_VERSION
+                self._write_manifest(manifest)
+            return path
+
+    def _build_vader(self):
+        from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+        directory = self.resolve()
+        return SentimentIntensityAnalyzer(
+            lexicon_file=os.path.join(directory, VADER_FILES[0]),
+            emoji_lexicon=os.path.join(directory, VADER_FILES[1]),
+        )
+
+    def _shared(self, key, factory):
+        with self._lock:
+            if key not in self._analyzers:
+                self._analyzers[key] = factory()
+            return self._analyzers[key]
+
+    def vader_analyzer(self, compiled_lexicon=None):
+        """Process-wide vaderSentiment analyzer, optionally on a compiled lexicon"""
+        if compiled_lexicon is None:
+            return self._shared(('vader', None), self._build_vader)
+
+        def build():
+            from src.analyzer.compiled_lexicon import CompiledSentimentAnalyzer
+            return CompiledSentimentAnalyzer(compiled_lexicon)
+
+        return self._shared(('vader', compiled_lexicon), build)
+
+    def nltk_analyzer(self):
+        """Process-wide NLTK analyzer reading the same verified lexicon file"""
+
+        def build():
+            import nltk
+            from nltk.sentiment import SentimentIntensityAnalyzer
+            # NLTK only opens resources under its data path, so put ours first
+            directory = self.resolve()
+            if directory not in nltk.data.path:
+                nltk.data.path.insert(0, directory)
+            return SentimentIntensityAnalyzer(lexicon_file=VADER_FILES[0])
+
+        return self._shared(('nltk', None), build)
+
+
+_resolver = None
+_resolver_lock = threading.Lock()
+
+
+def get_resolver():
+    """The process-wide LexiconResolver"""
+    global _resolver
+    with _resolver_lock:
+        if _resolver is None:
+            _resolver = LexiconResolver()
+        return _resolver
+
+
+def reset_resolver():
+    """Forget the process-wide LexiconResolver, and with it every analyzer it shares"""
+    global _resolver
+    with _resolver_lock:
+        _resolver = None
+
+
+def main(argv):
+    commands = ('resolve', 'fetch', 'compile')
+    if not argv or argv[0] not in commands:
+        print(f"usage: python -m src.utils.lexicon_manager {{{','.join(commands)}}}")
+        return 2
+    resolver = get_resolver()
+    if argv[0] == 'fetch':
+        resolver.allow_download = True
+    if argv[0] == 'compile':
+        print(resolver.compiled_path())
+    else:
+        print(resolver.resolve())
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -1,12 +1,14 @@
 import ssl
-import nltk
 
 def configure_ssl():
+    """Allow unverified HTTPS for NLTK downloads behind intercepting proxies.
+
+    Lexicon files are resolved offline by src.utils.lexicon_manager; this no
+    longer downloads anything itself.
+    """
     try:
         _create_unverified_https_context = ssl._create_unverified_context
     except AttributeError:
         pass
     else:
-        ssl._create_default_https_context = _create_unverified_https_context
-    
-    nltk.download('vader_lexicon')
\ No newline at end of file
+        ssl._create_default_https_context = _create_unverified_https_context
\ No newline at end of file
@@ -0,0 +1,69 @@
+import unittest
+
+import app_streamlit
+from app_streamlit import (ResultStore, get_analyzer, get_aspect_matcher, get_result_store,
+                           saved_results_name)
+
+
+class ResultStoreTest(unittest.TestCase):
+
+    def test_keeps_the_most_recently_used_files(self):
+        store = ResultStore(max_files=2)
+        store.put('a', 'results a')
+        store.put('b', 'results b')
+        self.assertEqual(store.get('a'), 'results a')
+        store.put('c', 'results c')
+        self.assertIsNone(store.get('b'))
+        self.assertEqual(store.get('a'), 'results a')
+        self.assertEqual(store.get('c'), 'results c')
+
+    def test_put_refreshes_an_existing_entry(self):
+        store = ResultStore(max_files=2)
+        store.put('a', 'old')
+        store.put('b', 'results b')
+        store.put('a', 'new')
+        store.put('c', 'results c')
+        self.assertIsNone(store.get('b'))
+        self.assertEqual(store.get('a'), 'new')
+
+    def test_default_bound(self):
+        store = ResultStore()
+        for digest in range(app_streamlit.MAX_CACHED_FILES + 3):
+            store.put(digest, digest)
+        self.assertEqual(len(store._results), app_streamlit.MAX_CACHED_FILES)
+        self.assertIsNone(store.get(0))
+
+
+class CachedResourceTest(unittest.TestCase):
+
+    def test_resources_are_built_once(self):
+        analyzer = get_analyzer()
+        self.assertIs(get_analyzer(), analyzer)
+        self.assertIsNotNone(analyzer.cache)
+        self.assertIs(get_aspect_matcher(), get_aspect_matcher())
+        self.assertIs(get_result_store(), get_result_store())
+
+    def test_reruns_share_the_score_cache(self):
+        analyzer = get_analyzer()
+        analyzer.analyze_review('Sturdy case, fits the phone perfectly')
+        hits = analyzer.cache.hits
+        get_analyzer().analyze_review('Sturdy case, fits the phone perfectly')
+        self.assertEqual(analyzer.cache.hits, hits + 1)
+
+
+class SavedResultsNameTest(unittest.TestCase):
+
+    def test_names_are_unique_per_content(self):
+        first = saved_results_name('reviews.2024.jsonl.gz', 'aaaa')
+        self.assertTrue(first.startswith('reviews.2024.jsonl-'))
+        self.assertTrue(first.endswith('.parquet'))
+        self.assertEqual(saved_results_name('reviews.2024.jsonl.gz', 'aaaa'), first)
+        self.assertNotEqual(saved_results_name('reviews.2024.jsonl.gz', 'bbbb'), first)
+        self.assertNotEqual(saved_results_name('reviews.2024.csv', 'aaaa:review'),
+                            saved_results_name('reviews.2024.csv', 'aaaa:title'))
+        self.assertNotEqual(saved_results_name('reviews.2025.jsonl', 'aaaa'),
+                            saved_results_name('reviews.2026.jsonl', 'aaaa'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import unittest
+
+import numpy as np
+
+from src.analyzer.aspects import AspectIndex, AspectMatcher
+from src.analyzer.sentiment_analyzer import ProductSentimentAnalyzer
+
+REVIEWS = [
+    'Terrible customer service, the seller never answered',
+    'Delivery was late and the package was crushed',
+    'Great quality and well made, worth every penny',
+    'It broke after a week. Awful.',
+    'I love the costume',
+    'Arrived on time, solid build, fair price',
+]
+
+
+class AspectMatcherTest(unittest.TestCase):
+
+    def test_finds_overlapping_terms_on_word_boundaries(self):
+        matcher = AspectMatcher({'a': ['he', 'she', 'hers'], 'b': ['his', 'she said', 'said so']})
+        self.assertEqual(matcher.find('she said so'), {0, 1})
+        self.assertEqual(matcher.find('ushers hiss'), set())
+        self.assertEqual(matcher.find('HIS'), {1})
+
+    def test_default_aspects(self):
+        matcher = AspectMatcher()
+        names = [{matcher.aspects[i] for i in found} for found in matcher.find_many(REVIEWS)]
+        self.assertEqual(names, [
+            {'service'},
+            {'delivery'},
+            {'quality', 'price'},
+            {'durability'},
+            set(),
+            {'delivery', 'quality', 'price'},
+        ])
+
+
+class AspectIndexTest(unittest.TestCase):
+
+    def test_index_matches_a_rescan(self):
+        analyzer = ProductSentimentAnalyzer()
+        index = analyzer.analyze_aspects(iter(REVIEWS * 3))
+        results = analyzer.analyze_comments(REVIEWS * 3)
+        self.assertEqual(index.to_dataframe().to_dict(),
+                         AspectIndex.from_results(results).to_dataframe().to_dict())
+        negative = index.review_ids('service', 'negative')
+        np.testing.assert_array_equal(negative, [0, 6, 12])
+        self.assertEqual(index.mentions('delivery'), 6)
+        self.assertEqual([aspect for aspect, _, _ in index.issues(limit=2)], ['durability', 'service'])
+
+    def test_merge_offsets_review_ids(self):
+        analyzer = ProductSentimentAnalyzer()
+        first = analyzer.analyze_aspects(REVIEWS[:3])
+        first.merge(analyzer.analyze_aspects(REVIEWS[3:]))
+        whole = analyzer.analyze_aspects(REVIEWS)
+        for aspect in whole.aspects:
+            np.testing.assert_array_equal(first.review_ids(aspect), whole.review_ids(aspect))
+            self.assertEqual(first.summaries[aspect], whole.summaries[aspect])
+
+    def test_conclusion_reports_measured_issues(self):
+        analyzer = ProductSentimentAnalyzer()
+        reviews = REVIEWS[:2] + ['Awful, it broke and stopped working']
+        results = analyzer.analyze_comments(reviews)
+        conclusion = analyzer.generate_customer_conclusion(results, analyzer.analyze_aspects(reviews))
+        self.assertIn('Common issues: ', conclusion)
+        self.assertIn('durability (100% negative of 1 mentions)', conclusion)
+        self.assertNotIn('Product durability and expectations', conclusion)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import unittest
+from unittest import mock
+
+from benchmarks.suite import BUDGETS, bench_construct, compare, higher_is_better, over_budget
+
+
+class CompareTest(unittest.TestCase):
+
+    baseline = {
+        'analyze_comments[vader,1000]': {'elapsed_s': 1.0, 'reviews_per_s': 1000.0},
+        'instrumentation[vader,1000]': {'disabled_overhead_pct': 0.2},
+    }
+
+    def test_direction_of_each_metric(self):
+        self.assertTrue(higher_is_better('reviews_per_s'))
+        self.assertFalse(higher_is_better('elapsed_s'))
+
+    def test_within_tolerance(self):
+        results = {'analyze_comments[vader,1000]': {'elapsed_s': 1.05, 'reviews_per_s': 952.0}}
+        self.assertEqual(compare(results, self.baseline, 0.10), [])
+
+    def test_regressions(self):
+        results = {'analyze_comments[vader,1000]': {'elapsed_s': 1.5, 'reviews_per_s': 800.0}}
+        regressions = compare(results, self.baseline, 0.10)
+        self.assertEqual([(case, metric) for case, metric, *_ in regressions],
+                         [('analyze_comments[vader,1000]', 'elapsed_s'),
+                          ('analyze_comments[vader,1000]', 'reviews_per_s')])
+        self.assertAlmostEqual(regressions[0][4], 0.5)
+        self.assertAlmostEqual(regressions[1][4], -0.2)
+
+    def test_improvements_new_cases_and_percentages_are_not_regressions(self):
+        results = {
+            'analyze_comments[vader,1000]': {'elapsed_s': 0.5, 'reviews_per_s': 2000.0},
+            'analyze_comments[vader,5000]': {'elapsed_s': 9.0},
+            'instrumentation[vader,1000]': {'disabled_overhead_pct': 0.9},
+        }
+        self.assertEqual(compare(results, self.baseline, 0.10), [])
+
+    def test_over_budget(self):
+        (case, metric), budget = next(iter(BUDGETS.items()))
+        results = {f'{case}[vader,1000]': {metric: budget / 2},
+                   f'{case}[vectorized,1000]': {metric: budget * 2},
+                   f'other_{case}[vader,1000]': {metric: budget * 2}}
+        self.assertEqual(over_budget(results),
+                         [(f'{case}[vectorized,1000]', metric, budget * 2, budget)])
+
+
+class ConstructTest(unittest.TestCase):
+
+    def test_every_timed_construction_uses_a_fresh_resolver(self):
+        with mock.patch('src.utils.lexicon_manager.reset_resolver') as reset:
+            results = bench_construct('vader', 0, 0)
+        self.assertEqual(reset.call_count, 20)
+        self.assertEqual(set(results), {'import_s', 'first_construct_s', 'construct_s',
+                                        'shared_construct_s'})
+
+
+if __name__ == '__main__':
+    unittest.main()
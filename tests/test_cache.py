@@ -0,0 +1,86 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from src.analyzer.cache import ScoreCache
+from src.analyzer.sentiment_analyzer import ProductSentimentAnalyzer
+
+REVIEWS = [
+    'Great blender, crushes ice in seconds',
+    'The motor burned out after two weeks',
+    'Arrived on time',
+]
+
+
+def scores(*rows):
+    return [(ScoreCache.key(text), values) for text, values in rows]
+
+
+class ScoreCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'scores.sqlite')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_cached_scores_match_and_count_hits(self):
+        cache = ScoreCache()
+        analyzer = ProductSentimentAnalyzer(engine='vectorized', cache=cache)
+        plain = ProductSentimentAnalyzer(engine='vectorized').score_batch(REVIEWS)
+        first = analyzer.score_batch(REVIEWS + [REVIEWS[0]])
+        self.assertEqual(cache.stats()['misses'], len(REVIEWS))
+        self.assertEqual(cache.deduplicated, 1)
+        # Whitespace differences map to the same entry
+        second = analyzer.score_batch(['  Arrived   on time '] + REVIEWS)
+        for key in plain:
+            np.testing.assert_array_equal(first[key][:3], plain[key])
+            np.testing.assert_array_equal(second[key][1:], plain[key])
+        stats = cache.stats()
+        self.assertEqual((stats['hits'], stats['misses']), (3, 3))
+        self.assertEqual(stats['hit_rate'], 0.5)
+
+    def test_lru_eviction(self):
+        cache = ScoreCache(max_entries=2)
+        cache.bind('v1')
+        cache.put_many(scores(('a', (0, 1, 0, 0)), ('b', (0, 1, 0, 0))))
+        cache.get_many([ScoreCache.key('a')])
+        cache.put_many(scores(('c', (0, 1, 0, 0))))
+        found = cache.get_many([ScoreCache.key(text) for text in 'abc'])
+        self.assertEqual(set(found), {ScoreCache.key('a'), ScoreCache.key('c')})
+        self.assertEqual(cache.stats()['evictions'], 1)
+        self.assertEqual(cache.stats()['memory_entries'], 2)
+
+    def test_sqlite_tier_survives_restarts(self):
+        cache = ScoreCache(path=self.path)
+        cache.bind('v1')
+        cache.put_many(scores(('a', (0.1, 0.9, 0.0, -0.2))))
+        cache.close()
+
+        restarted = ScoreCache(path=self.path)
+        restarted.bind('v1')
+        found = restarted.get_many([ScoreCache.key('a')])
+        self.assertEqual(found[ScoreCache.key('a')], (0.1, 0.9, 0.0, -0.2))
+        self.assertEqual(restarted.stats()['disk_hits'], 1)
+        restarted.close()
+
+    def test_fingerprint_change_invalidates(self):
+        cache = ScoreCache(path=self.path)
+        cache.bind('v1')
+        cache.put_many(scores(('a', (0, 1, 0, 0))))
+        cache.bind('v2')
+        self.assertEqual(cache.get_many([ScoreCache.key('a')]), {})
+        cache.close()
+
+        # The persisted tier was cleared too
+        restarted = ScoreCache(path=self.path)
+        restarted.bind('v1')
+        self.assertEqual(restarted.get_many([ScoreCache.key('a')]), {})
+        restarted.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
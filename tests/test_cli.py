@@ -0,0 +1,134 @@
+import csv
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+
+from src import cli
+from src.analyzer.sentiment_analyzer import ProductSentimentAnalyzer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REVIEWS = [
+    'Great blender, crushes ice in seconds',
+    'The motor burned out after two weeks',
+    'Arrived on time',
+    'Terrible customer service, never again',
+    'Works as described, good value',
+]
+# Modules a headless run must never pay for
+UI_MODULES = ('streamlit', 'pandas', 'plotly', 'utils.customization')
+# Cumulative import time budgets in microseconds, generous for slow CI machines
+CLI_IMPORT_BUDGET_US = 150_000
+ANALYZER_IMPORT_BUDGET_US = 1_500_000
+
+
+def import_times(statement):
+    """Cumulative import time per module, from `python -X importtime`"""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', statement], cwd=ROOT,
+                            capture_output=True, text=True, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+class CliTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.input = os.path.join(self.directory.name, 'reviews.jsonl')
+        with open(self.input, 'w', encoding='utf-8') as f:
+            f.writelines(json.dumps({'review': review}) + '\n' for review in REVIEWS)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def run_cli(self, *args):
+        return self.run_cli_on([self.input, *args])
+
+    def run_cli_on(self, argv):
+        out = io.StringIO()
+        with redirect_stdout(out):
+            code = cli.main(argv)
+        self.assertEqual(code, 0)
+        return out.getvalue()
+
+    def test_writes_per_review_results(self):
+        analyzer = ProductSentimentAnalyzer(engine='vectorized')
+        expected = [analyzer.analyze_review(review) for review in REVIEWS]
+        for suffix in ('jsonl', 'csv'):
+            with self.subTest(suffix):
+                output = os.path.join(self.directory.name, f'results.{suffix}')
+                self.run_cli('--output', output)
+                with open(output, encoding='utf-8', newline='') as f:
+                    rows = (list(csv.DictReader(f)) if suffix == 'csv'
+                            else [json.loads(line) for line in f])
+                self.assertEqual([row['text'] for row in rows], REVIEWS)
+                self.assertEqual([int(row['row']) for row in rows], list(range(len(REVIEWS))))
+                self.assertEqual([row['sentiment'] for row in rows],
+                                 [result['sentiment'] for result in expected])
+                for row, result in zip(rows, expected):
+                    self.assertAlmostEqual(float(row['compound']), result['scores']['compound'], places=4)
+
+    def test_summary(self):
+        payload = json.loads(self.run_cli('--summary-json'))
+        summary = ProductSentimentAnalyzer(engine='vectorized').summarize(REVIEWS)
+        self.assertEqual(payload['total']['reviews'], len(REVIEWS))
+        self.assertEqual(payload['inputs'][self.input]['counts'], dict(summary.counts))
+        self.assertIn('5 reviews', self.run_cli())
+
+    def test_results_files_are_filtered_without_rescoring(self):
+        results_path = os.path.join(self.directory.name, 'results.parquet')
+        self.run_cli('--output', results_path)
+        output = os.path.join(self.directory.name, 'negative.jsonl')
+        self.run_cli_on([results_path, '--sentiment', 'negative', '--output', output])
+        with open(output, encoding='utf-8') as f:
+            rows = [json.loads(line) for line in f]
+        analyzer = ProductSentimentAnalyzer(engine='vectorized')
+        expected = [(row, review) for row, review in enumerate(REVIEWS)
+                    if analyzer.analyze_review(review)['sentiment'] == 'negative']
+        self.assertEqual([(row['row'], row['text']) for row in rows], expected)
+        self.assertEqual({row['source'] for row in rows}, {results_path})
+        for row in rows:
+            self.assertEqual(row['compound'], analyzer.analyze_review(row['text'])['scores']['compound'])
+
+    def test_stdout_output_follows_the_current_stdout(self):
+        lines = self.run_cli('--output', '-', '--summary-json').splitlines()
+        self.assertEqual([json.loads(line)['text'] for line in lines], REVIEWS)
+
+    def test_results_without_text_cannot_be_copied(self):
+        from src.analyzer.columnar import write_results
+
+        results_path = os.path.join(self.directory.name, 'scores.parquet')
+        results = ProductSentimentAnalyzer(engine='vectorized').analyze_comments(REVIEWS)
+        write_results(results, results_path, include_text=False)
+        payload = json.loads(self.run_cli_on([results_path, '--summary-json']))
+        self.assertEqual(payload['total']['reviews'], len(REVIEWS))
+        errors = io.StringIO()
+        with redirect_stderr(errors), redirect_stdout(io.StringIO()):
+            code = cli.main([results_path, '--output', os.path.join(self.directory.name, 'out.jsonl')])
+        self.assertEqual(code, 1)
+        self.assertIn('without review text', errors.getvalue())
+
+    def test_import_time_budget(self):
+        times = import_times('import src.cli')
+        self.assertLess(times['src.cli'], CLI_IMPORT_BUDGET_US)
+        self.assertNotIn('numpy', times)
+
+        times = import_times('import src.cli, src.analyzer.sentiment_analyzer')
+        self.assertLess(times['src.analyzer.sentiment_analyzer'], ANALYZER_IMPORT_BUDGET_US)
+        for module in UI_MODULES:
+            self.assertNotIn(module, times)
+        for module in ('sqlite3', 'multiprocessing', 'concurrent.futures.process'):
+            self.assertNotIn(module, times, f'{module} should load only when used')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from src.analyzer.aspects import AspectIndex
+from src.analyzer.columnar import read_results, write_results
+from src.analyzer.sentiment_analyzer import ProductSentimentAnalyzer
+
+REVIEWS = [
+    'Great blender, crushes ice in seconds',
+    'The motor burned out after two weeks',
+    'Arrived on time',
+    'Terrible customer service, never again',
+    'Works as described, good value',
+    'Delivery was late and the box was crushed',
+    'Love the quality, worth every penny',
+    'Meh',
+]
+
+
+class ColumnarResultsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.results = ProductSentimentAnalyzer(engine='vectorized').analyze_comments(REVIEWS)
+        self.aspects = AspectIndex.from_results(self.results)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.directory.name, name)
+
+    def test_round_trip(self):
+        for name in ('results.parquet', 'results.arrow'):
+            with self.subTest(name):
+                # Small row groups, so reads span several of them
+                write_results(self.results, self.path(name), self.aspects, row_group_size=3)
+                results, aspects = read_results(self.path(name))
+                self.assertEqual(results.summary(), self.results.summary())
+                self.assertEqual(results.average_scores, self.results.summary().average_scores)
+                self.assertEqual([results.review(row) for row in range(results.total)],
+                                 [self.results.review(row) for row in range(self.results.total)])
+                self.assertEqual(aspects.to_mask().tolist(), self.aspects.to_mask().tolist())
+                for aspect in aspects.aspects:
+                    self.assertEqual(aspects.summaries[aspect], self.aspects.summaries[aspect])
+
+    def test_filters_by_label_and_compound_range(self):
+        for name in ('results.parquet', 'results.arrow'):
+            with self.subTest(name):
+                write_results(self.results, self.path(name), self.aspects, row_group_size=2)
+                results, aspects = read_results(self.path(name), labels=['negative', 'neutral'],
+                                                max_compound=self.results.compound.max())
+                expected = np.flatnonzero(self.results.labels > 0)
+                self.assertEqual(results.index.tolist(), expected.tolist())
+                self.assertEqual(list(results['negative']), list(self.results['negative']))
+                self.assertEqual(aspects.reviews, len(expected))
+
+                # Bounds are inclusive, even for scores float32 cannot hold exactly
+                score = float(self.results.scores(0)['compound'])
+                results, _ = read_results(self.path(name), min_compound=score, max_compound=score)
+                self.assertIn(0, results.index.tolist())
+                self.assertTrue(np.all(results.compound == self.results.compound[0]))
+
+    def test_results_without_text_read_from_the_source(self):
+        path = self.path('scores.parquet')
+        write_results(self.results, path, include_text=False)
+        results, aspects = read_results(path, labels=['positive'], texts=REVIEWS)
+        self.assertIsNone(aspects)
+        self.assertEqual(list(results['positive']), list(self.results['positive']))
+        results, _ = read_results(path)
+        with self.assertRaises(LookupError):
+            results.text(0)
+
+    def test_rejects_unknown_labels(self):
+        write_results(self.results, self.path('results.arrow'))
+        with self.assertRaises(ValueError):
+            read_results(self.path('results.arrow'), labels=['angry'])
+
+
+if __name__ == '__main__':
+    unittest.main()
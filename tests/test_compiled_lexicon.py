@@ -0,0 +1,72 @@
+import os
+import tempfile
+import unittest
+
+from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+
+from src.analyzer.cache import analyzer_fingerprint
+from src.analyzer.compiled_lexicon import (CompiledLexicon, CompiledSentimentAnalyzer,
+                                           compile_lexicon)
+from src.analyzer.sentiment_analyzer import ProductSentimentAnalyzer
+
+REVIEWS = [
+    'Great blender, crushes ice in seconds 😁',
+    'The motor is NOT good at all :(',
+    'It was kind of okay, but the box was very damaged!!!',
+    'Arrived on time',
+]
+
+
+class CompiledLexiconTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.TemporaryDirectory()
+        cls.path = os.path.join(cls.directory.name, 'lexicon.bin')
+        cls.vader = SentimentIntensityAnalyzer()
+        compile_lexicon(cls.path, cls.vader)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.directory.cleanup()
+
+    def test_tables_match_the_text_lexicons(self):
+        compiled = CompiledLexicon(self.path)
+        self.assertEqual(len(compiled.lexicon), len(self.vader.lexicon))
+        self.assertEqual(dict(compiled.lexicon), self.vader.lexicon)
+        self.assertEqual(dict(compiled.emojis), self.vader.emojis)
+        self.assertIn('good', compiled.lexicon)
+        self.assertNotIn('blender', compiled.lexicon)
+        self.assertNotIn(42, compiled.lexicon)
+        with self.assertRaises(KeyError):
+            compiled.lexicon['blender']
+        self.assertEqual(compiled.fingerprint, analyzer_fingerprint(self.vader))
+
+    def test_scores_match_vader(self):
+        compiled = CompiledSentimentAnalyzer(self.path)
+        for review in REVIEWS:
+            self.assertEqual(compiled.polarity_scores(review), self.vader.polarity_scores(review))
+        analyzer = ProductSentimentAnalyzer(engine='vectorized', compiled_lexicon=self.path)
+        self.assertEqual([analyzer.analyze_review(review)['scores'] for review in REVIEWS],
+                         [self.vader.polarity_scores(review) for review in REVIEWS])
+
+    def test_rebuild_leaves_open_readers_intact(self):
+        path = os.path.join(self.directory.name, 'rebuilt.bin')
+        compile_lexicon(path, self.vader)
+        reader = CompiledLexicon(path)
+        compile_lexicon(path, self.vader)
+        self.assertEqual(dict(reader.lexicon), self.vader.lexicon)
+        self.assertEqual(dict(CompiledLexicon(path).emojis), self.vader.emojis)
+        self.assertEqual(sorted(name for name in os.listdir(self.directory.name)
+                                if name.startswith('rebuilt')), ['rebuilt.bin'])
+
+    def test_rejects_other_files(self):
+        path = os.path.join(self.directory.name, 'other.bin')
+        with open(path, 'wb') as f:
+            f.write(b'NOTALEXICON' + b'\0' * 32)
+        with self.assertRaises(ValueError):
+            CompiledLexicon(path)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,169 @@
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from utils.customization import CustomizationClient
+
+
+class StubAdminAPI(ThreadingHTTPServer):
+    """Local stand-in for the admin endpoint; tests change its reply between requests"""
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), StubHandler)
+        self.config = {'app_title': 'First'}
+        self.status = 200
+        self.delay = 0.0
+        self.requests = 0
+        self.connections = 0
+        self.authorization = None
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self.thread.start()
+
+    @property
+    def url(self):
+        return f'http://127.0.0.1:{self.server_address[1]}/customizations'
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+
+    def do_GET(self):
+        server = self.server
+        server.requests += 1
+        server.authorization = self.headers.get('Authorization')
+        time.sleep(server.delay)
+        etag = f'"{hash(json.dumps(server.config, sort_keys=True))}"'
+        if server.status == 200 and self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        body = json.dumps(server.config).encode()
+        self.send_response(server.status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        if server.status == 200:
+            self.send_header('ETag', etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class CustomizationClientTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StubAdminAPI()
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache_path = os.path.join(self.directory.name, 'customizations.json')
+        self.clock = Clock()
+
+    def tearDown(self):
+        self.server.stop()
+        self.directory.cleanup()
+
+    def client(self, **options):
+        options.setdefault('read_timeout', 2.0)
+        client = CustomizationClient(self.server.url, 'secret', self.cache_path, max_age=60,
+                                     clock=self.clock, **options)
+        self.addCleanup(client.close)
+        return client
+
+    def test_cold_start_does_not_block_then_fills_in(self):
+        self.server.delay = 0.3
+        client = self.client()
+        start = time.perf_counter()
+        self.assertIsNone(client.get())
+        self.assertLess(time.perf_counter() - start, 0.2)
+        client.wait()
+        self.assertEqual(client.get(), {'app_title': 'First'})
+        self.assertEqual(self.server.authorization, 'Bearer secret')
+
+    def test_serves_stale_config_while_revalidating(self):
+        client = self.client()
+        self.assertTrue(client.refresh())
+        self.server.config = {'app_title': 'Second'}
+        self.server.delay = 0.3
+        self.clock.now += 61
+        start = time.perf_counter()
+        self.assertEqual(client.get(), {'app_title': 'First'})
+        self.assertEqual(client.get(), {'app_title': 'First'})
+        self.assertLess(time.perf_counter() - start, 0.2)
+        client.wait()
+        self.assertEqual(client.get(), {'app_title': 'Second'})
+        # Both stale reads shared a single background fetch
+        self.assertEqual(self.server.requests, 2)
+
+    def test_fresh_config_is_not_refetched(self):
+        client = self.client()
+        client.refresh()
+        self.clock.now += 30
+        client.get()
+        client.wait()
+        self.assertEqual(self.server.requests, 1)
+
+    def test_persisted_config_serves_cold_starts_without_the_network(self):
+        self.client().refresh()
+        self.server.stop()
+        restarted = self.client(connect_timeout=0.5)
+        self.assertEqual(restarted.get(), {'app_title': 'First'})
+        self.assertIsNone(restarted._refresh_thread)
+
+    def test_failures_keep_the_last_good_config(self):
+        client = self.client()
+        client.refresh()
+        self.server.status = 500
+        self.clock.now += 61
+        self.assertFalse(client.refresh())
+        self.assertEqual(client.get(), {'app_title': 'First'})
+        self.assertIn('500', client.last_error)
+        # No new attempt until retry_interval has passed
+        client.wait()
+        self.assertEqual(self.server.requests, 2)
+
+    def test_read_timeout(self):
+        self.server.delay = 1.0
+        client = self.client(read_timeout=0.2)
+        start = time.perf_counter()
+        self.assertFalse(client.refresh())
+        self.assertLess(time.perf_counter() - start, 0.9)
+        self.assertIsNone(client.get())
+
+    def test_pooled_connection_and_etag_revalidation(self):
+        client = self.client()
+        for _ in range(3):
+            self.assertTrue(client.refresh())
+        self.assertEqual(self.server.requests, 3)
+        self.assertEqual(self.server.connections, 1)
+        self.assertEqual(client.config, {'app_title': 'First'})
+        self.server.config = {'app_title': 'Changed'}
+        client.refresh()
+        self.assertEqual(client.config, {'app_title': 'Changed'})
+
+
+if __name__ == '__main__':
+    unittest.main()
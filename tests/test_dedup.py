@@ -0,0 +1,60 @@
+import unittest
+
+import numpy as np
+
+from src.analyzer.dedup import NearDuplicateIndex
+from src.analyzer.sentiment_analyzer import ProductSentimentAnalyzer
+
+REVIEWS = [
+    'Great blender, crushes ice in seconds and is easy to clean afterwards',
+    'Great blender, crushes ice in seconds and is easy to clean afterwards!!',
+    'The motor burned out after two weeks and support never answered my emails',
+    'GREAT blender crushes ice in seconds and is easy to clean afterwards',
+    'Arrived on time, works as described',
+    'The motor burned out after two weeks and support never answered my emails.',
+    'ok',
+]
+
+
+class NearDuplicateIndexTest(unittest.TestCase):
+
+    def test_clusters_copies_and_keeps_distinct_reviews(self):
+        index = NearDuplicateIndex(seed=7)
+        clusters, founders = index.assign(REVIEWS)
+        self.assertEqual(clusters[0], clusters[1])
+        self.assertEqual(clusters[0], clusters[3])
+        self.assertEqual(clusters[2], clusters[5])
+        self.assertEqual(len(set(clusters)), 4)
+        self.assertEqual(founders, [0, 2, 4, 6])
+        self.assertEqual(index.duplicates, 3)
+
+    def test_deterministic_for_a_seed(self):
+        texts = REVIEWS * 3 + [f'review number {i} about widget {i % 11}' for i in range(200)]
+        first = NearDuplicateIndex(seed=3)
+        second = NearDuplicateIndex(seed=3)
+        np.testing.assert_array_equal(first.signatures(texts), second.signatures(texts))
+        self.assertEqual(first.assign(texts), second.assign(texts))
+
+    def test_index_size_is_bounded(self):
+        analyzer = ProductSentimentAnalyzer(dedup=NearDuplicateIndex(max_representatives=50))
+        texts = [f'unique review {i} with its own words {i * 7919}' for i in range(300)]
+        analyzer.score_batch(texts)
+        report = analyzer.dedup.report()
+        self.assertEqual(report['indexed_clusters'], 50)
+        self.assertEqual(report['evictions'], 250)
+        self.assertEqual(report['unique'], 300)
+
+    def test_duplicates_get_their_representatives_scores(self):
+        plain = ProductSentimentAnalyzer()
+        analyzer = ProductSentimentAnalyzer(dedup=NearDuplicateIndex())
+        results = analyzer.analyze_comments(REVIEWS)
+        expected = plain.score_batch([REVIEWS[i] for i in (0, 0, 2, 0, 4, 2, 6)])
+        np.testing.assert_array_equal(results.compound,
+                                      expected['compound'].astype(results.compound.dtype))
+        report = analyzer.dedup.report()
+        self.assertEqual((report['reviews'], report['unique']), (7, 4))
+        self.assertEqual(sum(report['unique_counts'].values()), 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from benchmarks.corpus import generate_reviews
+from src.analyzer.cache import ScoreCache
+from src.analyzer.dedup import NearDuplicateIndex
+from src.analyzer.grouped import GroupedAggregates, aggregate_by_product, partition_of
+from src.analyzer.sentiment_analyzer import ProductSentimentAnalyzer
+
+
+class AggregateByProductTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.analyzer = ProductSentimentAnalyzer(engine='vectorized')
+        reviews = list(generate_reviews(700, 11))
+        cls.records = [(f'sku-{i * i % 9}', review) for i, review in enumerate(reviews)]
+        cls.serial = aggregate_by_product(cls.analyzer, cls.records, top_k=3)
+
+    def reviews_of(self, product):
+        return [review for sku, review in self.records if sku == product]
+
+    def assertSameAggregates(self, grouped, expected):
+        self.assertEqual(set(grouped), set(expected))
+        for product in expected:
+            with self.subTest(product=product):
+                self.assertEqual(grouped.summary(product), expected.summary(product))
+                self.assertEqual(grouped.top_positive(product), expected.top_positive(product))
+                self.assertEqual(grouped.top_negative(product), expected.top_negative(product))
+
+    def test_summaries_match_each_products_reviews(self):
+        self.assertEqual(sorted(self.serial), sorted({sku for sku, _ in self.records}))
+        for product in self.serial:
+            self.assertEqual(self.serial.summary(product),
+                             self.analyzer.summarize(self.reviews_of(product)))
+        frame = self.serial.to_dataframe()
+        self.assertEqual(frame['reviews'].sum(), len(self.records))
+
+    def test_top_k_per_product(self):
+        for product in self.serial:
+            reviews = self.reviews_of(product)
+            compound = self.analyzer.score_batch(reviews)['compound'].tolist()
+            scored = list(zip(compound, reviews))
+            positive = sorted((pair for pair in scored if pair[0] >= 0.05), reverse=True)
+            negative = sorted((pair for pair in scored if pair[0] <= -0.05),
+                              key=lambda pair: (-pair[0], pair[1]), reverse=True)
+            with self.subTest(product=product):
+                self.assertEqual(self.serial.top_positive(product), positive[:3])
+                self.assertEqual(self.serial.top_negative(product), negative[:3])
+
+    def test_partitioned_matches_serial(self):
+        partitioned = aggregate_by_product(self.analyzer, self.records, top_k=3, partitions=3,
+                                           chunk_size=40)
+        self.assertSameAggregates(partitioned, self.serial)
+        analyzer = ProductSentimentAnalyzer(engine='vectorized', workers=2, chunk_size=40,
+                                            parallel_threshold=100)
+        self.assertSameAggregates(analyzer.analyze_grouped(iter(self.records)), self.serial)
+
+    def test_cache_and_dedup_apply_whatever_the_worker_count(self):
+        # Exact repeats and near-duplicates differing only in punctuation
+        records = self.records[:300] + [(sku, review + '!') for sku, review in self.records[:300]]
+        grouped, reports, cache_stats = [], [], []
+        for workers in (1, 2):
+            cache = ScoreCache()
+            analyzer = ProductSentimentAnalyzer(engine='vectorized', workers=workers, chunk_size=40,
+                                                parallel_threshold=100, cache=cache,
+                                                dedup=NearDuplicateIndex())
+            try:
+                grouped.append(analyzer.analyze_grouped(iter(records)))
+            finally:
+                analyzer.close()
+            reports.append(analyzer.dedup.report())
+            cache_stats.append((cache.hits, cache.misses))
+        self.assertSameAggregates(grouped[1], grouped[0])
+        self.assertEqual(reports[1], reports[0])
+        self.assertGreater(reports[1]['duplicates'], 0)
+        self.assertEqual(cache_stats[1], cache_stats[0])
+        self.assertGreater(cache_stats[1][1], 0)
+
+    def test_worker_errors_reach_the_caller(self):
+        # Workers fail building their analyzer; the parent keeps feeding until inboxes fill
+        analyzer = SimpleNamespace(engine='vectorized', compiled_lexicon='/nonexistent/lexicon.bin',
+                                   cache=None, dedup=None)
+        with self.assertRaises(FileNotFoundError):
+            aggregate_by_product(analyzer, self.records * 3, partitions=2, chunk_size=5)
+
+    def test_small_inputs_are_not_partitioned(self):
+        analyzer = ProductSentimentAnalyzer(engine='vectorized', workers=2,
+                                            parallel_threshold=len(self.records) + 1)
+        with mock.patch('multiprocessing.get_context') as get_context:
+            grouped = analyzer.analyze_grouped(iter(self.records))
+        get_context.assert_not_called()
+        self.assertSameAggregates(grouped, self.serial)
+
+    def test_merged_chunks_match_serial(self):
+        merged = GroupedAggregates(top_k=3)
+        for start in range(0, len(self.records), 150):
+            part = aggregate_by_product(self.analyzer, self.records[start:start + 150], top_k=3)
+            merged.merge(part)
+        self.assertSameAggregates(merged, self.serial)
+        with self.assertRaises(ValueError):
+            merged.merge(GroupedAggregates(top_k=5))
+
+    def test_partition_of_is_stable(self):
+        self.assertEqual(partition_of('sku-1', 4), partition_of('sku-1', 4))
+        self.assertEqual({partition_of(f'sku-{i}', 3) for i in range(50)}, {0, 1, 2})
+
+
+if __name__ == '__main__':
+    unittest.main()
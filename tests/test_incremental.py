@@ -0,0 +1,105 @@
+import csv
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from src.analyzer.sentiment_analyzer import ProductSentimentAnalyzer
+from src.utils.ingestion import iter_reviews
+
+REVIEWS = [
+    'Great blender, crushes ice in seconds',
+    'The motor burned out after two weeks',
+    'Arrived on time',
+    'Terrible customer service, never again',
+    'Works as described, good value',
+    'Meh',
+]
+
+
+class IncrementalAnalysisTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.analyzer = ProductSentimentAnalyzer()
+        self.state = os.path.join(self.directory.name, 'state.json')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, name, reviews, mode='w'):
+        path = os.path.join(self.directory.name, name)
+        fmt = name.rsplit('.', 1)[1]
+        if fmt == 'json':
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump({'comments': reviews}, f, indent=2)
+            return path
+        with open(path, mode, encoding='utf-8', newline='') as f:
+            if fmt == 'csv':
+                writer = csv.writer(f)
+                if mode == 'w':
+                    writer.writerow(['id', 'review'])
+                writer.writerows(enumerate(reviews))
+            elif fmt == 'jsonl':
+                f.writelines(json.dumps({'review': review}) + '\n' for review in reviews)
+            else:
+                f.writelines(review + '\n' for review in reviews)
+        return path
+
+    def assert_matches_full_scan(self, run, path, **options):
+        self.assertEqual(run.summary, self.analyzer.summarize(iter_reviews(path, **options)))
+
+    def test_scores_only_appended_records(self):
+        for name, options in (('r.txt', {}), ('r.jsonl', {}), ('r.json', {}),
+                              ('r.csv', {'review_column': 'review'})):
+            with self.subTest(name):
+                if os.path.exists(self.state):
+                    os.remove(self.state)
+                path = self.write(name, REVIEWS[:4])
+                first = self.analyzer.analyze_incremental(path, self.state, **options)
+                self.assertEqual((first.mode, first.reason), ('full', 'no saved state'))
+                if name.endswith('.json'):
+                    path = self.write(name, REVIEWS)
+                else:
+                    self.write(name, REVIEWS[4:], 'a')
+                second = self.analyzer.analyze_incremental(path, self.state, **options)
+                self.assertEqual(second.mode, 'incremental')
+                self.assertEqual(second.stream.count, 2)
+                self.assert_matches_full_scan(second, path, **options)
+                third = self.analyzer.analyze_incremental(path, self.state, **options)
+                self.assertEqual((third.stream.count, third.scanned_bytes), (0, 0))
+
+    def test_unterminated_line_waits_for_its_newline(self):
+        path = self.write('r.txt', REVIEWS[:2])
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write('Half written')
+        run = self.analyzer.analyze_incremental(path, self.state)
+        self.assertEqual(run.summary.count, 2)
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(' review, now complete\n')
+        run = self.analyzer.analyze_incremental(path, self.state)
+        self.assertEqual((run.mode, run.stream.count), ('incremental', 1))
+        self.assert_matches_full_scan(run, path)
+
+    def test_rescans_when_rewritten_truncated_or_analyzer_changes(self):
+        path = self.write('r.jsonl', REVIEWS)
+        self.analyzer.analyze_incremental(path, self.state)
+        self.write('r.jsonl', list(reversed(REVIEWS)))
+        run = self.analyzer.analyze_incremental(path, self.state)
+        self.assertEqual((run.mode, run.reason), ('full', 'file rewritten'))
+        self.assert_matches_full_scan(run, path)
+
+        self.write('r.jsonl', REVIEWS[:2])
+        run = self.analyzer.analyze_incremental(path, self.state)
+        self.assertEqual((run.mode, run.reason), ('full', 'file truncated'))
+        self.assertEqual(run.summary.count, 2)
+
+        with mock.patch('src.analyzer.incremental.analyzer_fingerprint',
+                        return_value='another lexicon'):
+            run = self.analyzer.analyze_incremental(path, self.state)
+        self.assertEqual((run.mode, run.reason), ('full', 'analyzer changed'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,131 @@
+import gzip
+import io
+import json
+import os
+import tempfile
+import unittest
+
+from src.utils.ingestion import (csv_columns, detect_format, iter_review_chunks,
+                                 iter_reviews, iter_reviews_between, record_end)
+
+REVIEWS = ['Great battery life', 'Screen, cracked "on" arrival', 'Meh', 'Works as described']
+
+
+def reviews(data, **options):
+    return list(iter_reviews(io.BytesIO(data), **options))
+
+
+class IterReviewsTest(unittest.TestCase):
+
+    def test_json_array(self):
+        self.assertEqual(reviews(json.dumps(REVIEWS).encode(), fmt='json'), REVIEWS)
+
+    def test_json_object_key(self):
+        document = {'product': 'x', 'reviews': [{'text': review} for review in REVIEWS]}
+        self.assertEqual(reviews(json.dumps(document).encode(), fmt='json', json_key='reviews'),
+                         REVIEWS)
+
+    def test_missing_json_key_raises(self):
+        document = json.dumps({'reviews': REVIEWS}).encode()
+        with self.assertRaises(ValueError):
+            reviews(document, fmt='json')
+        with self.assertRaises(ValueError):
+            reviews(b'{}', fmt='json')
+
+    def test_json_elements_span_reads(self):
+        many = [f'review {i} ' + 'x' * 50 for i in range(3000)]
+        self.assertEqual(reviews(json.dumps({'comments': many}).encode(), fmt='json'), many)
+
+    def test_jsonl(self):
+        lines = [json.dumps({'id': i, 'comment': review}) for i, review in enumerate(REVIEWS)]
+        data = ('\n'.join(lines[:2]) + '\n\n' + '\n'.join(lines[2:]) + '\n').encode()
+        self.assertEqual(reviews(data, fmt='jsonl'), REVIEWS)
+        self.assertEqual(reviews(data, fmt='jsonl', review_column='id'), [])
+
+    def test_csv(self):
+        rows = ['id,review'] + [f'{i},"{review.replace(chr(34), 2 * chr(34))}"'
+                                for i, review in enumerate(REVIEWS)]
+        data = '\n'.join(rows).encode()
+        self.assertEqual(reviews(data, fmt='csv', review_column='review'), REVIEWS)
+        self.assertEqual(reviews(data, fmt='csv'), ['0', '1', '2', '3'])
+        with self.assertRaises(ValueError):
+            reviews(data, fmt='csv', review_column='body')
+        self.assertEqual(csv_columns(io.BytesIO(data)), ['id', 'review'])
+
+    def test_gzip(self):
+        data = gzip.compress('\n'.join(json.dumps(review) for review in REVIEWS).encode())
+        self.assertEqual(reviews(data, fmt='jsonl'), REVIEWS)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'reviews.jsonl.gz')
+            with open(path, 'wb') as f:
+                f.write(data)
+            self.assertEqual(list(iter_reviews(path)), REVIEWS)
+            self.assertEqual(list(iter_review_chunks(path, chunk_size=3)),
+                             [REVIEWS[:3], REVIEWS[3:]])
+
+    def test_zstd(self):
+        try:
+            import zstandard
+        except ImportError:
+            with self.assertRaises(ImportError):
+                reviews(b'\x28\xb5\x2f\xfd' + b'\0' * 8, fmt='txt')
+            self.skipTest('zstandard is not installed')
+        data = zstandard.ZstdCompressor().compress('\n'.join(REVIEWS).encode())
+        self.assertEqual(reviews(data, fmt='txt'), REVIEWS)
+
+    def test_detect_format(self):
+        self.assertEqual(detect_format('Reviews.NDJSON.gz'), 'jsonl')
+        self.assertEqual(detect_format('reviews.csv.zst'), 'csv')
+        with self.assertRaises(ValueError):
+            detect_format('reviews.xml')
+
+
+class IterReviewsBetweenTest(unittest.TestCase):
+
+    def read_appended(self, fmt, before, after, **options):
+        """Reviews up to the first record_end, then those appended after it"""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, f'reviews.{fmt}')
+            with open(path, 'wb') as f:
+                f.write(before)
+            with open(path, 'rb') as raw:
+                first = record_end(raw, fmt, len(before))
+                initial = list(iter_reviews_between(raw, 0, first, fmt, **options))
+            with open(path, 'wb') as f:
+                f.write(after)
+            with open(path, 'rb') as raw:
+                second = record_end(raw, fmt, len(after))
+                appended = list(iter_reviews_between(raw, first, second, fmt, **options))
+        return initial, appended
+
+    def test_txt_skips_the_partial_last_line(self):
+        initial, appended = self.read_appended('txt', b'one\ntwo\nthr', b'one\ntwo\nthree\nfour\n')
+        self.assertEqual(initial, ['one', 'two'])
+        self.assertEqual(appended, ['three', 'four'])
+
+    def test_jsonl(self):
+        lines = [json.dumps({'review': review}) + '\n' for review in REVIEWS]
+        initial, appended = self.read_appended('jsonl', ''.join(lines[:2]).encode(),
+                                               ''.join(lines).encode())
+        self.assertEqual(initial + appended, REVIEWS)
+
+    def test_csv_keeps_the_header(self):
+        initial, appended = self.read_appended('csv', b'id,review\n1,good\n',
+                                               b'id,review\n1,good\n2,bad\n',
+                                               review_column='review')
+        self.assertEqual((initial, appended), (['good'], ['bad']))
+
+    def test_json_elements_appended_to_the_array(self):
+        before = json.dumps({'comments': REVIEWS[:2]}, indent=2).encode()
+        after = before.replace(b'\n  ]', (',\n' + ',\n'.join(
+            json.dumps(review) for review in REVIEWS[2:]) + '\n  ]').encode())
+        initial, appended = self.read_appended('json', before, after)
+        self.assertEqual((initial, appended), (REVIEWS[:2], REVIEWS[2:]))
+
+    def test_json_without_a_trailing_array(self):
+        raw = io.BytesIO(b'{"comments": ["a"], "count": 1}')
+        self.assertIsNone(record_end(raw, 'json', len(raw.getvalue())))
+
+
+if __name__ == '__main__':
+    unittest.main()
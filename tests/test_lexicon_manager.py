@@ -0,0 +1,77 @@
+import json
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+from src.utils.lexicon_manager import (MANIFEST, VADER_FILES, LexiconResolver,
+                                       LexiconUnavailableError, _sha256)
+
+
+class LexiconResolverTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache_dir = os.path.join(self.directory.name, 'lexicon')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def resolver(self, allow_download=False):
+        return LexiconResolver(cache_dir=self.cache_dir, allow_download=allow_download)
+
+    def manifest(self):
+        with open(os.path.join(self.cache_dir, MANIFEST)) as f:
+            return json.load(f)
+
+    def test_resolves_offline_from_the_package(self):
+        resolver = self.resolver()
+        with mock.patch.object(resolver, '_nltk_lexicon_dir') as nltk_dir:
+            self.assertEqual(resolver.resolve(), self.cache_dir)
+        nltk_dir.assert_not_called()
+        manifest = self.manifest()
+        self.assertEqual(manifest['source'], 'vaderSentiment')
+        for name in VADER_FILES:
+            path = os.path.join(self.cache_dir, name)
+            self.assertEqual(manifest['checksums'][name], _sha256(path))
+            self.assertFalse(os.path.exists(path + '.tmp'))
+        self.assertTrue(resolver.verify())
+
+    def test_checksum_mismatch_recopies_the_lexicon(self):
+        resolver = self.resolver()
+        resolver.resolve()
+        path = os.path.join(self.cache_dir, VADER_FILES[0])
+        expected = _sha256(path)
+        with open(path, 'a') as f:
+            f.write('tampered\t4.0\t0.0\t[4]\n')
+        self.assertFalse(resolver.verify())
+        resolver.resolve()
+        self.assertEqual(_sha256(path), expected)
+        self.assertTrue(resolver.verify())
+
+    def test_cached_lexicon_is_used_without_any_source(self):
+        self.resolver().resolve()
+        resolver = self.resolver()
+        with mock.patch.dict(sys.modules, {'vaderSentiment': None}), \
+                mock.patch.object(resolver, '_nltk_lexicon_dir', return_value=None):
+            self.assertEqual(resolver.resolve(), self.cache_dir)
+
+    def test_no_offline_source_and_downloads_disabled(self):
+        resolver = self.resolver()
+        with mock.patch.dict(sys.modules, {'vaderSentiment': None}), \
+                mock.patch.object(resolver, '_nltk_lexicon_dir', return_value=None) as nltk_dir:
+            with self.assertRaises(LexiconUnavailableError):
+                resolver.resolve()
+        nltk_dir.assert_called_once_with(download=False)
+
+    def test_engines_default_to_the_resolver(self):
+        from src.analyzer.vectorized import VectorizedSentimentEngine
+        resolver = self.resolver()
+        with mock.patch('src.utils.lexicon_manager.get_resolver', return_value=resolver):
+            engine = VectorizedSentimentEngine()
+        self.assertIs(engine.analyzer, resolver.vader_analyzer())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+import re
+import unittest
+
+from src.analyzer.metrics import NULL_METRICS, Histogram, Metrics
+from src.analyzer.sentiment_analyzer import ProductSentimentAnalyzer
+
+REVIEWS = ['Great value for money', 'Stopped working after a week :(', 'It is blue']
+
+
+class HistogramTest(unittest.TestCase):
+
+    def test_bounds_are_inclusive(self):
+        histogram = Histogram((1, 10))
+        for value in (0.5, 1, 5, 10, 11):
+            histogram.observe(value)
+        histogram.observe(3, count=2)
+        self.assertEqual(histogram.buckets, [2, 4, 1])
+        self.assertEqual(histogram.cumulative(), [(1, 2), (10, 6), (float('inf'), 7)])
+        self.assertEqual((histogram.sum, histogram.count), (33.5, 7))
+
+    def test_observe_many_matches_observe(self):
+        values = [0, 1, 2, 9.5, 10, 10.5, 100]
+        one_by_one, bulk = Histogram((1, 10)), Histogram((1, 10))
+        for value in values:
+            one_by_one.observe(value)
+        bulk.observe_many(values)
+        self.assertEqual(bulk.buckets, one_by_one.buckets)
+        self.assertEqual((bulk.sum, bulk.count), (one_by_one.sum, one_by_one.count))
+
+
+class MetricsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.metrics = Metrics(namespace='test')
+
+    def test_snapshot(self):
+        self.metrics.count('reviews', 3)
+        self.metrics.count('reviews')
+        self.metrics.record_stage('score', 0.5)
+        self.metrics.record_stage('score', 0.25)
+        with self.metrics.stage('ingest'):
+            pass
+        self.metrics.observe('review_length_chars', 20)
+        snapshot = self.metrics.snapshot()
+        self.assertEqual(snapshot['counters'], {'reviews': 4})
+        self.assertEqual(snapshot['stages']['score'], {'seconds': 0.75, 'calls': 2})
+        self.assertEqual(snapshot['stages']['ingest']['calls'], 1)
+        self.assertEqual(snapshot['histograms']['review_length_chars']['count'], 1)
+        self.assertEqual(snapshot['histograms']['review_length_chars']['buckets'][1], (32, 1))
+        self.assertEqual(self.metrics.operations, 6)
+        self.metrics.reset()
+        self.assertEqual(self.metrics.snapshot()['counters'], {})
+
+    def test_timed_charges_the_producer(self):
+        self.assertEqual(list(self.metrics.timed(iter(REVIEWS), 'ingest')), REVIEWS)
+        self.assertEqual(self.metrics.snapshot()['stages']['ingest']['calls'], 1)
+
+    def test_prometheus_format(self):
+        self.metrics.count('reviews', 2)
+        self.metrics.record_stage('score', 0.5)
+        self.metrics.observe('review_latency_seconds', 0.002)
+        text = self.metrics.to_prometheus()
+        lines = text.splitlines()
+        self.assertTrue(text.endswith('\n'))
+        self.assertIn('# TYPE test_reviews_total counter', lines)
+        self.assertIn('test_reviews_total 2', lines)
+        self.assertIn('test_stage_seconds_total{stage="score"} 0.5', lines)
+        self.assertIn('test_stage_calls_total{stage="score"} 1', lines)
+        self.assertIn('# TYPE test_review_latency_seconds histogram', lines)
+        self.assertIn('test_review_latency_seconds_bucket{le="0.001"} 0', lines)
+        self.assertIn('test_review_latency_seconds_bucket{le="0.0025"} 1', lines)
+        self.assertIn('test_review_latency_seconds_bucket{le="+Inf"} 1', lines)
+        self.assertIn('test_review_latency_seconds_count 1', lines)
+        sample = re.compile(r'^[a-z_]+(\{[a-z]+="[^"]*"\})? \S+$')
+        for line in lines:
+            if not line.startswith('# TYPE '):
+                self.assertRegex(line, sample)
+
+    def test_analyzer_records_reviews(self):
+        analyzer = ProductSentimentAnalyzer(engine='vectorized', metrics=self.metrics)
+        analyzer.analyze_comments(REVIEWS)
+        analyzer.analyze_review(REVIEWS[0])
+        snapshot = self.metrics.snapshot()
+        self.assertEqual(snapshot['counters']['reviews'], len(REVIEWS) + 1)
+        self.assertEqual(snapshot['histograms']['review_length_chars']['count'], len(REVIEWS) + 1)
+        # One timed review and one timed chunk, not a chunk average per review
+        self.assertEqual(snapshot['histograms']['review_latency_seconds']['count'], 1)
+        self.assertEqual(snapshot['histograms']['chunk_latency_seconds']['count'], 1)
+
+
+class NullMetricsTest(unittest.TestCase):
+
+    def test_records_nothing(self):
+        NULL_METRICS.count('reviews', 5)
+        NULL_METRICS.record_stage('score', 1.0)
+        NULL_METRICS.observe('review_latency_seconds', 0.1)
+        NULL_METRICS.observe_many('review_length_chars', [10, 20])
+        with NULL_METRICS.stage('score'):
+            pass
+        self.assertIs(NULL_METRICS.timed(REVIEWS, 'ingest'), REVIEWS)
+        self.assertFalse(NULL_METRICS.enabled)
+        self.assertEqual(NULL_METRICS.snapshot(), {'counters': {}, 'stages': {}, 'histograms': {}})
+        self.assertEqual(NULL_METRICS.to_prometheus(), '')
+
+    def test_analyzer_default(self):
+        analyzer = ProductSentimentAnalyzer(engine='vectorized')
+        self.assertIs(analyzer.metrics, NULL_METRICS)
+        analyzer.analyze_comments(REVIEWS)
+        self.assertEqual(analyzer.metrics.snapshot()['counters'], {})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import unittest
+
+import numpy as np
+
+from benchmarks.corpus import generate_reviews
+from src.analyzer.cache import ScoreCache
+from src.analyzer.dedup import NearDuplicateIndex
+from src.analyzer.sentiment_analyzer import ProductSentimentAnalyzer
+
+
+class ParallelScoringTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        reviews = list(generate_reviews(600))
+        # Repeats give the cache hits and the dedup index clusters
+        cls.reviews = reviews + reviews[:150]
+        cls.serial = ProductSentimentAnalyzer(engine='vectorized').analyze_comments(cls.reviews)
+
+    def pooled(self, **options):
+        analyzer = ProductSentimentAnalyzer(engine='vectorized', workers=2, chunk_size=64,
+                                            parallel_threshold=100, **options)
+        self.addCleanup(analyzer.close)
+        return analyzer
+
+    def assert_matches_serial(self, results):
+        self.assertEqual(results.total, self.serial.total)
+        for key in ('neg', 'neu', 'pos', 'compound', 'labels'):
+            np.testing.assert_array_equal(getattr(results, key), getattr(self.serial, key))
+        self.assertEqual(list(results['negative']), list(self.serial['negative']))
+        self.assertEqual(results.counts, self.serial.counts)
+
+    def test_pool_matches_serial_scoring_in_input_order(self):
+        analyzer = self.pooled()
+        self.assert_matches_serial(analyzer.analyze_comments(self.reviews))
+        self.assertIsNotNone(analyzer._pool)
+        self.assertEqual(analyzer.summarize(iter(self.reviews)), self.serial.summary())
+
+    def test_cache_and_dedup_pool_paths(self):
+        for name, options in (('cache', {'cache': ScoreCache()}),
+                              ('dedup', {'dedup': NearDuplicateIndex()}),
+                              ('both', {'cache': ScoreCache(), 'dedup': NearDuplicateIndex()})):
+            with self.subTest(name):
+                analyzer = self.pooled(**options)
+                self.assert_matches_serial(analyzer.analyze_comments(self.reviews))
+                # Second pass is served by the cache or the index
+                self.assert_matches_serial(analyzer.analyze_comments(self.reviews))
+
+    def test_dedup_eviction_with_chunks_in_flight(self):
+        # Repeats of the first chunk match clusters that later chunks, already
+        # assigned while it is scored, would otherwise push out of the index
+        first, rest = self.reviews[:20], self.reviews[100:160]
+        reviews = first + first + rest
+        expected = ProductSentimentAnalyzer(engine='vectorized').analyze_comments(reviews)
+        dedup = NearDuplicateIndex(max_representatives=50)
+        analyzer = ProductSentimentAnalyzer(engine='vectorized', workers=2, chunk_size=20,
+                                            parallel_threshold=0, dedup=dedup)
+        self.addCleanup(analyzer.close)
+        results = analyzer.analyze_comments(reviews)
+        self.assertEqual(results.total, len(reviews))
+        np.testing.assert_array_equal(results.compound, expected.compound)
+        self.assertGreater(dedup.evictions, 0)
+        self.assertLessEqual(len(dedup._representatives), dedup.max_representatives)
+        self.assertEqual(dedup._pins, {})
+
+        dedup = NearDuplicateIndex(max_representatives=50)
+        self.assert_matches_serial(self.pooled(dedup=dedup).analyze_comments(self.reviews))
+        self.assertGreater(dedup.evictions, 0)
+
+    def test_inputs_under_the_threshold_stay_in_process(self):
+        analyzer = self.pooled()
+        small = self.reviews[:50]
+        analyzer.analyze_comments(small)
+        analyzer.summarize(iter(small))
+        analyzer.analyze_aspects(iter(small))
+        analyzer.analyze_stream(iter(small)).run()
+        self.assertIsNone(analyzer._pool)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import json
+import unittest
+
+import numpy as np
+
+from src.analyzer.quantiles import CompoundSketch
+
+
+def compounds(count, seed):
+    """Compound scores on VADER's four-decimal grid"""
+    rng = np.random.default_rng(seed)
+    return np.round(np.clip(rng.normal(0.2, 0.5, count), -1, 1), 4)
+
+
+class CompoundSketchTest(unittest.TestCase):
+
+    def test_quantiles_are_exact(self):
+        values = compounds(5001, 0)
+        sketch = CompoundSketch().update(values)
+        self.assertEqual(sketch.count, len(values))
+        for q in (0.1, 0.5, 0.9, 0.0, 1.0):
+            with self.subTest(q=q):
+                self.assertEqual(sketch.quantile(q),
+                                 float(np.quantile(values, q, method='inverted_cdf')))
+
+    def test_distribution_of_a_small_batch(self):
+        values = [-0.9, -0.2, 0.0, 0.1, 0.3, 0.4, 0.5, 0.6, 0.8, 0.95]
+        distribution = CompoundSketch().update(values).distribution()
+        self.assertEqual(distribution['p10'], -0.9)
+        self.assertEqual(distribution['p50'], 0.3)
+        self.assertEqual(distribution['p90'], 0.8)
+        # 4 strong positives and 1 strong negative: 2 * 1 / 10
+        self.assertAlmostEqual(distribution['polarization'], 0.2)
+
+    def test_polarization(self):
+        self.assertEqual(CompoundSketch().update([0.9, -0.9, 0.7, -0.5]).polarization(), 1.0)
+        self.assertEqual(CompoundSketch().update([0.9, 0.8, 0.7, 0.6]).polarization(), 0.0)
+        self.assertEqual(CompoundSketch().update([0.49, -0.49]).polarization(), 0.0)
+        self.assertEqual(CompoundSketch().polarization(), 0.0)
+        self.assertEqual(CompoundSketch().quantile(0.5), 0.0)
+
+    def test_merge_matches_a_single_pass(self):
+        values = compounds(3000, 1)
+        whole = CompoundSketch().update(values)
+        parts = [CompoundSketch().update(part) for part in np.array_split(values, 7)]
+        forward, backward = CompoundSketch(), CompoundSketch()
+        for part in parts:
+            forward.merge(part)
+        for part in reversed(parts):
+            backward.merge(part)
+        self.assertEqual(forward, whole)
+        self.assertEqual(backward, whole)
+        self.assertEqual(forward.distribution(), whole.distribution())
+
+    def test_merge_invalidates_cached_quantiles(self):
+        sketch = CompoundSketch().update([0.1, 0.2, 0.3])
+        self.assertEqual(sketch.quantile(0.5), 0.2)
+        sketch.merge(CompoundSketch().update([0.9, 0.9, 0.9, 0.9]))
+        self.assertEqual(sketch.quantile(0.5), 0.9)
+
+    def test_update_fixed_and_round_trip(self):
+        values = compounds(500, 2)
+        fixed = np.rint(values * 10000).astype(np.int64)
+        sketch = CompoundSketch().update_fixed(fixed)
+        self.assertEqual(sketch, CompoundSketch().update(values))
+        restored = CompoundSketch.from_dict(json.loads(json.dumps(sketch.to_dict())))
+        self.assertEqual(restored, sketch)
+        self.assertEqual(restored.distribution(), sketch.distribution())
+
+
+if __name__ == '__main__':
+    unittest.main()
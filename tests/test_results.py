@@ -0,0 +1,105 @@
+import unittest
+
+import numpy as np
+
+from benchmarks.corpus import generate_reviews
+from src.analyzer.results import HISTOGRAM_RESOLUTION
+from src.analyzer.sentiment_analyzer import ProductSentimentAnalyzer
+
+REVIEWS = [
+    'Great blender, crushes ice in seconds',
+    'The motor burned out after two weeks',
+    'Arrived on time',
+    'Terrible customer service, never again',
+    'Works as described, good value',
+    'Arrived on time',
+]
+
+
+class BatchResultsTest(unittest.TestCase):
+    """analyze_comments results still read like the old dict of label lists"""
+
+    def setUp(self):
+        self.analyzer = ProductSentimentAnalyzer(engine='vectorized')
+        self.results = self.analyzer.analyze_comments(REVIEWS)
+        self.expected = [self.analyzer.analyze_review(review) for review in REVIEWS]
+
+    def test_mapping_compatibility(self):
+        self.assertEqual(set(self.results), {'positive', 'neutral', 'negative', 'average_scores',
+                                             'counts', 'distribution'})
+        self.assertEqual(len(self.results), 6)
+        for label in ('positive', 'neutral', 'negative'):
+            texts = [result['text'] for result in self.expected if result['sentiment'] == label]
+            self.assertEqual(self.results[label], texts)
+            self.assertEqual(len(self.results[label]), len(texts))
+            self.assertEqual(self.results[label][:1], texts[:1])
+            self.assertEqual(self.results['counts'][label], len(texts))
+        for key, average in self.results['average_scores'].items():
+            self.assertAlmostEqual(average, np.mean([r['scores'][key] for r in self.expected]))
+        with self.assertRaises(KeyError):
+            self.results['missing']
+
+    def test_rows_read_like_analyze_review(self):
+        self.assertEqual([self.results.review(row) for row in range(self.results.total)],
+                         self.expected)
+
+    def test_to_dataframe(self):
+        frame = self.results.to_dataframe(include_text=True)
+        self.assertEqual(frame['text'].tolist(), REVIEWS)
+        self.assertEqual(frame['sentiment'].astype(str).tolist(),
+                         [result['sentiment'] for result in self.expected])
+        self.assertEqual(frame['row'].tolist(), list(range(len(REVIEWS))))
+        self.assertNotIn('text', self.results.to_dataframe().columns)
+
+    def test_descending_sort_keeps_ties_in_batch_order(self):
+        # Rows 2 and 5 are the same review, so their scores tie
+        for descending in (False, True):
+            order = self.results.order('compound', descending).tolist()
+            self.assertLess(order.index(2), order.index(5))
+        compound = self.results.compound[self.results.order('compound', True)]
+        self.assertTrue(np.all(np.diff(compound) <= 0))
+
+
+class DistributionViewTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.reviews = list(generate_reviews(3000))
+        cls.results = ProductSentimentAnalyzer(engine='vectorized').analyze_comments(cls.reviews)
+
+    def test_histogram_is_summed_from_the_pre_binned_counts(self):
+        self.assertEqual(self.results.compound_bins.shape, (3, HISTOGRAM_RESOLUTION))
+        edges, counts = self.results.histogram(20)
+        self.assertEqual(len(edges), 21)
+        self.assertEqual(np.sum(list(counts.values()), axis=0).tolist(),
+                         self.results.summary().histogram)
+        for label, label_counts in counts.items():
+            self.assertEqual(sum(label_counts), self.results.counts[label])
+
+    def test_histogram_of_a_drill_down_range(self):
+        edges, counts = self.results.histogram(10, low=-0.5, high=0.3)
+        self.assertEqual((edges[0], edges[-1], len(edges)), (-0.5, 0.3, 11))
+        compound = self.results.compound
+        inside = np.count_nonzero((compound >= np.float32(-0.5)) & (compound < np.float32(0.3)))
+        self.assertEqual(sum(map(sum, counts.values())), inside)
+
+    def test_select_sorts_and_filters_server_side(self):
+        rows = self.results.select(['negative'], low=-0.8, sort='compound', descending=True)
+        compound = self.results.compound[rows]
+        self.assertTrue(np.all(np.diff(compound) <= 0))
+        self.assertTrue(np.all(compound >= np.float32(-0.8)))
+        self.assertEqual(set(self.results.labels[rows].tolist()), {2})
+        expected = np.count_nonzero((self.results.labels == 2) & (self.results.compound >= np.float32(-0.8)))
+        self.assertEqual(len(rows), expected)
+
+    def test_pages_hold_only_the_visible_reviews(self):
+        rows = self.results.select(sort='compound')
+        page = self.results.page(rows, number=2, size=25)
+        self.assertEqual(len(page), 25)
+        self.assertEqual(page['row'].tolist(), self.results.index[rows[50:75]].tolist())
+        self.assertEqual(page['text'].tolist(), [self.reviews[row] for row in page['row']])
+        self.assertEqual(len(self.results.page(rows, number=len(rows) // 25, size=25)), len(rows) % 25)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,148 @@
+import asyncio
+import json
+import threading
+import unittest
+from unittest import mock
+
+from src.analyzer.cache import ScoreCache
+from src.analyzer.sentiment_analyzer import ProductSentimentAnalyzer
+from src.service.batching import MicroBatcher, ServiceOverloaded
+from src.service.server import InProcessClient, ScoringService
+
+REVIEWS = [
+    "This product is amazing! Really satisfied with the quality.",
+    "Worst purchase ever, completely disappointed.",
+    "It arrived on Tuesday.",
+    "Not bad at all, but the battery life is poor :(",
+]
+
+
+class ScoringServiceTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.analyzer = ProductSentimentAnalyzer(engine='vectorized')
+        self.service = ScoringService(self.analyzer, max_batch_size=8, max_wait=0.01, max_queue=64)
+        self.client = InProcessClient(self.service)
+
+    async def asyncTearDown(self):
+        await self.service.close()
+
+    async def test_single_review_matches_analyze_review(self):
+        for review in REVIEWS:
+            response = await self.client.post('/v1/analyze', {'text': review})
+            self.assertEqual(response.status, 200)
+            self.assertEqual(response.json, self.analyzer.analyze_review(review))
+
+    async def test_concurrent_requests_are_micro_batched(self):
+        reviews = REVIEWS * 10
+        responses = await asyncio.gather(
+            *(self.client.post('/v1/analyze', {'text': review}) for review in reviews)
+        )
+        self.assertEqual([r.json['text'] for r in responses], reviews)
+        stats = (await self.client.get('/health')).json
+        self.assertEqual(stats['scored'], len(reviews))
+        self.assertLess(stats['batches'], len(reviews))
+        self.assertLessEqual(stats['mean_batch_size'], 8)
+
+    async def test_batch_endpoint(self):
+        response = await self.client.post('/v1/analyze/batch', {'reviews': REVIEWS})
+        self.assertEqual(response.status, 200)
+        self.assertEqual(response.json['results'],
+                         [self.analyzer.analyze_review(review) for review in REVIEWS])
+        self.assertEqual(sum(response.json['counts'].values()), len(REVIEWS))
+
+    async def test_full_queue_answers_503(self):
+        service = ScoringService(self.analyzer, max_batch_size=1, max_wait=0, max_queue=2)
+        client = InProcessClient(service)
+        try:
+            responses = await asyncio.gather(
+                *(client.post('/v1/analyze', {'text': review}) for review in REVIEWS * 5)
+            )
+        finally:
+            await service.close()
+        statuses = {r.status for r in responses}
+        self.assertEqual(statuses, {200, 503})
+
+    async def test_client_errors(self):
+        self.assertEqual((await self.client.post('/v1/analyze', {'txt': 'x'})).status, 400)
+        self.assertEqual((await self.client.get('/v1/analyze')).status, 405)
+        self.assertEqual((await self.client.get('/nowhere')).status, 404)
+        status, _ = await self.service.handle('POST', '/v1/analyze', b'{not json')
+        self.assertEqual(status, 400)
+
+    async def test_http_round_trip(self):
+        server = await self.service.serve('127.0.0.1', 0)
+        port = server.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        try:
+            for review in REVIEWS[:2]:
+                body = json.dumps({'text': review}).encode()
+                writer.write(b'POST /v1/analyze HTTP/1.1\r\nHost: test\r\n'
+                             b'Content-Type: application/json\r\n'
+                             b'Content-Length: %d\r\n\r\n' % len(body) + body)
+                await writer.drain()
+                status_line = await reader.readline()
+                headers = {}
+                while (line := await reader.readline()) != b'\r\n':
+                    name, _, value = line.decode().partition(':')
+                    headers[name.lower()] = value.strip()
+                payload = json.loads(await reader.readexactly(int(headers['content-length'])))
+                self.assertIn(b'200', status_line)
+                self.assertEqual(payload, self.analyzer.analyze_review(review))
+        finally:
+            writer.close()
+            server.close()
+            await server.wait_closed()
+
+
+class PooledServiceTest(unittest.IsolatedAsyncioTestCase):
+    async def test_pool_goes_through_the_analyzer(self):
+        expected = ProductSentimentAnalyzer(engine='vectorized')
+        cache = ScoreCache()
+        analyzer = ProductSentimentAnalyzer(engine='vectorized', workers=2, cache=cache)
+        service = ScoringService(analyzer, workers=2, max_batch_size=8, max_wait=0.01)
+        client = InProcessClient(service)
+        try:
+            for _ in range(2):
+                response = await client.post('/v1/analyze/batch', {'reviews': REVIEWS})
+                self.assertEqual(response.json['results'],
+                                 [expected.analyze_review(review) for review in REVIEWS])
+            self.assertIsNotNone(analyzer._pool)
+        finally:
+            await service.close()
+        self.assertIsNone(analyzer._pool)
+        self.assertEqual((cache.misses, cache.hits), (len(REVIEWS), len(REVIEWS)))
+
+
+class MicroBatcherCloseTest(unittest.IsolatedAsyncioTestCase):
+    async def test_close_resolves_every_pending_job(self):
+        analyzer = ProductSentimentAnalyzer(engine='vectorized')
+        batcher = MicroBatcher(analyzer, max_batch_size=2, max_wait=60)
+        release = threading.Event()
+        score_batch = analyzer.score_batch
+
+        def blocked(texts):
+            release.wait(5)
+            return score_batch(texts)
+
+        with mock.patch.object(analyzer, 'score_batch', blocked):
+            await batcher.start()
+            scoring = asyncio.create_task(batcher.submit(REVIEWS[:2]))
+            await asyncio.sleep(0.05)
+            # In hand while the first batch is scored, then carried: it does not fit
+            in_hand = asyncio.create_task(batcher.submit(REVIEWS[2:3]))
+            await asyncio.sleep(0.01)
+            carried = asyncio.create_task(batcher.submit(REVIEWS[:2]))
+            await asyncio.sleep(0.01)
+            queued = asyncio.create_task(batcher.submit(REVIEWS[3:]))
+            await asyncio.sleep(0.01)
+            asyncio.get_running_loop().call_later(0.05, release.set)
+            await asyncio.wait_for(batcher.close(), 5)
+
+        self.assertEqual([result['text'] for result in await scoring], REVIEWS[:2])
+        for task in (in_hand, carried, queued):
+            with self.assertRaises(ServiceOverloaded):
+                await asyncio.wait_for(task, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
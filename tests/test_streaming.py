@@ -0,0 +1,76 @@
+import unittest
+
+from src.analyzer.dedup import NearDuplicateIndex
+from src.analyzer.sentiment_analyzer import ProductSentimentAnalyzer
+from src.analyzer.streaming import iter_chunks
+
+REVIEWS = [
+    'Great blender, crushes ice in seconds',
+    'The motor burned out after two weeks',
+    'Arrived on time',
+    'Terrible customer service, never again',
+    'Works as described, good value',
+    'Meh',
+    'Love the quality, worth every penny',
+]
+
+
+class ReviewStreamTest(unittest.TestCase):
+
+    def setUp(self):
+        self.analyzer = ProductSentimentAnalyzer(engine='vectorized')
+        self.analyzer.batch_size = 3
+
+    def test_iter_chunks(self):
+        self.assertEqual(list(iter_chunks(range(7), 3)), [[0, 1, 2], [3, 4, 5], [6]])
+        self.assertEqual(list(iter_chunks([], 3)), [])
+
+    def test_reads_one_chunk_at_a_time(self):
+        pulled = []
+
+        def reviews():
+            for review in REVIEWS * 10:
+                pulled.append(review)
+                yield review
+
+        stream = iter(self.analyzer.analyze_stream(reviews()))
+        next(stream)
+        self.assertEqual(len(pulled), self.analyzer.batch_size)
+        for _ in range(self.analyzer.batch_size):
+            next(stream)
+        self.assertEqual(len(pulled), 2 * self.analyzer.batch_size)
+
+    def test_matches_analyze_comments(self):
+        reviews = REVIEWS * 5
+        expected = self.analyzer.analyze_comments(reviews)
+        stream = self.analyzer.analyze_stream(iter(reviews), max_examples=2)
+        streamed = list(stream)
+        self.assertEqual(streamed, [expected.review(row) for row in range(expected.total)])
+        summary = stream.summary()
+        self.assertEqual(summary['counts'], expected.counts)
+        self.assertEqual(summary['average_scores'], expected.average_scores)
+        self.assertEqual(summary['distribution'], expected.distribution)
+        self.assertEqual(stream.sentiment_summary, expected.summary())
+        for label in ('positive', 'neutral', 'negative'):
+            self.assertEqual(summary[label], list(expected[label][:2]))
+
+    def test_chunks_and_run_keep_the_same_totals(self):
+        stream = self.analyzer.analyze_stream(iter(REVIEWS))
+        sizes = [len(chunk) for chunk, _, _ in stream.chunks()]
+        self.assertEqual(sizes, [3, 3, 1])
+        again = self.analyzer.analyze_stream(iter(REVIEWS)).run()
+        self.assertEqual(again['counts'], stream.counts)
+        self.assertEqual(stream.count, len(REVIEWS))
+
+    def test_summary_reports_deduplication(self):
+        analyzer = ProductSentimentAnalyzer(dedup=NearDuplicateIndex())
+        summary = analyzer.analyze_stream(iter(REVIEWS + REVIEWS[:3])).run()
+        report = summary['deduplication']
+        self.assertEqual((report['reviews'], report['unique'], report['duplicates']),
+                         (len(REVIEWS) + 3, len(REVIEWS), 3))
+        self.assertEqual(sum(summary['counts'].values()), len(REVIEWS) + 3)
+        self.assertEqual(sum(report['unique_counts'].values()), len(REVIEWS))
+
+
+if __name__ == '__main__':
+    unittest.main()
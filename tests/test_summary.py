@@ -0,0 +1,82 @@
+import json
+import random
+import unittest
+
+from benchmarks.corpus import generate_reviews
+from src.analyzer.sentiment_analyzer import ProductSentimentAnalyzer
+from src.analyzer.summary import SentimentSummary
+
+
+class SentimentSummaryTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.analyzer = ProductSentimentAnalyzer(engine='vectorized')
+        cls.reviews = list(generate_reviews(900, 3))
+        cls.single_pass = cls.analyzer.summarize(cls.reviews)
+
+    def shards(self, bounds):
+        return [self.analyzer.summarize(self.reviews[start:stop])
+                for start, stop in zip(bounds, bounds[1:])]
+
+    def test_single_pass_matches_analyze_comments(self):
+        results = self.analyzer.analyze_comments(self.reviews)
+        self.assertEqual(self.single_pass.count, len(self.reviews))
+        self.assertEqual(self.single_pass.counts, results['counts'])
+        self.assertEqual(self.single_pass, results.summary())
+        for key, value in results['average_scores'].items():
+            self.assertAlmostEqual(self.single_pass.average_scores[key], value, places=12)
+
+    def test_merge_order_does_not_matter(self):
+        shards = self.shards([0, 1, 250, 251, 600, 900])
+        rng = random.Random(0)
+        for _ in range(5):
+            rng.shuffle(shards)
+            with self.subTest(order=[shard.count for shard in shards]):
+                self.assertEqual(SentimentSummary.merged(shards), self.single_pass)
+        # Pairwise, as a tree of workers would combine them
+        left = SentimentSummary.merged(shards[:2]).merge(shards[2])
+        right = SentimentSummary().merge(shards[4]).merge(shards[3])
+        self.assertEqual(right.merge(left), self.single_pass)
+
+    def test_update_extends_a_summary(self):
+        summary = self.analyzer.summarize(self.reviews[:400])
+        self.analyzer.summarize(self.reviews[400:], summary)
+        self.assertEqual(summary, self.single_pass)
+        self.assertEqual(summary.merge(SentimentSummary()), self.single_pass)
+
+    def test_exact_statistics_survive_merging(self):
+        merged = SentimentSummary.merged(self.shards([0, 300, 900]))
+        self.assertEqual(merged.average_scores, self.single_pass.average_scores)
+        self.assertEqual(merged.compound_variance, self.single_pass.compound_variance)
+        self.assertEqual(merged.distribution(), self.single_pass.distribution())
+        self.assertEqual(sum(merged.histogram), len(self.reviews))
+
+    def test_dict_round_trip(self):
+        data = json.loads(json.dumps(self.single_pass.to_dict()))
+        restored = SentimentSummary.from_dict(data)
+        self.assertEqual(restored, self.single_pass)
+        self.assertEqual(restored.average_scores, self.single_pass.average_scores)
+        self.assertEqual(restored.distribution(), self.single_pass.distribution())
+        # A restored summary keeps merging exactly
+        shards = self.shards([0, 500, 900])
+        restored = SentimentSummary.from_dict(json.loads(json.dumps(shards[0].to_dict())))
+        self.assertEqual(restored.merge(shards[1]), self.single_pass)
+
+    def test_rejects_incompatible_input(self):
+        data = self.single_pass.to_dict()
+        data['version'] = 1
+        with self.assertRaises(ValueError):
+            SentimentSummary.from_dict(data)
+        with self.assertRaises(ValueError):
+            SentimentSummary(bins=10).merge(self.single_pass)
+
+    def test_empty_summary(self):
+        summary = SentimentSummary()
+        self.assertEqual(summary.average_scores, {'neg': 0, 'neu': 0, 'pos': 0, 'compound': 0})
+        self.assertEqual(summary.compound_variance, 0.0)
+        self.assertEqual(SentimentSummary.from_dict(summary.to_dict()), summary)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+import random
+import unittest
+
+from vaderSentiment.vaderSentiment import BOOSTER_DICT, NEGATE, SPECIAL_CASES
+
+from src.analyzer.sentiment_analyzer import ProductSentimentAnalyzer
+from src.analyzer.vectorized import SCORE_KEYS, VectorizedSentimentEngine
+
+EXAMPLES = [
+    "VADER is smart, handsome, and funny.",
+    "VADER is VERY SMART, uber handsome, and FRIGGIN FUNNY!!!",
+    "VADER is not smart, handsome, nor funny.",
+    "At least it isn't a horrible book.",
+    "The book was only kind of good.",
+    "The plot was good, but the characters are uncompelling and the dialog is not great.",
+    "Today only kinda sux! But I'll get by, lol",
+    "Make sure you :) or :D today!",
+    "Catch utf-8 emoji such as 💘 and 💋 and 😁",
+    "Sentiment analysis has never been this good!",
+    "With VADER, sentiment analysis is the shit!",
+    "On the other hand, VADER is quite bad ass",
+    "Without a doubt, excellent idea.",
+    "Roger Dodger is one of the least compelling variations on this theme.",
+    "good good but good bad bad",
+    "no no no",
+    "",
+    "   ",
+    "!!!",
+]
+
+
+def synthetic_corpus(analyzer, size, seed=13):
+    """Seeded reviews mixing lexicon words with every rule VADER applies"""
+    rng = random.Random(seed)
+    vocabulary = (sorted(analyzer.lexicon)[::7] + list(BOOSTER_DICT) + NEGATE +
+                  ' '.join(SPECIAL_CASES).split() +
+                  ['but', 'no', 'kind', 'of', 'least', 'at', 'very', 'never', 'so', 'this',
+                   'without', 'doubt', 'or', 'nor', 'product', 'delivery', ':)', ':('])
+    emojis = sorted(char for char in analyzer.emojis if len(char) == 1)[:300]
+    corpus = []
+    for _ in range(size):
+        words = []
+        for _ in range(rng.randint(0, 40)):
+            word = rng.choice(vocabulary)
+            roll = rng.random()
+            if roll < 0.08:
+                word = word.upper()
+            elif roll < 0.14:
+                word += rng.choice('!?.,')
+            elif roll < 0.18:
+                word = rng.choice(emojis)
+            elif roll < 0.2:
+                word += rng.choice(emojis)
+            words.append(word)
+        corpus.append(' '.join(words) + rng.choice(['', '!', '!!!!!', '??', '????', ' :)']))
+    return corpus
+
+
+class VectorizedEngineParityTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.engine = VectorizedSentimentEngine()
+        cls.reference = cls.engine.analyzer
+
+    def assert_parity(self, texts):
+        scores = self.engine.score_batch(texts)
+        for i, text in enumerate(texts):
+            expected = self.reference.polarity_scores(text)
+            got = {key: float(scores[key][i]) for key in SCORE_KEYS}
+            self.assertEqual(got, expected, msg=repr(text))
+
+    def test_vader_examples(self):
+        self.assert_parity(EXAMPLES)
+
+    def test_synthetic_corpus(self):
+        self.assert_parity(synthetic_corpus(self.reference, 20000))
+
+    def test_single_review(self):
+        for text in EXAMPLES:
+            self.assertEqual(self.engine.polarity_scores(text), self.reference.polarity_scores(text))
+
+    def test_empty_batch(self):
+        scores = self.engine.score_batch([])
+        self.assertEqual({key: len(values) for key, values in scores.items()},
+                         dict.fromkeys(SCORE_KEYS, 0))
+
+    def test_rejects_non_text(self):
+        with self.assertRaises(TypeError):
+            self.engine.score_batch(['fine', None])
+
+
+class AnalyzerEngineTest(unittest.TestCase):
+    def test_engines_agree(self):
+        comments = EXAMPLES + synthetic_corpus(VectorizedSentimentEngine().analyzer, 3000, seed=5)
+        vader = ProductSentimentAnalyzer().analyze_comments(comments)
+        vectorized = ProductSentimentAnalyzer(engine='vectorized')
+        vectorized.batch_size = 700
+        self.assertEqual(vectorized.analyze_comments(comments), vader)
+
+    def test_analyze_review(self):
+        vader = ProductSentimentAnalyzer()
+        vectorized = ProductSentimentAnalyzer(engine='vectorized')
+        for text in EXAMPLES:
+            self.assertEqual(vectorized.analyze_review(text), vader.analyze_review(text))
+
+    def test_unknown_engine(self):
+        with self.assertRaises(ValueError):
+            ProductSentimentAnalyzer(engine='gpu')
@@ -1,33 +1,162 @@
+import json
+import os
+import threading
+import time
+
 import requests
 import streamlit as st
-from datetime import datetime
+from requests.adapters import HTTPAdapter
 
-# Cache the customizations for 1 hour to reduce API calls
-@st.cache_data(ttl=3600)
-def get_ui_customizations():
+from src.config.settings import CUSTOMIZATION_CACHE_PATH
+
+# Seconds before a fetched config is refreshed in the background
+MAX_AGE = 3600
+# Seconds to wait after a failed refresh before trying again
+RETRY_INTERVAL = 60
+CONNECT_TIMEOUT = 2.0
+READ_TIMEOUT = 5.0
+
+
+class CustomizationClient:
+    """Stale-while-revalidate client for the admin customization endpoint
+
+    get() never waits on the network: it returns the last good config
+    (from memory, or the copy persisted at cache_path on a cold start)
+    and, once that is older than max_age, refreshes it on a background
+    thread. Requests share one pooled session with connect/read
+    timeouts and revalidate with the ETag of the last response. A failed
+    refresh keeps serving the last good config.
+    """
+
+    def __init__(self, url, api_key=None, cache_path=CUSTOMIZATION_CACHE_PATH, max_age=MAX_AGE,
+                 retry_interval=RETRY_INTERVAL, connect_timeout=CONNECT_TIMEOUT,
+                 read_timeout=READ_TIMEOUT, session=None, clock=time.time):
+        self.url = url
+        self.cache_path = cache_path
+        self.max_age = max_age
+        self.retry_interval = retry_interval
+        self.timeout = (connect_timeout, read_timeout)
+        self.clock = clock
+        self.session = session or self._session()
+        if api_key:
+            self.session.headers['Authorization'] = f'Bearer {api_key}'
+        self.config = None
+        self.etag = None
+        self.fetched_at = None
+        self.last_error = None
+        self._next_attempt = 0
+        self._lock = threading.Lock()
+        self._refresh_thread = None
+        self._load()
+
+    @staticmethod
+    def _session():
+        session = requests.Session()
+        # One small pool per host; retries are left to the next refresh
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=4, max_retries=0)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+    def get(self):
+        """Last good config (None before the first successful fetch), refreshed in the background"""
+        with self._lock:
+            config = self.config
+            now = self.clock()
+            stale = self.fetched_at is None or now - self.fetched_at >= self.max_age
+            if stale and now >= self._next_attempt:
+                self._start_refresh()
+        return config
+
+    def _start_refresh(self):
+        """Start one background refresh unless one is running; call with the lock held"""
+        if self._refresh_thread is not None and self._refresh_thread.is_alive():
+            return
+        self._refresh_thread = threading.Thread(target=self.refresh, name='customization-refresh',
+                                                daemon=True)
+        self._refresh_thread.start()
+
+    def wait(self, timeout=None):
+        """Block until the running background refresh, if any, has finished"""
+        thread = self._refresh_thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def refresh(self):
+        """Fetch now; True when the config is up to date, False when the last good one stays"""
+        headers = {'If-None-Match': self.etag} if self.etag else {}
+        try:
+            response = self.session.get(self.url, headers=headers, timeout=self.timeout)
+            if response.status_code == 304:
+                config, etag = self.config, self.etag
+            else:
+                response.raise_for_status()
+                config, etag = response.json(), response.headers.get('ETag')
+                if not isinstance(config, dict):
+                    raise ValueError('Customizations must be a JSON object')
+        except (requests.RequestException, ValueError) as e:
+            print(f"Error fetching customizations: {e}")
+            with self._lock:
+                self.last_error = str(e)
+                self._next_attempt = self.clock() + self.retry_interval
+            return False
+        with self._lock:
+            self.config, self.etag = config, etag
+            self.fetched_at = self.clock()
+            self.last_error = None
+            self._next_attempt = 0
+        self._save()
+        return True
+
+    def _load(self):
+        """Last good config persisted by an earlier process, if it came from the same URL"""
+        try:
+            with open(self.cache_path, encoding='utf-8') as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return
+        if isinstance(saved, dict) and saved.get('url') == self.url and isinstance(saved.get('config'), dict):
+            self.config = saved['config']
+            self.etag = saved.get('etag')
+            self.fetched_at = saved.get('fetched_at')
+
+    def _save(self):
+        with self._lock:
+            saved = {'url': self.url, 'fetched_at': self.fetched_at, 'etag': self.etag,
+                     'config': self.config}
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.cache_path)), exist_ok=True)
+            partial = f'{self.cache_path}.{threading.get_ident()}.tmp'
+            with open(partial, 'w', encoding='utf-8') as f:
+                json.dump(saved, f)
+            os.replace(partial, self.cache_path)
+        except OSError as e:
+            print(f"Could not persist customizations: {e}")
+
+    def close(self):
+        self.session.close()
+
+
+# One client per server process, shared by every session
+@st.cache_resource
+def get_customization_client():
     api_key = st.secrets.get("ADMIN_API_KEY")
     api_url = st.secrets.get("ADMIN_API_URL")
-    
+
     if not api_key or not api_url:
         return None
-        
-    headers = {"Authorization": f"Bearer {api_key}"}
-    
-    try:
-        response = requests.get(api_url, headers=headers)
-        if response.status_code == 200:
-            return response.json()
-        else:
-            print(f"Error fetching customizations: {response.status_code}")
-            return None
-    except Exception as e:
-        print(f"Error fetching customizations: {e}")
-        return None
+
+    return CustomizationClient(api_url, api_key)
+
+def get_ui_customizations():
+    # Never blocks page render: the last good config is served while a refresh runs
+    client = get_customization_client()
+    return client.get() if client is not None else None
 
 # Apply customizations to the UI
 def apply_customizations():
     customizations = get_ui_customizations()
-    
+
     if customizations:
         # Set page title and favicon
         app_title = customizations.get("app_title", "NLP Sentiment Analyzer")
@@ -36,7 +165,7 @@ def apply_customizations():
             page_icon="📊",
             layout="wide"
         )
-        
+
         # Apply theme color
         theme_color = customizations.get("theme_color", "#1E88E5")
         st.markdown(f"""
@@ -49,8 +178,8 @@ def apply_customizations():
         }}
         </style>
         """, unsafe_allow_html=True)
-        
+
         # Return customizations for further use
         return customizations
-    
-    return None
\ No newline at end of file
+
+    return None